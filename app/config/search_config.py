@@ -1,5 +1,5 @@
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 
 class SearchConfig:
@@ -12,9 +12,165 @@ class SearchConfig:
     MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
     TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "10"))
 
+    # Concurrent page fetching
+    MAX_CONCURRENT_FETCHES = int(os.getenv("MAX_CONCURRENT_FETCHES", "10"))
+    MAX_CONCURRENT_FETCHES_PER_HOST = int(
+        os.getenv("MAX_CONCURRENT_FETCHES_PER_HOST", "2")
+    )
+
+    # Fetch reliability: up to MAX_RETRIES retries with jittered backoff on
+    # connection errors, timeouts, 429 and 5xx; a host's circuit opens after
+    # BREAKER_FAILURES consecutive failures and stays open for BREAKER_COOLDOWN
+    # seconds. Once LATENCY_MIN_SAMPLES fetches have been timed, a whole fetch
+    # gets ADAPTIVE_TIMEOUT_FACTOR times the host's p99 (within
+    # ADAPTIVE_TIMEOUT_MIN and TIMEOUT), and with HEDGE_ENABLED a second
+    # request goes out after the p95 for hosts whose p95 is HEDGE_TAIL_RATIO
+    # times their median.
+    RETRY_BACKOFF = float(os.getenv("RETRY_BACKOFF", "0.25"))
+    RETRY_BACKOFF_MAX = float(os.getenv("RETRY_BACKOFF_MAX", "4"))
+    BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+    BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "60"))
+    ADAPTIVE_TIMEOUTS = os.getenv("ADAPTIVE_TIMEOUTS", "true").lower() == "true"
+    ADAPTIVE_TIMEOUT_MIN = float(os.getenv("ADAPTIVE_TIMEOUT_MIN", "2"))
+    ADAPTIVE_TIMEOUT_FACTOR = float(os.getenv("ADAPTIVE_TIMEOUT_FACTOR", "3"))
+    LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", "200"))
+    LATENCY_MIN_SAMPLES = int(os.getenv("LATENCY_MIN_SAMPLES", "20"))
+    HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_TAIL_RATIO = float(os.getenv("HEDGE_TAIL_RATIO", "3"))
+
+    # Shared HTTP client: connection pool, keep-alive, DNS cache, optional HTTP/2
+    # (needs the h2 package); sites can set max_connections in SITE_CONFIGS
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "6"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "40"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+    DNS_CACHE_TTL = float(os.getenv("DNS_CACHE_TTL", "300"))
+
+    # Search providers, comma-separated and tried in order until one answers;
+    # the fixture provider reads {query: [urls]} from SEARCH_FIXTURE_PATH
+    SEARCH_PROVIDERS = os.getenv("SEARCH_PROVIDERS", "google")
+    SEARCH_FIXTURE_PATH = os.getenv("SEARCH_FIXTURE_PATH", "")
+
+    # Search execution, searches beyond the queue depth are rejected
+    MAX_CONCURRENT_SEARCHES = int(os.getenv("MAX_CONCURRENT_SEARCHES", "8"))
+    SEARCH_QUEUE_DEPTH = int(os.getenv("SEARCH_QUEUE_DEPTH", "32"))
+    SEARCH_IO_WORKERS = int(os.getenv("SEARCH_IO_WORKERS", "16"))
+    SEARCH_PARSE_WORKERS = int(os.getenv("SEARCH_PARSE_WORKERS", str(os.cpu_count() or 1)))
+    SEARCH_PARSE_USE_PROCESSES = (
+        os.getenv("SEARCH_PARSE_USE_PROCESSES", "false").lower() == "true"
+    )
+    # Worker processes are started with SEARCH_PARSE_START_METHOD and replaced
+    # after SEARCH_PARSE_RECYCLE_TASKS tasks each (0 never) to bound parser
+    # memory growth; a page whose parse takes longer than SEARCH_PARSE_TIMEOUT
+    # seconds fails. Its worker process is terminated once the others had as
+    # long again to finish; a parse thread cannot be, and holds its slot until
+    # the parse returns.
+    SEARCH_PARSE_START_METHOD = os.getenv("SEARCH_PARSE_START_METHOD", "forkserver")
+    SEARCH_PARSE_RECYCLE_TASKS = int(os.getenv("SEARCH_PARSE_RECYCLE_TASKS", "500"))
+    SEARCH_PARSE_TIMEOUT = float(os.getenv("SEARCH_PARSE_TIMEOUT", "10"))
+
+    # Politeness, seconds between requests to hosts without a site config
+    DEFAULT_DOMAIN_DELAY = float(os.getenv("DEFAULT_DOMAIN_DELAY", "0.5"))
+    DOMAIN_BURST = float(os.getenv("DOMAIN_BURST", "1"))
+
+    # Search result cache, backend is one of memory, sqlite (shared by workers) or none
+    RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")
+    RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "300"))
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+    RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "/tmp/bharatx_result_cache.sqlite3")
+
+    # Extraction results keyed by page content hash, same backends as above
+    PARSE_CACHE_BACKEND = os.getenv("PARSE_CACHE_BACKEND", "memory")
+    PARSE_CACHE_TTL = int(os.getenv("PARSE_CACHE_TTL", "86400"))
+    PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "4096"))
+    PARSE_CACHE_PATH = os.getenv("PARSE_CACHE_PATH", "/tmp/bharatx_parse_cache.sqlite3")
+
+    # Result URL lists per query, same backends as above; rankings change
+    # more slowly than prices, so they live longer than search results
+    SERP_CACHE_BACKEND = os.getenv("SERP_CACHE_BACKEND", "memory")
+    SERP_CACHE_TTL = int(os.getenv("SERP_CACHE_TTL", "3600"))
+    SERP_CACHE_MAX_ENTRIES = int(os.getenv("SERP_CACHE_MAX_ENTRIES", "2048"))
+    SERP_CACHE_PATH = os.getenv("SERP_CACHE_PATH", "/tmp/bharatx_serp_cache.sqlite3")
+
+    # On-disk HTTP page cache, revalidated with ETag/Last-Modified
+    PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"
+    PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", "/tmp/bharatx_page_cache.sqlite3")
+    PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    PAGE_CACHE_MAX_AGE = int(os.getenv("PAGE_CACHE_MAX_AGE", "86400"))
+
+    # HTML parser: lxml, bs4-lxml or html.parser, failures fall back in that order
+    PARSER_BACKEND = os.getenv("PARSER_BACKEND", "lxml")
+    # Take prices from JSON-LD/meta/microdata when present and skip the DOM passes
+    STRUCTURED_FAST_PATH = os.getenv("STRUCTURED_FAST_PATH", "true").lower() == "true"
+    # Known retailers run only their SITE_CONFIGS selectors, the generic sweep on a miss
+    SITE_EXTRACTORS = os.getenv("SITE_EXTRACTORS", "true").lower() == "true"
+
+    # Page bodies are streamed and cut at the size cap (per site in SITE_CONFIGS);
+    # with early stop, also once the price-bearing parts of the page have arrived
+    MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", str(2 * 1024 * 1024)))
+    STREAM_EARLY_STOP = os.getenv("STREAM_EARLY_STOP", "true").lower() == "true"
+    STREAM_TAIL_BYTES = int(os.getenv("STREAM_TAIL_BYTES", str(64 * 1024)))
+    STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", str(16 * 1024)))
+
+    # Pre-fetch URL filter. Denied hosts (and their subdomains) and paths
+    # matching URL_DENY_PATTERN are never fetched; a host is skipped once
+    # URL_FILTER_MIN_PAGES of its pages had no prices, though every
+    # URL_FILTER_PROBE_EVERY-th URL still goes through in case that changes
+    # (0 never lets one through).
+    # Allowed hosts and SITE_CONFIGS retailers are always fetched. Responses
+    # that are not HTML or whose Content-Length is out of bounds are dropped
+    # before the body is read.
+    URL_FILTER = os.getenv("URL_FILTER", "true").lower() == "true"
+    URL_DENY_HOSTS = os.getenv(
+        "URL_DENY_HOSTS",
+        "youtube.com,reddit.com,wikipedia.org,facebook.com,instagram.com,twitter.com,"
+        "x.com,quora.com,pinterest.com,linkedin.com,tiktok.com,news.google.com",
+    )
+    URL_ALLOW_HOSTS = os.getenv("URL_ALLOW_HOSTS", "")
+    URL_DENY_PATTERN = os.getenv(
+        "URL_DENY_PATTERN",
+        r"\.(?:pdf|docx?|xlsx?|pptx?|zip|rar|gz|jpe?g|png|gif|webp|svg|mp3|mp4|avi|mov)$"
+        r"|/(?:news|blog|blogs|forum|forums|wiki|community|questions)/",
+    )
+    URL_FILTER_MIN_PAGES = int(os.getenv("URL_FILTER_MIN_PAGES", "5"))
+    URL_FILTER_PROBE_EVERY = int(os.getenv("URL_FILTER_PROBE_EVERY", "20"))
+    MIN_CONTENT_LENGTH = int(os.getenv("MIN_CONTENT_LENGTH", "128"))
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", str(20 * 1024 * 1024)))
+
+    # Result URLs are stripped of tracking parameters and each page is
+    # fetched once per search: host variants, AMP and locale paths and the
+    # rel=canonical links of pages fetched earlier (up to CANONICAL_MAX_ENTRIES,
+    # for CANONICAL_TTL seconds, and only to the page's own domain) all count
+    # as the same page. Results from one site with the same product
+    # and prices are merged into the best-ranked one.
+    CANONICAL_DEDUP = os.getenv("CANONICAL_DEDUP", "true").lower() == "true"
+    CANONICAL_MAX_ENTRIES = int(os.getenv("CANONICAL_MAX_ENTRIES", "50000"))
+    CANONICAL_TTL = float(os.getenv("CANONICAL_TTL", str(6 * 3600)))
+    MERGE_DUPLICATE_RESULTS = os.getenv("MERGE_DUPLICATE_RESULTS", "true").lower() == "true"
+
+    # Per-stage latency histograms and pipeline counters, served in the
+    # Prometheus text format at /api/metrics/; hosts beyond METRICS_MAX_HOSTS
+    # are labelled "other"
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_MAX_HOSTS = int(os.getenv("METRICS_MAX_HOSTS", "200"))
+
+    # Responses of at least RESPONSE_COMPRESSION_MIN_BYTES are gzipped for
+    # clients that accept it, by Starlette's GZipMiddleware
+    RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "true").lower() == "true"
+    RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "2048"))
+    RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+
     # Search limits
     MAX_RESULTS = int(os.getenv("MAX_SEARCH_RESULTS", "20"))
     DEFAULT_RESULTS = int(os.getenv("DEFAULT_SEARCH_RESULTS", "5"))
+    MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "500"))
+    # Seconds a search may take before it returns what it has, requests can
+    # ask for less or more up to the maximum
+    SEARCH_DEADLINE = float(os.getenv("SEARCH_DEADLINE", "20"))
+    MAX_SEARCH_DEADLINE = float(os.getenv("MAX_SEARCH_DEADLINE", "60"))
+    # Known retailers from SITE_CONFIGS get free fetch slots first
+    PRIORITIZE_KNOWN_SITES = os.getenv("PRIORITIZE_KNOWN_SITES", "true").lower() == "true"
 
     # User agents for different requests
     USER_AGENTS = [
@@ -42,11 +198,15 @@ class SearchConfig:
         "GENERIC": r"\d+(?:,\d{3})*(?:\.\d{2})?\s*(?:USD|INR|EUR|GBP|JPY)",
     }
 
+    # Second-level labels under which country-code domains are registered
+    SECOND_LEVEL_LABELS = {"co", "com", "net", "org", "gov", "ac", "edu", "ne", "or"}
+
     # Site-specific configurations
     SITE_CONFIGS = {
         "amazon": {
             "delay": 3.0,
             "max_pages": 5,
+            "max_body_bytes": 4 * 1024 * 1024,
             "selectors": {
                 "title": "#productTitle",
                 "price": ".a-price .a-offscreen",
@@ -80,6 +240,55 @@ class SearchConfig:
             site_type, {"delay": cls.SEARCH_DELAY, "max_pages": 3, "selectors": {}}
         )
 
+    @classmethod
+    def get_site_type(cls, host: str) -> Optional[str]:
+        """Get the configured site a host belongs to, e.g. www.amazon.in -> amazon"""
+        labels = host.lower().split(".")
+        for site_type in cls.SITE_CONFIGS:
+            if site_type in labels:
+                return site_type
+        return None
+
+    @classmethod
+    def get_registrable_domain(cls, host: str) -> str:
+        """
+        The domain a host was registered under, e.g. m.amazon.in -> amazon.in,
+        www.argos.co.uk -> argos.co.uk; IP addresses are returned as they are
+        """
+        labels = host.lower().rstrip(".").split(".")
+        if len(labels) <= 2 or labels[-1].isdigit():
+            return ".".join(labels)
+        # Country-code domains with a generic second level, e.g. co.uk, com.au
+        if len(labels[-1]) == 2 and labels[-2] in cls.SECOND_LEVEL_LABELS:
+            return ".".join(labels[-3:])
+        return ".".join(labels[-2:])
+
+    @classmethod
+    def get_domain_delay(cls, host: str) -> float:
+        """Get the minimum delay between requests to a host"""
+        site_type = cls.get_site_type(host)
+        if site_type is None:
+            return cls.DEFAULT_DOMAIN_DELAY
+        return cls.SITE_CONFIGS[site_type]["delay"]
+
+    @classmethod
+    def get_host_pool_size(cls, host: str) -> int:
+        """Get the most open connections to keep to a host"""
+        site_type = cls.get_site_type(host)
+        if site_type is None:
+            return cls.HTTP_MAX_CONNECTIONS_PER_HOST
+        return cls.SITE_CONFIGS[site_type].get(
+            "max_connections", cls.HTTP_MAX_CONNECTIONS_PER_HOST
+        )
+
+    @classmethod
+    def get_max_body_bytes(cls, host: str) -> int:
+        """Get the most bytes of a page body to download from a host"""
+        site_type = cls.get_site_type(host)
+        if site_type is None:
+            return cls.MAX_BODY_BYTES
+        return cls.SITE_CONFIGS[site_type].get("max_body_bytes", cls.MAX_BODY_BYTES)
+
     @classmethod
     def get_price_patterns(cls) -> list:
         """Get all price patterns"""
@@ -91,3 +300,10 @@ class SearchConfig:
         if num_results <= 0:
             return cls.DEFAULT_RESULTS
         return min(num_results, cls.MAX_RESULTS)
+
+    @classmethod
+    def validate_deadline(cls, deadline: Optional[float]) -> float:
+        """Validate and limit a search deadline in seconds"""
+        if deadline is None or deadline <= 0:
+            return cls.SEARCH_DEADLINE
+        return min(deadline, cls.MAX_SEARCH_DEADLINE)
@@ -5,6 +5,12 @@ class PostSearchBody(BaseModel):
     query: str
     country: str
     version: int | None = None
+    # Seconds before the search returns partial results
+    deadline: float | None = None
+
+
+class PostBatchSearchBody(BaseModel):
+    items: list[PostSearchBody]
 
 
 class SearchResult(BaseModel):
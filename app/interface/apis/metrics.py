@@ -0,0 +1,69 @@
+from typing import Dict, Iterator, Tuple
+
+from fastapi.responses import PlainTextResponse, Response
+
+from app.config.search_config import SearchConfig
+from app.interface.apis.search import result_cache
+from app.services.cache import ParsedResultCache, SerpCache
+from app.services.canonical import CanonicalUrls
+from app.services.executors import SearchAdmission, SearchExecutor
+from app.services.fetch_policy import FetchPolicy
+from app.services.site_extractors import SiteExtractors
+from app.services.url_filter import UrlFilter
+from app.utils.metrics import Metrics
+from app.utils.response import APIResponse
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Gauge = Tuple[str, Dict[str, object], float]
+
+
+def component_gauges() -> Iterator[Gauge]:
+    """
+    State the other components already keep, read at scrape time so the
+    request path pays nothing for it
+    """
+    caches = {
+        "result": result_cache,
+        "parse": ParsedResultCache.shared(),
+        "serp": SerpCache.shared(),
+    }
+    for name, cache in caches.items():
+        if cache is None:
+            continue
+        for key, value in cache.stats().items():
+            yield f"cache_{key}", {"cache": name}, value
+
+    for site_type, stats in SiteExtractors.stats().items():
+        yield "site_extractor_pages", {"site": site_type}, stats["pages"]
+        yield "site_extractor_hits", {"site": site_type}, stats["hits"]
+
+    hosts = FetchPolicy.stats()
+    yield "open_circuits", {}, sum(health["open"] for health in hosts.values())
+    yield "tracked_hosts", {}, len(hosts)
+
+    url_filter = UrlFilter.stats()
+    for reason, count in url_filter["skipped"].items():
+        yield "url_filter_skipped", {"reason": reason}, count
+    yield "url_filter_hosts_without_prices", {}, url_filter["hosts_without_prices"]
+    yield "url_filter_saved_seconds", {"stage": "fetch"}, url_filter["saved_fetch_seconds"]
+    yield "url_filter_saved_seconds", {"stage": "parse"}, url_filter["saved_parse_seconds"]
+
+    for key, value in CanonicalUrls.stats().items():
+        yield f"canonical_{key}", {}, value
+
+    for key, value in SearchExecutor.stats().items():
+        yield f"parse_pool_{key}", {}, value
+
+    yield "searches_pending", {}, SearchAdmission.pending()
+
+
+async def get_metrics() -> Response:
+    """
+    Pipeline metrics in the Prometheus text format
+    """
+    if not SearchConfig.METRICS_ENABLED:
+        return APIResponse(data=None, message="Metrics are disabled", status_code=404)
+    # Cache sizes may come from SQLite, so the gauges are read off the event loop
+    page = await SearchExecutor.run_io(Metrics.render, component_gauges())
+    return PlainTextResponse(page, media_type=PROMETHEUS_MEDIA_TYPE)
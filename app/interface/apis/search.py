@@ -1,11 +1,151 @@
-from fastapi import Body, Header
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional
 
+from fastapi import Body, Header, Query
+from fastapi.responses import StreamingResponse
+
+from app.config.search_config import SearchConfig
 from app.utils.country import CountryCode
+from app.utils.metrics import Metrics
 from app.utils.response import APIResponse
-from app.entities.search import PostSearchBody
+from app.utils.serialization import serialize, to_json
+from app.entities.search import PostBatchSearchBody, PostSearchBody
 from app.access_control.decorators import auth_required
-from app.services.search import SearchVersion 
+from app.services.batch import BatchSearch
+from app.services.cache import ResultCache
+from app.services.executors import SearchAdmission, SearchRejectedError
+from app.services.search import BaseService, PageStatus, SearchVersion, result_signature
+
+logger = logging.getLogger(__name__)
+
+result_cache = ResultCache.from_config()
+
+
+def request_expiry(deadline: Optional[float]) -> float:
+    """
+    Loop time by which a request must answer, counted from its arrival so
+    that waiting for admission uses up the deadline too
+    """
+    return asyncio.get_running_loop().time() + SearchConfig.validate_deadline(deadline)
+
+
+def remaining(expires: float) -> float:
+    return expires - asyncio.get_running_loop().time()
+
+
+def timed_out_results(query: str) -> Dict:
+    # Nothing finished before the caller's deadline
+    return {"query": query, "results": [], "pages": [], "status": PageStatus.TIMED_OUT}
+
+
+async def run_search(search_service: BaseService, query: str, expires: float) -> Dict:
+    try:
+        async with SearchAdmission.admit(timeout=remaining(expires)):
+            if remaining(expires) <= 0:
+                return timed_out_results(query)
+            return await search_service.asearch(query, deadline=remaining(expires))
+    except asyncio.TimeoutError:
+        logger.warning(f"Search deadline reached waiting for admission: {query}")
+        return timed_out_results(query)
+
+
+def is_cacheable(results: Dict) -> bool:
+    # Partial results from a search that hit its deadline are not reused
+    timed_out = any(
+        page["status"] == PageStatus.TIMED_OUT for page in results.get("pages", [])
+    )
+    return bool(results["results"]) and "error" not in results and not timed_out
+
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def build_query(body: PostSearchBody) -> str:
+    if body.country:
+        return f"Best Price of {body.query} in {CountryCode.get_country_name(body.country)}"
+    return body.query
+
+
+def stream_record(kind: str, data: Dict, stream_format: str) -> bytes:
+    if stream_format == "sse":
+        return b"event: " + kind.encode() + b"\ndata: " + to_json(data) + b"\n\n"
+    return to_json({"type": kind, "data": data}) + b"\n"
+
+
+async def stream_search(
+    search_service: BaseService,
+    query: str,
+    stream_format: str,
+    expires: float,
+) -> AsyncIterator[bytes]:
+    """
+    One record per result as its page is extracted, then a summary record
+    """
+    start = time.perf_counter()
+    summary = {"query": query, "cached": False, "ranking": []}
+    cache_key = ResultCache.key(query, search_service._version)
+    cached = await result_cache.aget(cache_key) if result_cache is not None else None
 
+    if cached is not None:
+        summary["cached"] = True
+        for rank, result in enumerate(cached["results"], start=1):
+            yield stream_record("result", {"rank": rank, **serialize(result)}, stream_format)
+            summary["ranking"].append(result.link)
+        summary[PageStatus.COMPLETED] = len(cached["results"])
+    else:
+        pages = []
+        # Results already sent, a later copy of the same offer is not
+        seen = set()
+        try:
+            async with SearchAdmission.admit(timeout=remaining(expires)):
+                async for page in search_service.aiter_search_and_extract(
+                    query, SearchConfig.DEFAULT_RESULTS, max(remaining(expires), 0.001)
+                ):
+                    pages.append(page)
+                    if page.result is not None and SearchConfig.MERGE_DUPLICATE_RESULTS:
+                        signature = result_signature(page.result)
+                        if signature in seen:
+                            page.status, page.result = PageStatus.DUPLICATE, None
+                        elif signature is not None:
+                            seen.add(signature)
+                    if page.result is not None:
+                        record = {"rank": page.index + 1, **serialize(page.result)}
+                        yield stream_record("result", record, stream_format)
+        except asyncio.TimeoutError:
+            logger.warning(f"Search deadline reached waiting for admission: {query}")
+            summary["error"] = "Search deadline reached"
+        except Exception as e:
+            logger.error(f"Error in streamed search: {str(e)}")
+            summary["error"] = str(e)
+
+        pages.sort(key=lambda page: page.index)
+        summary["ranking"] = [page.result.link for page in pages if page.result]
+        for status in (
+            PageStatus.COMPLETED,
+            PageStatus.NO_PRICES,
+            PageStatus.FAILED,
+            PageStatus.TIMED_OUT,
+            PageStatus.SKIPPED,
+            PageStatus.DUPLICATE,
+        ):
+            summary[status] = sum(page.status == status for page in pages)
+
+        results = {
+            "query": query,
+            "results": [page.result for page in pages if page.result],
+            "pages": [{"url": page.url, "status": page.status} for page in pages],
+        }
+        if result_cache is not None and "error" not in summary and is_cacheable(results):
+            await result_cache.aset(cache_key, results)
+
+    elapsed = time.perf_counter() - start
+    summary["elapsed_ms"] = round(elapsed * 1000)
+    Metrics.observe(
+        "stage_seconds", elapsed, stage="request", endpoint="stream", version=search_service._version
+    )
+    yield stream_record("summary", summary, stream_format)
 
 
 @auth_required
@@ -13,12 +153,111 @@ async def search_result(
     authorization: str = Header(...),
     body: PostSearchBody = Body(...),
 ) -> APIResponse:
+    expires = request_expiry(body.deadline)
     search_service = SearchVersion(version=body.version).get_service()
+    query = build_query(body)
 
-    query = body.query
-    if body.country:
-        query = f"Best Price of {body.query} in {CountryCode.get_country_name(body.country)}"
+    with Metrics.span("request", endpoint="search", version=search_service._version):
+        try:
+            if result_cache is None:
+                results = await run_search(search_service, query, expires)
+            else:
+                # An identical search in flight is shared for as long as this
+                # request's own deadline allows
+                results = await result_cache.get_or_compute(
+                    ResultCache.key(query, search_service._version),
+                    lambda: run_search(search_service, query, expires),
+                    cacheable=is_cacheable,
+                    timeout=max(remaining(expires), 0),
+                )
+        except asyncio.TimeoutError:
+            logger.warning(f"Search deadline reached waiting for a shared search: {query}")
+            results = timed_out_results(query)
+        except SearchRejectedError as e:
+            Metrics.inc("rejected", endpoint="search")
+            return APIResponse(data=None, message=str(e), status_code=503)
+
+        return APIResponse(data=results)
+
+
+@auth_required
+async def search_result_stream(
+    authorization: str = Header(...),
+    accept: Optional[str] = Header(None),
+    body: PostSearchBody = Body(...),
+    requested_format: Optional[str] = Query(None, alias="format"),
+):
+    """
+    Streaming variant of search_result: NDJSON by default, Server-Sent Events
+    with ?format=sse or an Accept: text/event-stream header
+    """
+    expires = request_expiry(body.deadline)
+    search_service = SearchVersion(version=body.version).get_service()
+    query = build_query(body)
+
+    stream_format = requested_format or ("sse" if accept and "text/event-stream" in accept else "ndjson")
+    if stream_format not in STREAM_MEDIA_TYPES:
+        return APIResponse(data=None, message=f"Unsupported format: {stream_format}", status_code=400)
+
+    # Reject before the response starts; the slot itself is taken while streaming
+    try:
+        SearchAdmission.check_capacity()
+    except SearchRejectedError as e:
+        Metrics.inc("rejected", endpoint="stream")
+        return APIResponse(data=None, message=str(e), status_code=503)
+
+    return StreamingResponse(
+        stream_search(search_service, query, stream_format, expires),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@auth_required
+async def search_batch_result(
+    authorization: str = Header(...),
+    body: PostBatchSearchBody = Body(...),
+) -> APIResponse:
+    """
+    Many searches in one call; results are returned per item, in order
+    """
+    if len(body.items) > SearchConfig.MAX_BATCH_ITEMS:
+        message = f"At most {SearchConfig.MAX_BATCH_ITEMS} items per batch"
+        return APIResponse(data=None, message=message, status_code=400)
+
+    start = time.perf_counter()
+    searches = [
+        (SearchVersion(version=item.version).get_service(), build_query(item), item.deadline)
+        for item in body.items
+    ]
+    keys = [ResultCache.key(query, service._version) for service, query, _ in searches]
+
+    items: List[Optional[Dict]] = [None] * len(searches)
+    if result_cache is not None:
+        items = list(await asyncio.gather(*(result_cache.aget(key) for key in keys)))
+    pending = [i for i, item in enumerate(items) if item is None]
+
+    batch = BatchSearch()
+    try:
+        # One slot for the whole batch; its fetches share the fetcher's
+        # per-host limits instead of taking a slot per search
+        async with SearchAdmission.admit():
+            results = await batch.run([searches[i] for i in pending])
+    except SearchRejectedError as e:
+        Metrics.inc("rejected", endpoint="batch")
+        return APIResponse(data=None, message=str(e), status_code=503)
 
-    results = search_service.search(query)
+    for i, results_for_item in zip(pending, results):
+        items[i] = results_for_item
+        if result_cache is not None and is_cacheable(results_for_item):
+            await result_cache.aset(keys[i], results_for_item)
 
-    return APIResponse(data=results)
+    stats = {
+        "items": len(items),
+        "cached": len(items) - len(pending),
+        **batch.stats(),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000),
+    }
+    response = APIResponse(data={"items": items, "stats": stats})
+    Metrics.observe("stage_seconds", time.perf_counter() - start, stage="request", endpoint="batch")
+    return response
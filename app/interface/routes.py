@@ -1,7 +1,12 @@
 from fastapi import APIRouter
 
 from app.interface.apis.health import get_health
-from app.interface.apis.search import search_result
+from app.interface.apis.metrics import get_metrics
+from app.interface.apis.search import (
+    search_batch_result,
+    search_result,
+    search_result_stream,
+)
 from app.utils.http import HTTPMethod
 
 api_router = APIRouter()
@@ -13,9 +18,30 @@ api_router.add_api_route(
     methods=[HTTPMethod.GET],
 )
 
+api_router.add_api_route(
+    path="/api/metrics/",
+    endpoint=get_metrics,
+    tags=["Health Check"],
+    methods=[HTTPMethod.GET],
+)
+
 api_router.add_api_route(
     path="/api/search/",
     endpoint=search_result,
     tags=["Search"],
     methods=[HTTPMethod.POST],
 )
+
+api_router.add_api_route(
+    path="/api/search/stream/",
+    endpoint=search_result_stream,
+    tags=["Search"],
+    methods=[HTTPMethod.POST],
+)
+
+api_router.add_api_route(
+    path="/api/search/batch/",
+    endpoint=search_batch_result,
+    tags=["Search"],
+    methods=[HTTPMethod.POST],
+)
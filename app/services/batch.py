@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.config.search_config import SearchConfig
+from app.entities.search import SearchResult
+from app.services.cache import ResultCache
+from app.services.fetcher import AsyncFetcher
+from app.services.search import (
+    BaseService,
+    ExtractedPage,
+    PageStatus,
+    aextract_page,
+    merge_duplicate_results,
+)
+from app.services.url_filter import UrlFilter
+from app.utils.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BatchSearch:
+    """
+    Runs many searches as one job. Identical queries are searched once, a URL
+    returned by several searches is fetched once (and extracted once per
+    service version), and every fetch goes through one AsyncFetcher, so the
+    whole batch shares a single concurrency and per-host politeness budget.
+    The batch is admitted as one search; each search in it keeps its own
+    deadline.
+    """
+
+    def __init__(self, fetcher: Optional[AsyncFetcher] = None, num_results: Optional[int] = None):
+        self.fetcher = fetcher or AsyncFetcher()
+        self.num_results = num_results or SearchConfig.DEFAULT_RESULTS
+        self._searches: Dict[Tuple[int, str, float], asyncio.Future] = {}
+        self._fetches: Dict[str, asyncio.Future] = {}
+        self._extractions: Dict[Tuple[int, str], asyncio.Future] = {}
+
+    async def run(self, searches: List[Tuple[BaseService, str, Optional[float]]]) -> List[Dict]:
+        """
+        Results for each (service, query, deadline), in input order, shaped
+        like BaseService.asearch's
+        """
+        client = self.fetcher.client()
+        try:
+            return await asyncio.gather(
+                *(
+                    self._search(client, service, query, deadline)
+                    for service, query, deadline in searches
+                )
+            )
+        finally:
+            for future in [
+                *self._searches.values(),
+                *self._fetches.values(),
+                *self._extractions.values(),
+            ]:
+                future.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "unique_searches": len(self._searches),
+            "unique_urls": len(self._fetches),
+            "extractions": len(self._extractions),
+        }
+
+    def _search(
+        self, client: httpx.AsyncClient, service: BaseService, query: str, deadline: Optional[float]
+    ) -> asyncio.Future:
+        deadline = SearchConfig.validate_deadline(deadline)
+        key = (service._version, ResultCache.normalize_query(query), deadline)
+        if key not in self._searches:
+            self._searches[key] = asyncio.ensure_future(
+                self._run_search(client, service, query, deadline)
+            )
+        return self._searches[key]
+
+    async def _run_search(
+        self, client: httpx.AsyncClient, service: BaseService, query: str, deadline: float
+    ) -> Dict:
+        urls: List[str] = []
+        extractions: List[asyncio.Future] = []
+
+        async def search():
+            # Each URL starts fetching as soon as the provider yields it
+            async for url in service.search_urls(query, self.num_results):
+                urls.append(url)
+                extractions.append(self._extract(client, service._version, url))
+            if extractions:
+                await asyncio.wait(extractions)
+
+        try:
+            # Extractions are shared with other searches, so the deadline
+            # stops waiting for them rather than cancelling them
+            await asyncio.wait_for(search(), deadline)
+        except asyncio.TimeoutError:
+            logger.warning(f"Search deadline reached for {query}, returning partial results")
+        except Exception as e:
+            logger.error(f"Error in batch search for {query}: {str(e)}")
+            return {"query": query, "results": [], "error": str(e)}
+
+        pages = []
+        for index, (url, extraction) in enumerate(zip(urls, extractions)):
+            status, result = PageStatus.TIMED_OUT, None
+            if extraction.done():
+                failed = extraction.cancelled() or extraction.exception() is not None
+                status, result = (PageStatus.FAILED, None) if failed else extraction.result()
+            pages.append(ExtractedPage(index, url, status, result))
+        if SearchConfig.MERGE_DUPLICATE_RESULTS:
+            merge_duplicate_results(pages)
+        for page in pages:
+            Metrics.inc("page_outcomes", version=service._version, status=page.status)
+        return {
+            "query": query,
+            "results": [page.result for page in pages if page.result],
+            "pages": [{"url": page.url, "status": page.status} for page in pages],
+        }
+
+    def _extract(self, client: httpx.AsyncClient, version: int, url: str) -> asyncio.Future:
+        key = (version, url)
+        if key not in self._extractions:
+            self._extractions[key] = asyncio.ensure_future(self._run_extract(client, version, url))
+        return self._extractions[key]
+
+    async def _run_extract(
+        self, client: httpx.AsyncClient, version: int, url: str
+    ) -> Tuple[str, Optional[SearchResult]]:
+        """
+        The page's status and result, as in ExtractedPage
+        """
+        if url not in self._fetches:
+            self._fetches[url] = asyncio.ensure_future(self.fetcher.fetch_filtered(client, url))
+        content, skipped = await self._fetches[url]
+        if skipped is not None:
+            return PageStatus.SKIPPED, None
+        if content is None:
+            logger.warning(f"Failed to fetch content from: {url}")
+            return PageStatus.FAILED, None
+        try:
+            start = time.monotonic()
+            result = await aextract_page(version, url, content)
+            UrlFilter.record_parse(url, time.monotonic() - start, result is not None)
+        except Exception as e:
+            logger.error(f"Error extracting {url}: {str(e)}")
+            return PageStatus.FAILED, None
+        return (PageStatus.COMPLETED if result else PageStatus.NO_PRICES), result
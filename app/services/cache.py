@@ -0,0 +1,331 @@
+import asyncio
+import hashlib
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config.search_config import SearchConfig
+from app.services.executors import SearchExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """
+    Key/value store with per-entry TTL and a bounded number of entries
+    """
+
+    evictions = 0
+    # Calls may wait on disk or locks, so async callers run them on the IO pool
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float):
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Per-process LRU cache
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    LRU cache in a SQLite file, shared by every worker process on the host
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int, table: str = "cache"):
+        self.path = path
+        self.max_entries = max_entries
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value BLOB, expires_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float):
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)",
+                (key, blob, now + ttl, now),
+            )
+            self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+            cursor = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self.evictions += max(cursor.rowcount, 0)
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+async def run_backend(backend: CacheBackend, func: Callable, *args) -> Any:
+    """
+    func, a method of backend, off the event loop when the backend blocks
+    """
+    if backend.blocking:
+        return await SearchExecutor.run_io(func, *args)
+    return func(*args)
+
+
+def build_backend(name: str, max_entries: int, path: str) -> Optional[CacheBackend]:
+    if name == "memory":
+        return MemoryCacheBackend(max_entries)
+    if name == "sqlite":
+        return SQLiteCacheBackend(path, max_entries)
+    if name == "none":
+        return None
+    raise ValueError(f"Unsupported cache backend: {name}")
+
+
+class KeyedCache:
+    """
+    Values kept in a CacheBackend for a fixed TTL, with hit and miss counts.
+    Subclasses name their SearchConfig settings and how keys are built.
+    """
+
+    # Prefix of the _BACKEND, _MAX_ENTRIES, _PATH and _TTL settings
+    config_prefix = ""
+
+    _shared: Optional["KeyedCache"] = None
+    _shared_loaded = False
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls) -> Optional["KeyedCache"]:
+        backend = build_backend(
+            getattr(SearchConfig, f"{cls.config_prefix}_BACKEND"),
+            getattr(SearchConfig, f"{cls.config_prefix}_MAX_ENTRIES"),
+            getattr(SearchConfig, f"{cls.config_prefix}_PATH"),
+        )
+        if backend is None:
+            return None
+        return cls(backend, ttl=getattr(SearchConfig, f"{cls.config_prefix}_TTL"))
+
+    @classmethod
+    def shared(cls) -> Optional["KeyedCache"]:
+        if not cls._shared_loaded:
+            cls._shared = cls.from_config()
+            cls._shared_loaded = True
+        return cls._shared
+
+    def _counted(self, value: Optional[Any]) -> Optional[Any]:
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._counted(self.backend.get(key))
+
+    def set(self, key: str, value: Any):
+        self.backend.set(key, value, self.ttl)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return self._counted(await run_backend(self.backend, self.backend.get, key))
+
+    async def aset(self, key: str, value: Any):
+        await run_backend(self.backend, self.backend.set, key, value, self.ttl)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions,
+            "size": len(self.backend),
+        }
+
+
+class ResultCache(KeyedCache):
+    """
+    TTL cache for search results with single-flight deduplication: concurrent
+    callers for the same key share one in-flight computation
+    """
+
+    config_prefix = "RESULT_CACHE"
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        super().__init__(backend, ttl)
+        self.coalesced = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    @classmethod
+    def key(cls, query: str, version: int) -> str:
+        return f"v{version}:{cls.normalize_query(query)}"
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: value is not None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        The cached value, or compute's. A caller that finds the same key
+        in flight waits at most timeout seconds for it (asyncio.TimeoutError
+        after that) and computes its own value when the shared one is not
+        cacheable, e.g. cut short by the first caller's deadline.
+        """
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            value = await run_backend(self.backend, self.backend.get, key)
+            if value is not None:
+                self.hits += 1
+                return value
+            # Another caller may have started while the backend was read
+            inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            value = await asyncio.wait_for(asyncio.shield(inflight), timeout)
+            if cacheable(value):
+                return value
+            return await compute()
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting on the leader's failure
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            value = await compute()
+            if cacheable(value):
+                await self.aset(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {**super().stats(), "coalesced": self.coalesced}
+
+
+class ParsedResultCache(KeyedCache):
+    """
+    Extraction results keyed by page content hash and extractor version, so
+    unchanged pages skip parsing and a version bump invalidates old entries.
+    Read and written with get/set from the parse workers.
+    """
+
+    config_prefix = "PARSE_CACHE"
+
+    @staticmethod
+    def key(content: bytes, version: int, pipeline: str = "") -> str:
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        return f"v{version}:{pipeline}:{digest}"
+
+
+class SerpCache(KeyedCache):
+    """
+    Result URL lists keyed by provider chain, result count and normalized
+    query, with their own TTL, separate from the page and result caches
+    """
+
+    config_prefix = "SERP_CACHE"
+
+    @staticmethod
+    def key(providers: str, query: str, num_results: int) -> str:
+        return f"{providers}:{num_results}:{ResultCache.normalize_query(query)}"
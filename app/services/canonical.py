@@ -0,0 +1,166 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterable, AsyncIterator, Dict, Tuple
+from urllib.parse import parse_qsl, unquote_plus, urlencode, urljoin, urlsplit, urlunsplit
+
+from app.config.search_config import SearchConfig
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track the click, never change the page
+TRACKING_PARAM_PREFIXES = ("utm_", "pf_rd_", "pd_rd_")
+TRACKING_PARAMS = frozenset({
+    "gclid", "gbraid", "wbraid", "dclid", "fbclid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "srsltid", "_ga", "_gl", "ref", "ref_", "sa", "ved", "usg",
+    "ei", "spm", "affid", "affextparam1",
+})
+AMP_PARAMS = frozenset({"amp", "output", "usqp"})
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Same page served to phones, AMP readers or another locale
+HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+LOCALE_SEGMENT = re.compile(r"^/[a-z]{2}[-_][a-z]{2}(?=/|$)", re.IGNORECASE)
+AMP_SEGMENT = re.compile(r"/amp(?=/|$)|\.amp(?=$|\.html?$)", re.IGNORECASE)
+# Click tracking in the path, e.g. Amazon's /dp/B0.../ref=sr_1_1
+REF_SEGMENT = re.compile(r"/ref=[^/]*$")
+
+# <link rel="canonical" href="..."> sits in the head, near the top of the page
+CANONICAL_LINK = re.compile(rb"<link\b[^>]*\brel\s*=\s*[\"']?canonical\b[^>]*>", re.IGNORECASE)
+LINK_HREF = re.compile(rb"\bhref\s*=\s*[\"']?([^\"'\s>]+)", re.IGNORECASE)
+CANONICAL_SCAN_BYTES = 64 * 1024
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def clean_url(url: str) -> str:
+    """
+    The URL to fetch: tracking parameters and the fragment removed, scheme
+    and host lower-cased, default port dropped
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    # Kept parameters stay exactly as they were sent
+    query = "&".join(
+        param
+        for param in parts.query.split("&")
+        if param and not _is_tracking(unquote_plus(param.split("=", 1)[0]))
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def canonical_key(url: str) -> str:
+    """
+    Identity of the page behind a URL: scheme, www/m/amp host prefixes, AMP,
+    locale and ref= path segments, trailing slashes and parameter order
+    ignored
+    """
+    parts = urlsplit(clean_url(url))
+    host = parts.netloc
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    path = AMP_SEGMENT.sub("", LOCALE_SEGMENT.sub("", parts.path))
+    path = REF_SEGMENT.sub("", path.rstrip("/")).rstrip("/") or "/"
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in AMP_PARAMS
+    )
+    return f"{host}{path}?{urlencode(query)}" if query else f"{host}{path}"
+
+
+class CanonicalUrls:
+    """
+    Canonical pages learned from rel=canonical links, shared by every
+    search in the process so later searches fetch each page once. Only
+    canonicals on the page's own domain are trusted, for CANONICAL_TTL.
+    """
+
+    # canonical key -> (canonical key it declared, monotonic time learned)
+    _learned: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+    _duplicates = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def key(cls, url: str) -> str:
+        key = canonical_key(url)
+        with cls._lock:
+            entry = cls._learned.get(key)
+            if entry is None:
+                return key
+            if entry[1] <= time.monotonic() - SearchConfig.CANONICAL_TTL:
+                del cls._learned[key]
+                return key
+            return entry[0]
+
+    @classmethod
+    def learn(cls, url: str, content: bytes):
+        """
+        Remember the canonical URL a fetched page declares
+        """
+        link = CANONICAL_LINK.search(content, 0, CANONICAL_SCAN_BYTES)
+        href = LINK_HREF.search(link.group(0)) if link else None
+        if href is None:
+            return
+        try:
+            canonical_url = urljoin(url, href.group(1).decode("utf-8", "replace"))
+            canonical = canonical_key(canonical_url)
+            canonical_host = urlsplit(canonical_url).hostname or ""
+        except ValueError:
+            return
+        # A page may only speak for its own site, never another retailer's
+        domain = SearchConfig.get_registrable_domain(urlsplit(url).hostname or "")
+        if SearchConfig.get_registrable_domain(canonical_host) != domain:
+            logger.info(f"Ignoring canonical {canonical_url} of {url}, another domain")
+            return
+        key = canonical_key(url)
+        if canonical == key:
+            return
+        with cls._lock:
+            cls._learned[key] = (canonical, time.monotonic())
+            cls._learned.move_to_end(key)
+            while len(cls._learned) > SearchConfig.CANONICAL_MAX_ENTRIES:
+                cls._learned.popitem(last=False)
+
+    @classmethod
+    def record_duplicate(cls):
+        with cls._lock:
+            cls._duplicates += 1
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        with cls._lock:
+            return {"learned": len(cls._learned), "duplicates": cls._duplicates}
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._learned.clear()
+            cls._duplicates = 0
+
+
+async def aiter_unique_urls(urls: AsyncIterable[str]) -> AsyncIterator[str]:
+    """
+    Cleaned URLs, leaving out those that are the same page as one already
+    yielded
+    """
+    seen = set()
+    async for url in urls:
+        cleaned = clean_url(url)
+        key = CanonicalUrls.key(cleaned)
+        if key in seen:
+            logger.info(f"Skipping {url}, same page as an earlier result")
+            CanonicalUrls.record_duplicate()
+            continue
+        seen.add(key)
+        yield cleaned
@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from app.config.search_config import SearchConfig
+
+logger = logging.getLogger(__name__)
+
+
+class SearchRejectedError(Exception):
+    pass
+
+
+# Set in parse worker processes only
+_in_parse_worker = False
+
+
+def _init_parse_worker():
+    global _in_parse_worker
+    _in_parse_worker = True
+    # Import the extraction stack once per worker, not on its first page
+    import app.services.search  # noqa: F401
+
+
+def in_parse_worker() -> bool:
+    return _in_parse_worker
+
+
+def _pool_internals(pool: ProcessPoolExecutor) -> Tuple[List[multiprocessing.Process], Any]:
+    # ProcessPoolExecutor has no public handle on its workers before 3.14,
+    # and shutdown() drops these, so they are taken first
+    processes = getattr(pool, "_processes", None) or {}
+    return list(processes.values()), getattr(pool, "_call_queue", None)
+
+
+def _reap_processes(processes: List[multiprocessing.Process], call_queue: Any, grace: float):
+    """
+    Give a retired pool's workers grace seconds to finish what they have,
+    then terminate those still running, a hung parse among them
+    """
+    for process in processes:
+        process.join(grace)
+        grace = 0
+    if not any(process.is_alive() for process in processes):
+        return
+    if call_queue is not None:
+        # Pages queued for the dead workers are dropped, otherwise the pool
+        # waits forever to flush them into a pipe nobody reads
+        call_queue.cancel_join_thread()
+    for process in processes:
+        if process.is_alive():
+            logger.warning(f"Terminating parse worker {process.pid}")
+            process.terminate()
+            process.join(5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+
+class SearchExecutor:
+    """
+    Sized pools that keep blocking search work off the event loop
+    """
+
+    _io_pool: Optional[ThreadPoolExecutor] = None
+    _parse_pool: Optional[Executor] = None
+    # Tasks handed to the current parse pool, and totals for stats()
+    _parse_pool_tasks = 0
+    _parse_stats: Dict[str, int] = {
+        "tasks": 0, "timeouts": 0, "broken": 0, "recycled": 0, "terminated": 0, "stuck_threads": 0
+    }
+    _stats_lock = threading.Lock()
+
+    @classmethod
+    def io_pool(cls) -> ThreadPoolExecutor:
+        if cls._io_pool is None:
+            cls._io_pool = ThreadPoolExecutor(
+                max_workers=SearchConfig.SEARCH_IO_WORKERS,
+                thread_name_prefix="search-io",
+            )
+        return cls._io_pool
+
+    @classmethod
+    def parse_pool(cls) -> Executor:
+        if cls._parse_pool is not None and cls._recycle_due():
+            cls._retire_parse_pool()
+            cls._parse_stats["recycled"] += 1
+        if cls._parse_pool is None:
+            if SearchConfig.SEARCH_PARSE_USE_PROCESSES:
+                cls._parse_pool = ProcessPoolExecutor(
+                    max_workers=SearchConfig.SEARCH_PARSE_WORKERS,
+                    mp_context=multiprocessing.get_context(SearchConfig.SEARCH_PARSE_START_METHOD),
+                    initializer=_init_parse_worker,
+                )
+            else:
+                cls._parse_pool = ThreadPoolExecutor(
+                    max_workers=SearchConfig.SEARCH_PARSE_WORKERS,
+                    thread_name_prefix="search-parse",
+                )
+        return cls._parse_pool
+
+    @classmethod
+    def _recycle_due(cls) -> bool:
+        """
+        Worker processes are replaced after about SEARCH_PARSE_RECYCLE_TASKS
+        tasks each, so parser memory growth stays bounded
+        """
+        recycle_tasks = SearchConfig.SEARCH_PARSE_RECYCLE_TASKS
+        return (
+            isinstance(cls._parse_pool, ProcessPoolExecutor)
+            and recycle_tasks > 0
+            and cls._parse_pool_tasks >= recycle_tasks * SearchConfig.SEARCH_PARSE_WORKERS
+        )
+
+    @classmethod
+    def _retire_parse_pool(cls, terminate: bool = False):
+        """
+        Workers of the current pool finish what they have and exit; the next
+        parse starts a fresh pool. With terminate, workers still running
+        after SEARCH_PARSE_TIMEOUT are killed, so a hung parse cannot keep
+        its process forever.
+        """
+        pool = cls._parse_pool
+        cls._parse_pool = None
+        cls._parse_pool_tasks = 0
+        if pool is None:
+            return
+        processes, call_queue = (
+            _pool_internals(pool) if isinstance(pool, ProcessPoolExecutor) else ([], None)
+        )
+        pool.shutdown(wait=False)
+        if terminate and processes:
+            cls._parse_stats["terminated"] += 1
+            threading.Thread(
+                target=_reap_processes,
+                args=(processes, call_queue, SearchConfig.SEARCH_PARSE_TIMEOUT),
+                name="search-parse-reaper",
+                daemon=True,
+            ).start()
+
+    @classmethod
+    def _thread_released(cls, future):
+        with cls._stats_lock:
+            cls._parse_stats["stuck_threads"] -= 1
+
+    @classmethod
+    async def run_io(cls, func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cls.io_pool(), partial(func, *args, **kwargs))
+
+    @classmethod
+    async def run_parse(cls, func: Callable, *args) -> Any:
+        """
+        func must be a picklable module-level function when parsing in
+        processes, and should return plain data rather than parse trees.
+        Raises asyncio.TimeoutError after SEARCH_PARSE_TIMEOUT seconds.
+        """
+        loop = asyncio.get_running_loop()
+        pool = cls.parse_pool()
+        cls._parse_pool_tasks += 1
+        cls._parse_stats["tasks"] += 1
+        future = pool.submit(func, *args)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future, loop=loop), SearchConfig.SEARCH_PARSE_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            cls._parse_stats["timeouts"] += 1
+            logger.warning(f"Parse task gave up after {SearchConfig.SEARCH_PARSE_TIMEOUT}s")
+            if isinstance(pool, ProcessPoolExecutor):
+                # New tasks go to a fresh pool and the stuck worker is killed
+                if pool is cls._parse_pool:
+                    cls._retire_parse_pool(terminate=True)
+            elif not future.done():
+                # A thread cannot be killed: the parse keeps its slot until it
+                # returns, so at most SEARCH_PARSE_WORKERS threads are held
+                with cls._stats_lock:
+                    cls._parse_stats["stuck_threads"] += 1
+                future.add_done_callback(cls._thread_released)
+            raise
+        except BrokenProcessPool:
+            # A worker died, e.g. killed for memory; start over with new ones
+            cls._parse_stats["broken"] += 1
+            if pool is cls._parse_pool:
+                cls._retire_parse_pool()
+            raise
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        return dict(cls._parse_stats)
+
+    @classmethod
+    def shutdown(cls):
+        for pool in (cls._io_pool, cls._parse_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        cls._io_pool = None
+        cls._parse_pool = None
+        cls._parse_pool_tasks = 0
+
+
+class SearchAdmission:
+    """
+    Bounds in-flight searches per worker and rejects once the wait queue is full
+    """
+
+    _slots: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+    _pending = 0
+
+    @classmethod
+    def _semaphore(cls) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if cls._slots is None or cls._slots[0] is not loop:
+            cls._slots = (
+                loop,
+                asyncio.Semaphore(SearchConfig.MAX_CONCURRENT_SEARCHES),
+            )
+        return cls._slots[1]
+
+    @classmethod
+    def check_capacity(cls):
+        """
+        Raise SearchRejectedError when the wait queue is full
+        """
+        capacity = SearchConfig.MAX_CONCURRENT_SEARCHES + SearchConfig.SEARCH_QUEUE_DEPTH
+        if cls._pending >= capacity:
+            logger.warning(f"Rejecting search, {cls._pending} searches already pending")
+            raise SearchRejectedError("Search capacity exceeded, try again later")
+
+    @classmethod
+    def pending(cls) -> int:
+        """
+        Searches running or waiting for a slot
+        """
+        return cls._pending
+
+    @classmethod
+    @asynccontextmanager
+    async def admit(cls, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Hold a search slot; asyncio.TimeoutError when none frees up within
+        timeout seconds
+        """
+        cls.check_capacity()
+        cls._pending += 1
+        try:
+            semaphore = cls._semaphore()
+            await asyncio.wait_for(semaphore.acquire(), timeout)
+            try:
+                yield
+            finally:
+                semaphore.release()
+        finally:
+            cls._pending -= 1
@@ -0,0 +1,213 @@
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.parsers import Document
+from app.services.selectors import SelectorSet
+
+logger = logging.getLogger(__name__)
+
+AMOUNT = r"\d{1,3}(?:,\d{3})*(?:\.\d{2})?"
+SYMBOLS = r"₹$€£¥₩₽¢₨₪₫₦₡₵₴₸₲₱₾₺₼₿"
+
+PRICE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in [
+        # Indian Rupees
+        rf"₹\s*({AMOUNT})",
+        rf"Rs\.?\s*({AMOUNT})",
+        rf"INR\s*({AMOUNT})",
+        rf"({AMOUNT})\s*₹",
+        rf"({AMOUNT})\s*Rs\.?",
+        rf"({AMOUNT})\s*INR",
+        # US Dollars
+        rf"\$\s*({AMOUNT})",
+        rf"USD\s*({AMOUNT})",
+        rf"({AMOUNT})\s*USD",
+        # Euros
+        rf"€\s*({AMOUNT})",
+        rf"EUR\s*({AMOUNT})",
+        rf"({AMOUNT})\s*€",
+        # British Pounds
+        rf"£\s*({AMOUNT})",
+        rf"GBP\s*({AMOUNT})",
+        # Generic price patterns
+        rf"Price:\s*([{SYMBOLS}]?\s*{AMOUNT})",
+        rf"Cost:\s*([{SYMBOLS}]?\s*{AMOUNT})",
+        rf"Amount:\s*([{SYMBOLS}]?\s*{AMOUNT})",
+    ]
+]
+
+# Every price pattern needs one of these markers, so text without any of
+# them is skipped with a single scan instead of one pass per pattern
+PRICE_MARKERS = re.compile(
+    r"₹|Rs|INR|\$|USD|€|EUR|£|GBP|Price:|Cost:|Amount:", re.IGNORECASE
+)
+
+PRICE_ATTRIBUTES = ["data-price", "data-cost", "data-amount", "data-value"]
+
+
+PRICE_SELECTORS = [
+    # Common price classes
+    '.price', '.cost', '.amount', '.value',
+    '[class*="price"]', '[class*="cost"]', '[class*="amount"]', '[class*="value"]',
+    '[id*="price"]', '[id*="cost"]', '[id*="amount"]',
+
+    # E-commerce specific
+    '.sale-price', '.regular-price', '.current-price', '.final-price',
+    '.product-price', '.item-price', '.listing-price',
+    '[class*="sale-price"]', '[class*="regular-price"]', '[class*="current-price"]',
+
+    # Schema.org microdata
+    '[itemtype*="Product"] [itemprop="price"]',
+    '[itemtype*="Offer"] [itemprop="price"]',
+    '[itemtype*="PriceSpecification"] [itemprop="price"]',
+
+    # Data attributes
+    '[data-price]', '[data-cost]', '[data-amount]', '[data-value]',
+    '[data-original-price]', '[data-sale-price]', '[data-current-price]',
+
+    # Specific tags
+    'span[class*="price"]', 'div[class*="price"]', 'p[class*="price"]',
+    'span[class*="cost"]', 'div[class*="cost"]', 'p[class*="cost"]',
+    'meta[property="product:price:amount"]',
+    'meta[name="price"]',
+
+    # JSON-LD structured data
+    'script[type="application/ld+json"]'
+]
+
+BASIC_PRICE_SELECTORS = [
+    '[class*="price"]',
+    '[class*="cost"]',
+    '[class*="amount"]',
+    '[id*="price"]',
+    "[data-price]",
+    ".price",
+    ".cost",
+    ".amount",
+    'span[class*="price"]',
+    'div[class*="price"]',
+    'p[class*="price"]',
+]
+
+TITLE_SELECTORS = ["h1", "title", '[class*="title"]', '[class*="name"]']
+
+# Compiled once; matching a whole set takes a single walk over the tree
+PRICE_SELECTOR_SET = SelectorSet(PRICE_SELECTORS)
+BASIC_PRICE_SELECTOR_SET = SelectorSet(BASIC_PRICE_SELECTORS)
+TITLE_SELECTOR_SET = SelectorSet(TITLE_SELECTORS)
+
+
+class PriceExtractor:
+    """
+    Single-pass replacement for the per-selector soup.select sweep, working
+    on any parsed Document.
+
+    The tree is walked once and every element is tested against the compiled
+    selectors it could match. Matches are then replayed in selector order, so the
+    first-seen price for each (value, currency) and its source label are the
+    same as with one soup.select per selector. Element text, pattern matches
+    and normalized values are computed once and reused across selectors.
+    """
+
+    def __init__(
+        self,
+        normalize_price: Callable[[str], Optional[Tuple[float, str]]],
+        extract_price_from_json_ld: Callable[[Dict], List[Dict]],
+    ):
+        self.normalize_price = normalize_price
+        self.extract_price_from_json_ld = extract_price_from_json_ld
+
+    def extract(self, document: Document) -> List[Dict]:
+        normalized_cache: Dict[str, Optional[Tuple[float, str]]] = {}
+
+        def normalize(raw: str) -> Optional[Tuple[float, str]]:
+            if raw not in normalized_cache:
+                normalized_cache[raw] = self.normalize_price(raw)
+            return normalized_cache[raw]
+
+        def text_prices(text: str) -> List[Tuple[str, float, str]]:
+            found = []
+            if not PRICE_MARKERS.search(text):
+                return found
+            for pattern in PRICE_PATTERNS:
+                for match in pattern.findall(text):
+                    normalized = normalize(match)
+                    if normalized:
+                        found.append((match, normalized[0], normalized[1]))
+            return found
+
+        prices = [
+            {"raw_text": raw, "value": value, "currency": currency, "source": "text_content"}
+            for raw, value, currency in text_prices(document.text())
+        ]
+
+        element_cache: Dict[int, Tuple[List[Dict], List[Tuple[str, float, str]]]] = {}
+        matches = PRICE_SELECTOR_SET.match(document)
+        for selector, elements in zip(PRICE_SELECTORS, matches):
+            try:
+                for element in elements:
+                    key = id(element)
+                    if key not in element_cache:
+                        element_cache[key] = self._element_prices(
+                            document, element, normalize, text_prices
+                        )
+                    fixed, from_text = element_cache[key]
+                    prices.extend(fixed)
+                    prices.extend(
+                        {
+                            "raw_text": raw,
+                            "value": value,
+                            "currency": currency,
+                            "source": f"element_{selector}",
+                        }
+                        for raw, value, currency in from_text
+                    )
+            except Exception as e:
+                logger.debug(f"Error processing selector {selector}: {str(e)}")
+
+        unique_prices = []
+        seen_values = set()
+        for price in prices:
+            price_key = (price["value"], price["currency"])
+            if price_key not in seen_values:
+                unique_prices.append(price)
+                seen_values.add(price_key)
+
+        unique_prices.sort(key=lambda x: x["value"])
+        return unique_prices
+
+    def _element_prices(
+        self, document: Document, element: Any, normalize: Callable, text_prices: Callable
+    ) -> Tuple[List[Dict], List[Tuple[str, float, str]]]:
+        """
+        Prices with a fixed source (JSON-LD, data attributes) and the
+        selector-labelled prices found in the element's text
+        """
+        is_json_ld = document.element_attr(element, "type") == "application/ld+json"
+        if is_json_ld and document.tag_name(element) == "script":
+            try:
+                data = json.loads(document.element_string(element))
+                return self.extract_price_from_json_ld(data) or [], []
+            except Exception:
+                pass
+
+        fixed = []
+        for attr in PRICE_ATTRIBUTES:
+            value = document.element_attr(element, attr)
+            if value:
+                normalized = normalize(value)
+                if normalized:
+                    fixed.append(
+                        {
+                            "raw_text": value,
+                            "value": normalized[0],
+                            "currency": normalized[1],
+                            "source": f"attribute_{attr}",
+                        }
+                    )
+
+        text = document.element_text(element)
+        return fixed, text_prices(text) if text else []
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config.search_config import SearchConfig
+
+logger = logging.getLogger(__name__)
+
+# Responses worth asking for again; any other status means the host is up
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _status(error: Exception) -> Optional[int]:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    return None
+
+
+def is_timeout(error: Exception) -> bool:
+    return isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError))
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Connection errors, timeouts, 429 and 5xx; other errors would only
+    repeat themselves
+    """
+    status = _status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+class LatencyHistogram:
+    """
+    Log-spaced latency buckets from 10 ms to about two minutes. Counts are
+    halved whenever they reach twice the window, so percentiles follow the
+    host's recent behaviour.
+    """
+
+    BOUNDS: List[float] = [0.01 * 1.5 ** i for i in range(24)]
+
+    def __init__(self, window: int):
+        self.window = window
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0
+
+    def record(self, seconds: float):
+        self.counts[bisect_left(self.BOUNDS, seconds)] += 1
+        self.total += 1
+        if self.total >= 2 * self.window:
+            self.counts = [count // 2 for count in self.counts]
+            self.total = sum(self.counts)
+
+    def percentile(self, share: float) -> float:
+        """
+        Upper bound of the bucket holding the given share of samples
+        """
+        target = share * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return self.BOUNDS[i] if i < len(self.BOUNDS) else self.BOUNDS[-1] * 1.5
+        return self.BOUNDS[-1] * 1.5
+
+
+class HostHealth:
+    def __init__(self):
+        self.latency = LatencyHistogram(SearchConfig.LATENCY_WINDOW)
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+
+class FetchPolicy:
+    """
+    Process-wide per-host fetch policy for AsyncFetcher: retry decisions
+    with jittered backoff, a circuit breaker that skips a host for a
+    cool-down after consecutive failures or timeouts, timeouts adapted to
+    the host's latency histogram and when to hedge.
+    """
+
+    _hosts: Dict[str, HostHealth] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _host(cls, url: str) -> HostHealth:
+        host = urlsplit(url).hostname or ""
+        if host not in cls._hosts:
+            cls._hosts[host] = HostHealth()
+        return cls._hosts[host]
+
+    @classmethod
+    def allow(cls, url: str) -> bool:
+        """
+        False while the host's circuit is open. After the cool-down one
+        probe is let through at a time; its outcome closes the circuit or
+        starts a new cool-down.
+        """
+        with cls._lock:
+            health = cls._host(url)
+            if health.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - health.opened_at < SearchConfig.BREAKER_COOLDOWN:
+                return False
+            health.opened_at = now
+            return True
+
+    @classmethod
+    def record(cls, url: str, seconds: float, error: Optional[Exception] = None):
+        """
+        Outcome of one request. Any response that is not worth retrying
+        means the host is up.
+        """
+        with cls._lock:
+            health = cls._host(url)
+            if error is None or not is_retryable(error):
+                health.latency.record(seconds)
+                health.failures = 0
+                health.opened_at = None
+                return
+            if is_timeout(error):
+                health.latency.record(seconds)
+            health.failures += 1
+            if health.opened_at is not None or health.failures >= SearchConfig.BREAKER_FAILURES:
+                if health.opened_at is None:
+                    logger.warning(
+                        f"Circuit open for {urlsplit(url).hostname} after {health.failures} failures"
+                    )
+                health.opened_at = time.monotonic()
+
+    @classmethod
+    def should_retry(cls, error: Exception, attempt: int) -> bool:
+        return attempt < SearchConfig.MAX_RETRIES and is_retryable(error)
+
+    @classmethod
+    def backoff(cls, attempt: int, error: Optional[Exception] = None) -> float:
+        """
+        Full-jitter exponential backoff, at least the server's Retry-After
+        when it sent one, never more than RETRY_BACKOFF_MAX
+        """
+        delay = random.uniform(0, min(SearchConfig.RETRY_BACKOFF_MAX, SearchConfig.RETRY_BACKOFF * 2 ** attempt))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return min(delay, SearchConfig.RETRY_BACKOFF_MAX)
+
+    @classmethod
+    def timeout(cls, url: str) -> Optional[float]:
+        """
+        Budget for a whole fetch from the host's tail latency, None until
+        enough requests have been seen
+        """
+        if not SearchConfig.ADAPTIVE_TIMEOUTS:
+            return None
+        with cls._lock:
+            latency = cls._host(url).latency
+            if latency.total < SearchConfig.LATENCY_MIN_SAMPLES:
+                return None
+            p99 = latency.percentile(0.99)
+        return min(
+            SearchConfig.TIMEOUT,
+            max(SearchConfig.ADAPTIVE_TIMEOUT_MIN, p99 * SearchConfig.ADAPTIVE_TIMEOUT_FACTOR),
+        )
+
+    @classmethod
+    def hedge_delay(cls, url: str) -> Optional[float]:
+        """
+        How long to wait before sending a second request, for hosts whose
+        p95 is far above their median; None means no hedging
+        """
+        if not SearchConfig.HEDGE_ENABLED:
+            return None
+        with cls._lock:
+            latency = cls._host(url).latency
+            if latency.total < SearchConfig.LATENCY_MIN_SAMPLES:
+                return None
+            p50, p95 = latency.percentile(0.5), latency.percentile(0.95)
+        if p95 < SearchConfig.HEDGE_TAIL_RATIO * p50:
+            return None
+        return p95
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict]:
+        with cls._lock:
+            return {
+                host: {
+                    "open": health.opened_at is not None,
+                    "failures": health.failures,
+                    "samples": health.latency.total,
+                    "p50": health.latency.percentile(0.5) if health.latency.total else None,
+                    "p99": health.latency.percentile(0.99) if health.latency.total else None,
+                }
+                for host, health in cls._hosts.items()
+            }
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._hosts.clear()
@@ -0,0 +1,383 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config.search_config import SearchConfig
+from app.services.canonical import CanonicalUrls
+from app.services.executors import SearchExecutor
+from app.services.fetch_policy import FetchPolicy
+from app.services.http_client import SharedHttpClient
+from app.services.page_cache import CachedPage, PageCache
+from app.services.politeness import DomainScheduler
+from app.services.streaming import PageStream
+from app.services.url_filter import PageRejected, UrlFilter
+from app.utils.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FetchedPage:
+    index: int
+    url: str
+    content: Optional[bytes] = None
+    # Why the URL filter dropped the page, if it did
+    skipped: Optional[str] = None
+
+
+def known_sites_first(url: str) -> int:
+    """
+    Fetch priority: known retailers from SITE_CONFIGS before other hosts,
+    their pages usually carry prices and have site extractors
+    """
+    return 0 if SearchConfig.get_site_type(urlsplit(url).hostname or "") else 1
+
+
+class PrioritySemaphore:
+    """
+    Semaphore that hands free slots to the lowest priority value first,
+    then in arrival order
+    """
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+
+    async def acquire(self, priority: int = 0):
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._arrivals), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Cancelled right after being handed a slot, pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._value += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 0) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class AsyncFetcher:
+    """
+    Fetches many pages concurrently, bounded by a global and a per-host limit
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        max_concurrency: Optional[int] = None,
+        per_host_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        page_cache: Optional[PageCache] = None,
+        priority: Optional[Callable[[str], int]] = None,
+    ):
+        # Sent on top of the shared client's defaults
+        self.headers = headers or {}
+        self.timeout = timeout or SearchConfig.TIMEOUT
+        self.per_host_concurrency = (
+            per_host_concurrency or SearchConfig.MAX_CONCURRENT_FETCHES_PER_HOST
+        )
+        self._semaphore = PrioritySemaphore(
+            max_concurrency or SearchConfig.MAX_CONCURRENT_FETCHES
+        )
+        # Lower values take free global slots first
+        self.priority = priority or (lambda url: 0)
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.page_cache = page_cache if page_cache is not None else PageCache.shared()
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ""
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_semaphores[host]
+
+    def client(self) -> httpx.AsyncClient:
+        """
+        The process-wide pooled client; it is shared, so callers never close it
+        """
+        return SharedHttpClient.get()
+
+    def _request_headers(self, cached: Optional[CachedPage]) -> Dict[str, str]:
+        # A fresh user agent per request, even though connections are shared
+        headers = {"User-Agent": random.choice(SearchConfig.USER_AGENTS), **self.headers}
+        if cached is not None:
+            headers.update(cached.validators())
+        return headers
+
+    async def fetch(self, client: httpx.AsyncClient, url: str) -> Optional[bytes]:
+        content, _ = await self.fetch_filtered(client, url)
+        return content
+
+    async def fetch_filtered(
+        self, client: httpx.AsyncClient, url: str
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Fetch unless the URL filter drops the URL or its response; returns
+        the body and the reason the page was skipped
+        """
+        host = Metrics.host(url)
+        start = time.monotonic()
+        try:
+            with Metrics.span("fetch", host=host):
+                content = await self._fetch(client, url)
+        except PageRejected as e:
+            logger.info(f"Skipping {url}: {str(e)}")
+            UrlFilter.record_fetch(url, time.monotonic() - start, e.reason)
+            Metrics.inc("pages", host=host, outcome=f"skipped_{e.reason}")
+            return None, e.reason
+        UrlFilter.record_fetch(url, time.monotonic() - start)
+        Metrics.inc("pages", host=host, outcome="fetched" if content else "failed")
+        if content and SearchConfig.CANONICAL_DEDUP:
+            # Later searches treat URLs of the page's canonical as the same page
+            CanonicalUrls.learn(url, content)
+        return content, None
+
+    async def _fetch(self, client: httpx.AsyncClient, url: str) -> Optional[bytes]:
+        if SearchConfig.URL_FILTER:
+            UrlFilter.screen_url(url)
+
+        cached = await self._cached(url)
+        if cached is not None and cached.partial and not SearchConfig.STREAM_EARLY_STOP:
+            # Cut off by an early stop that this process would not make
+            cached = None
+        if cached is not None and cached.is_fresh():
+            Metrics.inc("page_cache", outcome="fresh")
+            return cached.body
+
+        for attempt in range(SearchConfig.MAX_RETRIES + 1):
+            if not FetchPolicy.allow(url):
+                logger.warning(f"Skipping {url}, circuit open for its host")
+                Metrics.inc("circuit_skips", host=Metrics.host(url))
+                # A stale copy beats nothing while the host cools down
+                return cached.body if cached is not None else None
+            try:
+                async with self._host_semaphore(url):
+                    # Wait for the host's politeness slot before taking a global
+                    # one, so a slow-paced host never holds up the others
+                    await DomainScheduler.wait(url)
+                    async with self._semaphore.slot(self.priority(url)):
+                        return await self._hedged_get(client, url, cached)
+            except PageRejected:
+                raise
+            except Exception as e:
+                if not FetchPolicy.should_retry(e, attempt):
+                    logger.error(f"Error fetching content from {url}: {str(e)}")
+                    return None
+                delay = FetchPolicy.backoff(attempt, e)
+                logger.info(f"Retrying {url} in {delay:.2f}s after: {str(e)}")
+                Metrics.inc("retries", host=Metrics.host(url))
+                await asyncio.sleep(delay)
+        return None
+
+    async def _hedged_get(
+        self, client: httpx.AsyncClient, url: str, cached: Optional[CachedPage] = None
+    ) -> Optional[bytes]:
+        """
+        For hosts with a long latency tail, send a second request once the
+        first has taken longer than the host's p95; the first to succeed wins
+        """
+        delay = FetchPolicy.hedge_delay(url)
+        if delay is None:
+            return await self._timed_get(client, url, cached)
+
+        primary = asyncio.ensure_future(self._timed_get(client, url, cached))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        logger.info(f"Hedging {url} after {delay:.2f}s")
+        Metrics.inc("hedges", host=Metrics.host(url))
+        hedge = asyncio.ensure_future(self._timed_get(client, url, cached))
+        pending = {primary, hedge}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None or not pending:
+                        return task.result()
+        finally:
+            for task in (primary, hedge):
+                task.cancel()
+            await asyncio.gather(primary, hedge, return_exceptions=True)
+
+    async def _timed_get(
+        self, client: httpx.AsyncClient, url: str, cached: Optional[CachedPage] = None
+    ) -> Optional[bytes]:
+        """
+        One request under the host's adaptive timeout, its outcome recorded
+        for the host's circuit breaker and latency histogram
+        """
+        timeout = FetchPolicy.timeout(url)
+        start = time.monotonic()
+        try:
+            if timeout is None:
+                body = await self._get(client, url, cached)
+            else:
+                body = await asyncio.wait_for(self._get(client, url, cached), timeout)
+        except asyncio.TimeoutError:
+            error = httpx.ReadTimeout(f"No complete response within {timeout:.1f}s")
+            FetchPolicy.record(url, time.monotonic() - start, error)
+            raise error
+        except Exception as e:
+            FetchPolicy.record(url, time.monotonic() - start, e)
+            raise
+        FetchPolicy.record(url, time.monotonic() - start)
+        return body
+
+    async def _get(
+        self, client: httpx.AsyncClient, url: str, cached: Optional[CachedPage] = None
+    ) -> Optional[bytes]:
+        host = Metrics.host(url)
+        start = time.perf_counter()
+        async with client.stream(
+            "GET", url, headers=self._request_headers(cached), timeout=self.timeout
+        ) as response:
+            # Time to the response headers, then the body download on its own
+            headers_at = time.perf_counter()
+            Metrics.observe("stage_seconds", headers_at - start, stage="fetch_headers", host=host)
+            Metrics.inc("responses", host=host, status=response.status_code)
+            if cached is not None and response.status_code == 304:
+                Metrics.inc("page_cache", outcome="revalidated")
+                await self._update_cache(self.page_cache.refresh, cached, response)
+                return cached.body
+
+            response.raise_for_status()
+            if SearchConfig.URL_FILTER:
+                UrlFilter.screen_response(url, response.headers)
+            body, complete = await self._read_body(url, response)
+            Metrics.observe("stage_seconds", time.perf_counter() - headers_at, stage="fetch_body", host=host)
+            Metrics.inc("fetched_bytes", len(body), host=host)
+            if self.page_cache is not None:
+                Metrics.inc("page_cache", outcome="miss")
+
+        # A cut-off body is only good for reads that stop early too; it is
+        # kept as partial with its validators so it can still be revalidated
+        if self.page_cache is not None and (complete or SearchConfig.STREAM_EARLY_STOP):
+            await self._update_cache(self.page_cache.store, url, response, body, not complete)
+        return body
+
+    async def _read_body(self, url: str, response: httpx.Response) -> Tuple[bytes, bool]:
+        """
+        Read the body in chunks until the page stream has enough; returns the
+        body and whether it is the whole body
+        """
+        stream = PageStream(url)
+        async for chunk in response.aiter_bytes():
+            if stream.feed(chunk):
+                logger.info(f"Stopped reading {url} after {len(stream.buffer)} bytes")
+                # Stopping on the last chunk still leaves the whole body,
+                # which only a Content-Length can confirm
+                length = response.headers.get("Content-Length", "")
+                complete = (
+                    not stream.truncated
+                    and length.isdigit()
+                    and response.num_bytes_downloaded >= int(length)
+                )
+                return stream.body(), complete
+        return stream.body(), True
+
+    async def _cached(self, url: str) -> Optional[CachedPage]:
+        if self.page_cache is None:
+            return None
+        try:
+            return await SearchExecutor.run_io(self.page_cache.get, url)
+        except Exception as e:
+            logger.warning(f"Error reading page cache for {url}: {str(e)}")
+            return None
+
+    async def _update_cache(self, func: Callable, *args):
+        if self.page_cache is None:
+            return
+        try:
+            await SearchExecutor.run_io(func, *args)
+        except Exception as e:
+            logger.warning(f"Error updating page cache: {str(e)}")
+
+    async def _fetch_page(
+        self, client: httpx.AsyncClient, index: int, url: str
+    ) -> FetchedPage:
+        content, skipped = await self.fetch_filtered(client, url)
+        return FetchedPage(index=index, url=url, content=content, skipped=skipped)
+
+    async def fetch_all(
+        self, urls: Union[Iterable[str], AsyncIterable[str]]
+    ) -> AsyncIterator[FetchedPage]:
+        """
+        Yield pages in completion order so callers can parse while the rest
+        download. urls may be an async iterable, each URL is then fetched as
+        soon as it arrives; its errors are raised once the pages it produced
+        have been yielded.
+        """
+        client = self.client()
+        finished: asyncio.Queue = asyncio.Queue()
+        tasks: List[asyncio.Task] = []
+
+        def start(url: str):
+            task = asyncio.create_task(self._fetch_page(client, len(tasks), url))
+            task.add_done_callback(finished.put_nowait)
+            tasks.append(task)
+
+        async def feed():
+            try:
+                if isinstance(urls, AsyncIterable):
+                    async for url in urls:
+                        start(url)
+                else:
+                    for url in urls:
+                        start(url)
+            finally:
+                finished.put_nowait(None)
+
+        feeder = asyncio.create_task(feed())
+        try:
+            fed, yielded = False, 0
+            while not fed or yielded < len(tasks):
+                task = await finished.get()
+                if task is None:
+                    fed = True
+                    continue
+                yielded += 1
+                yield task.result()
+            await feeder
+        finally:
+            feeder.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(feeder, *tasks, return_exceptions=True)
@@ -0,0 +1,343 @@
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+import urllib.request
+import weakref
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import httpcore
+import httpx
+
+from app.config.search_config import SearchConfig
+from app.utils.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class DNSCache:
+    """
+    In-process cache of resolved addresses, so repeat connections to the same
+    retailers skip getaddrinfo
+    """
+
+    _entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+    _pinned: Dict[Tuple[str, int], List[str]] = {}
+
+    @classmethod
+    async def resolve(cls, host: str, port: int) -> List[str]:
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        pinned = cls._pinned.get((host, port))
+        if pinned is not None:
+            return pinned
+
+        now = time.monotonic()
+        entry = cls._entries.get((host, port))
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, port, type=socket.SOCK_STREAM
+        )
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        cls._entries[(host, port)] = (now + SearchConfig.DNS_CACHE_TTL, addresses)
+        return addresses
+
+    @classmethod
+    def pin(cls, host: str, port: int, addresses: List[str]):
+        """
+        Resolve host to fixed addresses until reset, e.g. to send a recorded
+        corpus's hosts to a local replay server
+        """
+        cls._pinned[(host, port)] = list(addresses)
+
+    @classmethod
+    def forget(cls, host: str, port: int):
+        cls._entries.pop((host, port), None)
+
+    @classmethod
+    def reset(cls):
+        cls._entries.clear()
+        cls._pinned.clear()
+
+
+class CachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    httpcore network backend that connects to addresses from DNSCache; TLS
+    still verifies against the original host name
+    """
+
+    def __init__(self, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self._backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self, host: str, port: int, timeout=None, local_address=None, socket_options=None
+    ) -> httpcore.AsyncNetworkStream:
+        label = Metrics.host_name(host)
+        try:
+            with Metrics.span("dns", host=label):
+                addresses = await DNSCache.resolve(host, port)
+        except OSError as e:
+            raise httpcore.ConnectError(f"Could not resolve {host}: {str(e)}") from e
+
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                with Metrics.span("connect", host=label):
+                    return await self._backend.connect_tcp(
+                        address, port, timeout, local_address, socket_options
+                    )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        # The host may have moved; resolve again next time
+        DNSCache.forget(host, port)
+        raise error
+
+    async def connect_unix_socket(self, path: str, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+
+# httpcore errors as the httpx errors callers catch; the closest base wins
+HTTPCORE_ERRORS: Dict[type, type] = {
+    httpcore.TimeoutException: httpx.TimeoutException,
+    httpcore.ConnectTimeout: httpx.ConnectTimeout,
+    httpcore.ReadTimeout: httpx.ReadTimeout,
+    httpcore.WriteTimeout: httpx.WriteTimeout,
+    httpcore.PoolTimeout: httpx.PoolTimeout,
+    httpcore.NetworkError: httpx.NetworkError,
+    httpcore.ConnectError: httpx.ConnectError,
+    httpcore.ReadError: httpx.ReadError,
+    httpcore.WriteError: httpx.WriteError,
+    httpcore.ProxyError: httpx.ProxyError,
+    httpcore.UnsupportedProtocol: httpx.UnsupportedProtocol,
+    httpcore.ProtocolError: httpx.ProtocolError,
+    httpcore.LocalProtocolError: httpx.LocalProtocolError,
+    httpcore.RemoteProtocolError: httpx.RemoteProtocolError,
+}
+
+
+def map_httpcore_error(error: Exception, request: httpx.Request) -> Exception:
+    for error_type in type(error).__mro__:
+        if error_type in HTTPCORE_ERRORS:
+            return HTTPCORE_ERRORS[error_type](str(error), request=request)
+    return error
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    """
+    httpcore response body as an httpx stream, with httpx errors, that gives
+    back the host slot once the body is closed
+    """
+
+    def __init__(self, stream, request: httpx.Request, release: Callable[[], None]):
+        self._stream = stream
+        self._request = request
+        self._release = release
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except Exception as e:
+            mapped = map_httpcore_error(e, self._request)
+            if mapped is e:
+                raise
+            raise mapped from e
+
+    async def aclose(self):
+        try:
+            if hasattr(self._stream, "aclose"):
+                await self._stream.aclose()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport over its own httpcore keep-alive connection pool, which
+    resolves through DNSCache and caps connections per host. HTTP_PROXY,
+    HTTPS_PROXY and NO_PROXY are honoured as httpx and requests do, for
+    http:// and https:// proxies.
+    """
+
+    def __init__(self, limits: httpx.Limits, http2: bool = False):
+        ssl_context = httpx.create_ssl_context()
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=ssl_context,
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http2=http2,
+            network_backend=CachingNetworkBackend(),
+        )
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+        self._proxy_env = urllib.request.getproxies_environment()
+        # Request scheme -> pool through that scheme's proxy
+        self._proxies: Dict[str, httpcore.AsyncHTTPProxy] = {}
+        by_url: Dict[str, httpcore.AsyncHTTPProxy] = {}
+        for scheme in ("http", "https"):
+            proxy_url = self._proxy_env.get(scheme)
+            if not proxy_url:
+                continue
+            if proxy_url not in by_url:
+                proxy = httpx.Proxy(proxy_url)
+                if proxy.url.scheme not in ("http", "https"):
+                    logger.warning(f"Unsupported {proxy.url.scheme} proxy for {scheme}, connecting directly")
+                    continue
+                by_url[proxy_url] = httpcore.AsyncHTTPProxy(
+                    proxy_url=httpcore.URL(
+                        scheme=proxy.url.raw_scheme,
+                        host=proxy.url.raw_host,
+                        port=proxy.url.port,
+                        target=proxy.url.raw_path,
+                    ),
+                    proxy_auth=proxy.raw_auth,
+                    proxy_headers=proxy.headers.raw,
+                    ssl_context=ssl_context,
+                    max_connections=limits.max_connections,
+                    max_keepalive_connections=limits.max_keepalive_connections,
+                    keepalive_expiry=limits.keepalive_expiry,
+                    http2=http2,
+                    network_backend=CachingNetworkBackend(),
+                )
+            self._proxies[scheme] = by_url[proxy_url]
+
+    def _pool_for(self, url: httpx.URL) -> httpcore.AsyncConnectionPool:
+        proxy = self._proxies.get(url.scheme)
+        if proxy is None or urllib.request.proxy_bypass_environment(url.host, self._proxy_env):
+            return self._pool
+        return proxy
+
+    def _host_slot(self, host: str) -> asyncio.Semaphore:
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(SearchConfig.get_host_pool_size(host))
+        return self._host_slots[host]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        slot = self._host_slot(request.url.host)
+        await slot.acquire()
+        try:
+            response = await self._pool_for(request.url).handle_async_request(core_request)
+        except BaseException as e:
+            slot.release()
+            mapped = map_httpcore_error(e, request) if isinstance(e, Exception) else e
+            if mapped is e:
+                raise
+            raise mapped from e
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream, request, slot.release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._pool.aclose()
+        for proxy in set(self._proxies.values()):
+            await proxy.aclose()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP2_ENABLED is set but the h2 package is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+class SharedHttpClient:
+    """
+    Process-wide pooled HTTP client, so connections, TLS sessions and DNS
+    lookups are reused across searches. An httpx client belongs to one
+    event loop, so there is one per loop: FastAPI opens its loop's client at
+    startup and closes it at shutdown, and the sync wrappers go through
+    run, which closes the client of its loop before the loop ends.
+    """
+
+    _clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+        weakref.WeakKeyDictionary()
+    )
+    _transport: Optional[httpx.AsyncBaseTransport] = None
+
+    @classmethod
+    def use(cls, transport: Optional[httpx.AsyncBaseTransport]):
+        """
+        Send every request through transport instead of the network, e.g. a
+        fake in tests and load runs; None goes back to the pooled transport
+        """
+        cls._transport = transport
+        cls._clients.clear()
+
+    @classmethod
+    def _build(cls) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=SearchConfig.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=SearchConfig.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=SearchConfig.HTTP_KEEPALIVE_EXPIRY,
+        )
+        http2 = SearchConfig.HTTP2_ENABLED and _http2_available()
+        return httpx.AsyncClient(
+            headers=SearchConfig.DEFAULT_HEADERS,
+            timeout=SearchConfig.TIMEOUT,
+            follow_redirects=True,
+            transport=cls._transport or PooledTransport(limits, http2=http2),
+        )
+
+    @classmethod
+    def get(cls) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = cls._clients.get(loop)
+        if client is None or client.is_closed:
+            client = cls._clients[loop] = cls._build()
+        return client
+
+    @classmethod
+    async def aclose(cls):
+        """
+        Close the running loop's client
+        """
+        client = cls._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    @classmethod
+    def run(cls, main: Awaitable[T]) -> T:
+        """
+        asyncio.run for the sync wrappers; the client opened on that loop
+        is closed with it
+        """
+
+        async def scoped() -> T:
+            try:
+                return await main
+            finally:
+                await cls.aclose()
+
+        return asyncio.run(scoped())
@@ -0,0 +1,201 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import httpx
+
+from app.config.search_config import SearchConfig
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_PATTERN = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+@dataclass
+class CachedPage:
+    url: str
+    body: bytes
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fresh_until: float = 0.0
+    # Cut off by an early stop or byte cap rather than read to the end
+    partial: bool = False
+
+    def is_fresh(self) -> bool:
+        return self.fresh_until > time.time()
+
+    def validators(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    On-disk HTTP page cache keyed by URL. Bodies are kept with their
+    validators so stale pages can be revalidated with a conditional request.
+    Bodies cut off by an early stop are kept too, marked partial.
+    """
+
+    _shared: Optional["PageCache"] = None
+    _shared_loaded = False
+
+    def __init__(self, path: str, max_bytes: int, max_age: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, body BLOB, etag TEXT, last_modified TEXT, "
+            "fresh_until REAL, stored_at REAL, accessed_at REAL, size INTEGER, "
+            "partial INTEGER DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        if "partial" not in columns:
+            # Caches written before partial bodies were stored
+            self._conn.execute("ALTER TABLE pages ADD COLUMN partial INTEGER DEFAULT 0")
+        self._conn.commit()
+
+    @classmethod
+    def shared(cls) -> Optional["PageCache"]:
+        """
+        Process-wide page cache built from SearchConfig, None when disabled
+        """
+        if not cls._shared_loaded:
+            if SearchConfig.PAGE_CACHE_ENABLED:
+                cls._shared = cls(
+                    SearchConfig.PAGE_CACHE_PATH,
+                    max_bytes=SearchConfig.PAGE_CACHE_MAX_BYTES,
+                    max_age=SearchConfig.PAGE_CACHE_MAX_AGE,
+                )
+            cls._shared_loaded = True
+        return cls._shared
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fresh_until, stored_at, partial "
+                "FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[4] <= now - self.max_age:
+                self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE pages SET accessed_at = ? WHERE url = ?", (now, url)
+            )
+            self._conn.commit()
+        return CachedPage(
+            url=url,
+            body=row[0],
+            etag=row[1],
+            last_modified=row[2],
+            fresh_until=row[3],
+            partial=bool(row[5]),
+        )
+
+    def store(
+        self,
+        url: str,
+        response: httpx.Response,
+        body: Optional[bytes] = None,
+        partial: bool = False,
+    ) -> Optional[CachedPage]:
+        """
+        Cache a 200 response if its headers allow it; pass the body when the
+        response was streamed, and partial when it was not read to the end
+        """
+        cache_control = response.headers.get("Cache-Control", "").lower()
+        if "no-store" in cache_control:
+            return None
+
+        max_age = 0
+        match = MAX_AGE_PATTERN.search(cache_control)
+        if match and "no-cache" not in cache_control:
+            max_age = int(match.group(1))
+
+        page = CachedPage(
+            url=url,
+            body=response.content if body is None else body,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            fresh_until=time.time() + max_age,
+            partial=partial,
+        )
+        # Without validators or a freshness lifetime the entry is never reusable
+        if not max_age and not page.validators():
+            return None
+        if len(page.body) > self.max_bytes:
+            return None
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    page.body,
+                    page.etag,
+                    page.last_modified,
+                    page.fresh_until,
+                    now,
+                    now,
+                    len(page.body),
+                    int(page.partial),
+                ),
+            )
+            self._evict(now)
+            self._conn.commit()
+        return page
+
+    def refresh(self, page: CachedPage, response: httpx.Response) -> CachedPage:
+        """
+        Extend a cached page's lifetime after a 304 Not Modified
+        """
+        match = MAX_AGE_PATTERN.search(response.headers.get("Cache-Control", ""))
+        page.fresh_until = time.time() + (int(match.group(1)) if match else 0)
+        page.etag = response.headers.get("ETag", page.etag)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET etag = ?, fresh_until = ?, stored_at = ?, "
+                "accessed_at = ? WHERE url = ?",
+                (page.etag, page.fresh_until, now, now, page.url),
+            )
+            self._conn.commit()
+        return page
+
+    def _evict(self, now: float):
+        cursor = self._conn.execute(
+            "DELETE FROM pages WHERE stored_at <= ?", (now - self.max_age,)
+        )
+        self.evictions += max(cursor.rowcount, 0)
+
+        # Drop least recently used pages beyond the byte budget
+        cursor = self._conn.execute(
+            "DELETE FROM pages WHERE url IN ("
+            "SELECT url FROM (SELECT url, SUM(size) OVER "
+            "(ORDER BY accessed_at DESC, stored_at DESC) AS running FROM pages) "
+            "WHERE running > ?)",
+            (self.max_bytes,),
+        )
+        self.evictions += max(cursor.rowcount, 0)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
@@ -0,0 +1,214 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import lxml.etree
+import lxml.html
+from bs4 import BeautifulSoup, UnicodeDammit
+
+from app.config.search_config import SearchConfig
+
+logger = logging.getLogger(__name__)
+
+# Elements whose text is not page text, as BeautifulSoup's get_text treats them
+NON_TEXT_TAGS = {"script", "style", "template"}
+
+# Text nodes outside non-text elements, collected by libxml2 in one call
+PAGE_TEXT = lxml.etree.XPath(
+    ".//text()[not(ancestor::script or ancestor::style or ancestor::template)]",
+    smart_strings=False,
+)
+
+# (element, tag name, attributes, class tokens)
+ElementView = Tuple[Any, str, Dict[str, Any], List[str]]
+
+
+class Document(ABC):
+    """
+    Parsed page behind a small tree-agnostic interface, so extraction runs
+    the same way on BeautifulSoup and lxml trees
+    """
+
+    backend = ""
+
+    @abstractmethod
+    def text(self) -> str:
+        """Text of the whole page, without script/style contents"""
+
+    @abstractmethod
+    def elements(self) -> Iterator[ElementView]:
+        """Elements with at least one attribute, in document order"""
+
+    @abstractmethod
+    def all_elements(self) -> Iterator[ElementView]:
+        pass
+
+    @abstractmethod
+    def tag_name(self, element: Any) -> str:
+        pass
+
+    @abstractmethod
+    def element_text(self, element: Any) -> str:
+        """Stripped text pieces joined together, like get_text(strip=True)"""
+
+    @abstractmethod
+    def element_string(self, element: Any) -> Optional[str]:
+        """The element's only string, like Tag.string"""
+
+    @abstractmethod
+    def element_attr(self, element: Any, attr: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def ancestors(self, element: Any) -> Iterator[ElementView]:
+        """Parent elements, innermost first"""
+
+
+class SoupDocument(Document):
+    def __init__(self, soup: BeautifulSoup, backend: str = "html.parser"):
+        self.soup = soup
+        self.backend = backend
+
+    def text(self) -> str:
+        return self.soup.get_text()
+
+    def all_elements(self) -> Iterator[ElementView]:
+        for element in self.soup.find_all(True):
+            yield self._view(element)
+
+    def elements(self) -> Iterator[ElementView]:
+        for view in self.all_elements():
+            if view[2]:
+                yield view
+
+    def tag_name(self, element: Any) -> str:
+        return element.name
+
+    def element_text(self, element: Any) -> str:
+        return element.get_text(strip=True)
+
+    def element_string(self, element: Any) -> Optional[str]:
+        return element.string
+
+    def element_attr(self, element: Any, attr: str) -> Optional[str]:
+        return element.get(attr)
+
+    def _view(self, element: Any) -> ElementView:
+        attrs = element.attrs
+        classes = attrs.get("class") or []
+        if isinstance(classes, str):
+            classes = classes.split()
+        return element, element.name, attrs, classes
+
+    def ancestors(self, element: Any) -> Iterator[ElementView]:
+        for parent in element.parents:
+            yield self._view(parent)
+
+
+class LxmlDocument(Document):
+    """
+    Direct lxml.html tree; candidate elements are selected with XPath in C
+    instead of being visited one by one in Python
+    """
+
+    backend = "lxml"
+
+    def __init__(self, root: lxml.html.HtmlElement):
+        self.root = root
+
+    def _texts(self, element: Any) -> Iterator[str]:
+        if element.text:
+            yield element.text
+        for child in element:
+            if isinstance(child.tag, str) and child.tag not in NON_TEXT_TAGS:
+                yield from self._texts(child)
+            if child.tail:
+                yield child.tail
+
+    def text(self) -> str:
+        return "".join(PAGE_TEXT(self.root))
+
+    def _view(self, element: Any) -> ElementView:
+        attrs = dict(element.attrib)
+        classes = attrs.get("class", "").split()
+        if "class" in attrs:
+            attrs["class"] = classes
+        return element, element.tag, attrs, classes
+
+    def all_elements(self) -> Iterator[ElementView]:
+        for element in self.root.iter():
+            if isinstance(element.tag, str):
+                yield self._view(element)
+
+    def elements(self) -> Iterator[ElementView]:
+        for element in self.root.xpath("//*[@*]"):
+            yield self._view(element)
+
+    def tag_name(self, element: Any) -> str:
+        return element.tag
+
+    def element_text(self, element: Any) -> str:
+        # A script's own text counts when it is the element asked about
+        pieces = self._texts(element) if element.tag in NON_TEXT_TAGS else PAGE_TEXT(element)
+        return "".join(piece.strip() for piece in pieces if piece.strip())
+
+    def element_string(self, element: Any) -> Optional[str]:
+        return element.text if len(element) == 0 else None
+
+    def element_attr(self, element: Any, attr: str) -> Optional[str]:
+        return element.get(attr)
+
+    def ancestors(self, element: Any) -> Iterator[ElementView]:
+        for parent in element.iterancestors():
+            yield self._view(parent)
+
+
+def _parse_lxml(content: bytes) -> Document:
+    # libxml2 assumes latin-1 when a page declares no charset; detect it the
+    # way BeautifulSoup does so both backends see the same text
+    markup = UnicodeDammit(content, is_html=True).unicode_markup
+    if markup is None:
+        raise ValueError("Could not decode page")
+    return LxmlDocument(lxml.html.document_fromstring(markup))
+
+
+def _parse_soup_lxml(content: bytes) -> Document:
+    return SoupDocument(BeautifulSoup(content, "lxml"), backend="bs4-lxml")
+
+
+def _parse_soup_html_parser(content: bytes) -> Document:
+    return SoupDocument(BeautifulSoup(content, "html.parser"), backend="html.parser")
+
+
+PARSER_BACKENDS: Dict[str, Callable[[bytes], Document]] = {
+    "lxml": _parse_lxml,
+    "bs4-lxml": _parse_soup_lxml,
+    "html.parser": _parse_soup_html_parser,
+}
+
+
+def parse_document(content: bytes, backend: Optional[str] = None) -> Document:
+    """
+    Parse with the configured backend, falling back to the more forgiving
+    ones when a page fails to parse; html.parser is always tried last
+    """
+    backend = backend or SearchConfig.PARSER_BACKEND
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unsupported parser backend: {backend}")
+
+    chain = [backend] + [name for name in PARSER_BACKENDS if name != backend]
+    for name in chain[: chain.index("html.parser")]:
+        try:
+            return PARSER_BACKENDS[name](content)
+        except Exception as e:
+            logger.debug(f"Parser {name} failed, falling back: {str(e)}")
+    return PARSER_BACKENDS["html.parser"](content)
+
+
+Page = Union[Document, BeautifulSoup]
+
+
+def as_document(page: Page) -> Document:
+    if isinstance(page, Document):
+        return page
+    return SoupDocument(page)
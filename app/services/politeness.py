@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlsplit
+
+from app.config.search_config import SearchConfig
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """
+        Take a token and return how long the caller has to wait before using it
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+
+        # A negative balance is the queue of callers already holding a reservation
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class DomainScheduler:
+    """
+    Process-wide politeness budget: one token bucket per configured site,
+    or per registrable domain for other hosts, so www., m. and other
+    subdomains share one budget. Buckets refill at the site's configured
+    delay and different sites never wait on each other.
+    """
+
+    _buckets: Dict[str, TokenBucket] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def bucket_key(host: str) -> str:
+        site_type = SearchConfig.get_site_type(host)
+        if site_type is not None:
+            return f"site:{site_type}"
+        return SearchConfig.get_registrable_domain(host)
+
+    @classmethod
+    def reserve(cls, url: str) -> float:
+        host = urlsplit(url).hostname or ""
+        key = cls.bucket_key(host)
+        with cls._lock:
+            if key not in cls._buckets:
+                delay = SearchConfig.get_domain_delay(host)
+                if delay <= 0:
+                    return 0.0
+                cls._buckets[key] = TokenBucket(
+                    rate=1 / delay, capacity=SearchConfig.DOMAIN_BURST
+                )
+            return cls._buckets[key].reserve()
+
+    @classmethod
+    async def wait(cls, url: str):
+        delay = cls.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._buckets.clear()
@@ -0,0 +1,91 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+# Currency lookup tables. Keywords only count as whole words, so "hours" is
+# not rupees; a string naming several currencies takes the first one.
+SYMBOL_CURRENCIES = {
+    "₹": "INR",
+    "₨": "INR",
+    "$": "USD",
+    "€": "EUR",
+    "£": "GBP",
+    "¥": "JPY",
+    "₩": "KRW",
+    "₽": "RUB",
+}
+KEYWORD_CURRENCIES = {
+    "rs": "INR", "rupee": "INR", "rupees": "INR", "inr": "INR",
+    "usd": "USD", "dollar": "USD", "dollars": "USD",
+    "eur": "EUR", "euro": "EUR", "euros": "EUR",
+    "gbp": "GBP", "pound": "GBP", "pounds": "GBP",
+    "jpy": "JPY", "yen": "JPY",
+    "cny": "CNY", "yuan": "CNY",
+    "krw": "KRW", "won": "KRW",
+    "rub": "RUB", "ruble": "RUB", "rubles": "RUB",
+}
+CURRENCY_TOKEN = re.compile(
+    "[" + re.escape("".join(SYMBOL_CURRENCIES)) + "]"
+    + "|(?<![a-z])(?:" + "|".join(sorted(KEYWORD_CURRENCIES, key=len, reverse=True)) + ")(?![a-z])",
+    re.IGNORECASE,
+)
+
+# Digit groups joined by "." "," or "'" (1,299.00 / 1.299,00 / lakh
+# 1,29,900), or by a space before exactly three digits (1 299,00)
+AMOUNT = re.compile(r"\d+(?:[.,']\d+|[ \u00a0\u202f]\d{3}(?!\d))*")
+GROUP_SEPARATORS = re.compile(r"[.,'\s]")
+
+
+def detect_currency(text: str) -> Optional[str]:
+    """
+    ISO code of the first currency symbol or keyword in the text
+    """
+    match = CURRENCY_TOKEN.search(text)
+    if match is None:
+        return None
+    token = match.group(0)
+    return SYMBOL_CURRENCIES.get(token) or KEYWORD_CURRENCIES[token.lower()]
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """
+    Value of the first amount in the text. The last "." or "," is the
+    decimal separator when at most two digits follow it, so "1,299.00",
+    "1.299,00" and "₹1,29,900" all read as written.
+    """
+    match = AMOUNT.search(text)
+    if match is None:
+        return None
+    amount = match.group(0)
+    if amount.isdigit():
+        return float(amount)
+
+    separator = max(amount.rfind("."), amount.rfind(","))
+    if separator != -1 and len(amount) - separator - 1 <= 2:
+        whole, fraction = amount[:separator], amount[separator + 1:]
+    else:
+        whole, fraction = amount, ""
+    whole = GROUP_SEPARATORS.sub("", whole)
+    return float(f"{whole}.{fraction}" if fraction else whole)
+
+
+@lru_cache(maxsize=8192)
+def normalize_price(text: str) -> Optional[Tuple[float, str]]:
+    """
+    (value, currency) for a raw price string, currency "UNKNOWN" when the
+    string names none
+    """
+    if not text:
+        return None
+    value = parse_amount(text)
+    if value is None:
+        return None
+    return value, detect_currency(text) or "UNKNOWN"
+
+
+def normalize_prices(texts: Iterable[str]) -> List[Optional[Tuple[float, str]]]:
+    """
+    normalize_price for each string, in order; repeated strings, common
+    within a page, are parsed once
+    """
+    return [normalize_price(text) for text in texts]
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Optional
+
+import googlesearch
+
+from app.config.search_config import SearchConfig
+from app.services.cache import ResultCache, SerpCache
+from app.services.executors import SearchExecutor
+from app.utils.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SearchProviderError(Exception):
+    pass
+
+
+class SearchProvider(ABC):
+    """
+    Source of result URLs for a query. aiter_urls yields them in ranking
+    order as soon as each one is known, so page fetches can start early.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def aiter_urls(self, query: str, num_results: int) -> AsyncIterator[str]:
+        """
+        An async generator of result URLs
+        """
+
+
+class GoogleProvider(SearchProvider):
+    """
+    googlesearch.search on the IO pool. Its links are handed over as it
+    parses them, so page fetches start before it has made its last request.
+    """
+
+    name = "google"
+
+    def _search(self, query: str, num_results: int, found, stopped: threading.Event):
+        with Metrics.span("serp", provider=self.name):
+            for link in googlesearch.search(
+                query, num_results=num_results, timeout=SearchConfig.TIMEOUT, unique=True
+            ):
+                if stopped.is_set():
+                    return
+                found(link)
+
+    async def aiter_urls(self, query: str, num_results: int) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        links: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+        search = asyncio.ensure_future(
+            SearchExecutor.run_io(
+                self._search,
+                query,
+                num_results,
+                lambda link: loop.call_soon_threadsafe(links.put_nowait, link),
+                stopped,
+            )
+        )
+        search.add_done_callback(lambda _: links.put_nowait(None))
+
+        seen = set()
+        try:
+            while True:
+                link = await links.get()
+                if link is None:
+                    break
+                # googlesearch yields an empty link for result blocks without one
+                if link.startswith(("http://", "https://")) and link not in seen:
+                    seen.add(link)
+                    yield link
+                    if len(seen) >= num_results:
+                        return
+            try:
+                search.result()
+            except Exception as e:
+                if not seen:
+                    raise SearchProviderError(f"Google search failed: {str(e)}") from e
+                logger.warning(f"Google search stopped early for {query}: {str(e)}")
+        finally:
+            # The thread finishes its current request and stops
+            stopped.set()
+            search.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+
+class FixtureProvider(SearchProvider):
+    """
+    Fixed result URLs per normalized query, given directly or as a JSON file
+    of {query: [urls]}, for tests, benchmarks and offline runs
+    """
+
+    name = "fixture"
+
+    def __init__(
+        self,
+        results: Optional[Dict[str, List[str]]] = None,
+        path: Optional[str] = None,
+        delay: float = 0,
+    ):
+        if results is None:
+            path = path or SearchConfig.SEARCH_FIXTURE_PATH
+            results = {}
+            if path:
+                with open(path) as f:
+                    results = json.load(f)
+        self.results = {
+            ResultCache.normalize_query(query): urls for query, urls in results.items()
+        }
+        # Simulated provider latency
+        self.delay = delay
+
+    async def aiter_urls(self, query: str, num_results: int) -> AsyncIterator[str]:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        for url in self.results.get(ResultCache.normalize_query(query), [])[:num_results]:
+            yield url
+
+
+PROVIDER_CLASSES: Dict[str, type] = {"google": GoogleProvider, "fixture": FixtureProvider}
+
+
+class SearchProviders:
+    """
+    The provider chain from SEARCH_PROVIDERS, shared per process. A provider
+    only runs when every one before it failed without yielding a URL.
+    """
+
+    _chain: Optional[List[SearchProvider]] = None
+
+    @classmethod
+    def chain(cls) -> List[SearchProvider]:
+        if cls._chain is None:
+            names = [name.strip() for name in SearchConfig.SEARCH_PROVIDERS.split(",")]
+            providers = []
+            for name in filter(None, names):
+                if name not in PROVIDER_CLASSES:
+                    raise ValueError(f"Unsupported search provider: {name}")
+                providers.append(PROVIDER_CLASSES[name]())
+            cls._chain = providers
+        return cls._chain
+
+    @classmethod
+    def use(cls, *providers: SearchProvider):
+        """
+        Replace the configured chain, e.g. with a FixtureProvider in tests
+        """
+        cls._chain = list(providers)
+
+    @classmethod
+    def reset(cls):
+        cls._chain = None
+
+
+async def aiter_search_urls(query: str, num_results: int) -> AsyncIterator[str]:
+    """
+    Result URLs for a query from the SERP cache or the provider chain,
+    yielded as they arrive; raises SearchProviderError when every provider
+    failed
+    """
+    num_results = SearchConfig.validate_num_results(num_results)
+    providers = SearchProviders.chain()
+    serp_cache = SerpCache.shared()
+    cache_key = SerpCache.key(",".join(p.name for p in providers), query, num_results)
+
+    cached = await serp_cache.aget(cache_key) if serp_cache is not None else None
+    if cached is not None:
+        Metrics.inc("searches", provider="cache")
+        for url in cached:
+            yield url
+        return
+
+    error: Optional[Exception] = None
+    for provider in providers:
+        urls: List[str] = []
+        try:
+            async for url in provider.aiter_urls(query, num_results):
+                urls.append(url)
+                yield url
+        except Exception as e:
+            if urls:
+                # Pages are already being fetched for these; keep them, uncached
+                logger.warning(f"Search provider {provider.name} stopped early for {query}: {str(e)}")
+                return
+            logger.error(f"Search provider {provider.name} failed for {query}: {str(e)}")
+            Metrics.inc("provider_errors", provider=provider.name)
+            error = e
+            continue
+
+        Metrics.inc("searches", provider=provider.name)
+        if serp_cache is not None and urls:
+            await serp_cache.aset(cache_key, urls)
+        return
+
+    if error is not None:
+        raise SearchProviderError(str(error))
@@ -1,86 +1,133 @@
+import asyncio
 import re
-import requests
-from bs4 import BeautifulSoup
-from googlesearch import search
-from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 import logging
-import random
 import time
 from app.config.search_config import SearchConfig
 from app.entities.search import SearchResult
+from app.services.cache import ParsedResultCache
+from app.services.canonical import aiter_unique_urls, canonical_key
+from app.services.executors import SearchExecutor, in_parse_worker
+from app.services.extraction import (
+    BASIC_PRICE_SELECTOR_SET,
+    TITLE_SELECTOR_SET,
+    PriceExtractor,
+)
+from app.services.fetcher import AsyncFetcher, FetchedPage, known_sites_first
+from app.services.http_client import SharedHttpClient
+from app.services.parsers import Document, Page, as_document, parse_document
+from app.services.prices import detect_currency, normalize_price, parse_amount
+from app.services.providers import aiter_search_urls
+from app.services.site_extractors import SiteExtractor, SiteExtractors
+from app.services.structured import extract_structured_data, format_price
+from app.services.url_filter import UrlFilter
+from app.utils.metrics import Metrics
 
 logger = logging.getLogger(__name__)
 
 
-class BaseService:
-    _version = 1
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(SearchConfig.DEFAULT_HEADERS)
-        self.session.headers["User-Agent"] = random.choice(SearchConfig.USER_AGENTS)
+class PageStatus:
+    COMPLETED = "completed"
+    NO_PRICES = "no_prices"
+    FAILED = "failed"
+    TIMED_OUT = "timed_out"
+    SKIPPED = "skipped"
+    DUPLICATE = "duplicate"
 
-    def search_google(self, query: str, num_results: int = 10) -> List[str]:
-        try:
-            # Validate number of results
-            num_results = SearchConfig.validate_num_results(num_results)
-
-            urls = []
-            for url in search(
-                query,
-                num_results=num_results,
-                # stop=num_results,
-                # pause=SearchConfig.SEARCH_DELAY,
-            ):
-                urls.append(url)
-            return urls
-        except Exception as e:
-            logger.error(f"Error searching Google: {str(e)}")
-            return []
 
-    def fetch_page_content(self, url: str) -> Optional[BeautifulSoup]:
-        try:
-            response = self.session.get(url, timeout=SearchConfig.TIMEOUT)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, "html.parser")
+@dataclass
+class ExtractedPage:
+    """
+    Outcome for one search result URL; result is set when prices were found
+    """
 
-            # Add small delay to be respectful
-            time.sleep(0.5)
-            return soup
-        except Exception as e:
-            logger.error(f"Error fetching content from {url}: {str(e)}")
-            return None
+    index: int
+    url: str
+    status: str
+    result: Optional[SearchResult] = None
+
+
+def result_signature(result: SearchResult) -> Optional[Tuple]:
+    """
+    What makes two results the same offer: site, product name and prices.
+    None for results without a product name, those are never merged.
+    """
+    name = (result.product_name or "").strip().lower()
+    if not name:
+        return None
+    site = canonical_key(result.link).split("/", 1)[0]
+    prices = frozenset(
+        (price.get("value"), price.get("currency")) if isinstance(price, dict) else price
+        for price in result.prices
+    )
+    return site, name, result.currency, prices
+
+
+def record_extraction(version: int, path: str, info: SearchResult):
+    """
+    Count an extraction by the path that produced it, and the source of
+    each price it found: the price's own label in v2, the path in v1
+    """
+    if not SearchConfig.METRICS_ENABLED:
+        return
+    Metrics.inc("extractions", version=version, path=path, outcome="prices" if info.prices else "no_prices")
+    for price in info.prices:
+        source = price.get("source", path) if isinstance(price, dict) else path
+        Metrics.inc("price_sources", version=version, source=source)
+
+
+def merge_duplicate_results(pages: List[ExtractedPage]):
+    """
+    Keep the best-ranked of results that are the same offer, the others are
+    marked as duplicates; pages must be in ranking order
+    """
+    seen = set()
+    for page in pages:
+        signature = result_signature(page.result) if page.result else None
+        if signature is None:
+            continue
+        if signature in seen:
+            page.status, page.result = PageStatus.DUPLICATE, None
+        else:
+            seen.add(signature)
+
+
+class BaseService:
+    _version = 1
+
+    def search_urls(self, query: str, num_results: int = 10) -> AsyncIterator[str]:
+        """
+        Result URLs from the SERP cache or the configured search providers,
+        yielded as soon as each is known, each page once
+        """
+        urls = aiter_search_urls(query, num_results)
+        return aiter_unique_urls(urls) if SearchConfig.CANONICAL_DEDUP else urls
 
-    def extract_prices(self, soup: BeautifulSoup) -> List[str]:
+    def extract_prices(self, page: Page) -> List[str]:
+        document = as_document(page)
         prices = []
 
-        price_patterns = SearchConfig.get_price_patterns()
+        price_patterns = [
+            re.compile(pattern, re.IGNORECASE)
+            for pattern in SearchConfig.get_price_patterns()
+        ]
 
-        text_content = soup.get_text()
+        text_content = document.text()
         for pattern in price_patterns:
-            matches = re.findall(pattern, text_content, re.IGNORECASE)
-            prices.extend(matches)
-
-        price_selectors = [
-            '[class*="price"]',
-            '[class*="cost"]',
-            '[class*="amount"]',
-            '[id*="price"]',
-            "[data-price]",
-            ".price",
-            ".cost",
-            ".amount",
-            'span[class*="price"]',
-            'div[class*="price"]',
-            'p[class*="price"]',
-        ]
+            prices.extend(pattern.findall(text_content))
 
-        for selector in price_selectors:
-            elements = soup.select(selector)
+        # One walk matches every selector, each element's text is scanned once
+        element_prices = {}
+        for elements in BASIC_PRICE_SELECTOR_SET.match(document):
             for element in elements:
-                text = element.get_text(strip=True)
-                for pattern in price_patterns:
-                    matches = re.findall(pattern, text, re.IGNORECASE)
-                    prices.extend(matches)
+                key = id(element)
+                if key not in element_prices:
+                    text = document.element_text(element)
+                    element_prices[key] = [
+                        match for pattern in price_patterns for match in pattern.findall(text)
+                    ]
+                prices.extend(element_prices[key])
 
         unique_prices = []
         seen = set()
@@ -92,32 +139,16 @@ class BaseService:
         return unique_prices
 
     def extract_currency(self, price_text: str) -> Optional[str]:
-        currency_patterns = {
-            'INR': r'[₹]|rs\.?|rupees?|inr',
-            'USD': r'[\$]|usd|dollars?',
-            'EUR': r'[€]|eur|euros?',
-            'GBP': r'[£]|gbp|pounds?',
-            'JPY': r'[¥]|jpy|yen',
-            'CNY': r'[¥]|cny|yuan',
-            'KRW': r'[₩]|krw|won',
-            'RUB': r'[₽]|rub|rubles?',
-        }
-
-        for currency, pattern in currency_patterns.items():
-            if re.search(pattern, price_text, re.IGNORECASE):
-                return currency
-        
-        return None
+        return detect_currency(price_text)
     
-    def extract_product_name(self, soup: BeautifulSoup) -> Optional[str]:
-        title_selectors = ["h1", "title", '[class*="title"]', '[class*="name"]']
-        for selector in title_selectors:
-            element = soup.select_one(selector)
-            if element:
-                return element.get_text(strip=True)
-        return None
+    def extract_product_name(self, page: Page) -> Optional[str]:
+        document = as_document(page)
+        element = TITLE_SELECTOR_SET.first(document)
+        if element is None:
+            return None
+        return document.element_text(element)
     
-    def extract_product_info(self, soup: BeautifulSoup) -> SearchResult:
+    def extract_product_info(self, page: Page) -> SearchResult:
         """
         Extract product information including title, description, and prices
         """
@@ -128,11 +159,14 @@ class BaseService:
             currency=None,
         )
 
+        document = as_document(page)
+
         # Extract title
-        info.product_name = self.extract_product_name(soup)
+        info.product_name = self.extract_product_name(document)
 
         # Extract prices
-        info.prices = self.extract_prices(soup)
+        with Metrics.span("extract_prices", version=self._version):
+            info.prices = self.extract_prices(document)
 
         # Extract currency from the first price if available
         if info.prices:
@@ -141,210 +175,240 @@ class BaseService:
 
         return info
 
-    def search_and_extract(self, query: str, num_results: int) -> List[Dict]:
-        urls = self.search_google(query, num_results)
-        results = []
+    def extract_structured_info(self, content: bytes) -> Optional[SearchResult]:
+        """
+        Product info from JSON-LD, meta tags and microdata in the raw page,
+        or None when they are missing or not confident enough to skip the DOM
+        """
+        data = extract_structured_data(content)
+        if not data.confident:
+            return None
 
-        for i, url in enumerate(urls):
-            logger.info(f"Processing URL {i + 1}/{len(urls)}: {url}")
-            soup = self.fetch_page_content(url)
+        return SearchResult(
+            link="",
+            prices=list(dict.fromkeys(format_price(price) for price in data.prices)),
+            product_name=data.product_name,
+            currency=next(p.currency for p in data.prices if p.currency != "UNKNOWN"),
+        )
+
+    def extract_site_info(self, extractor: SiteExtractor, page: Page) -> Optional[SearchResult]:
+        """
+        Product info from the site's own title and price selectors, or None
+        when they find no price and the generic selectors have to run
+        """
+        document = as_document(page)
+        match = extractor.extract(document)
+        if match.price_text is None:
+            return None
+
+        prices = list(
+            dict.fromkeys(
+                price
+                for pattern in SearchConfig.get_price_patterns()
+                for price in re.findall(pattern, match.price_text, re.IGNORECASE)
+            )
+        )
+        if not prices:
+            return None
+
+        return SearchResult(
+            link="",
+            prices=prices,
+            product_name=match.product_name or self.extract_product_name(document),
+            currency=self.extract_currency(prices[0]),
+        )
 
-            if soup:
-                info = self.extract_product_info(soup)
-                info.link = url
-                # info.rank = i + 1
-                if len(info.prices) == 0:
-                    logger.warning(f"No prices found for URL: {url}")
-                    continue
+    def parse_page(self, content: bytes) -> Document:
+        return parse_document(content)
 
-                results.append(info)
-            else:
-                logger.warning(f"Failed to fetch content from: {url}")
+    def extract_page(self, url: str, content: bytes) -> Optional[SearchResult]:
+        extractor = SiteExtractors.for_url(url)
+        pipeline = SearchConfig.PARSER_BACKEND
+        if SearchConfig.STRUCTURED_FAST_PATH:
+            pipeline += "+structured"
+        if extractor is not None:
+            pipeline += f"+{extractor.site_type}"
 
-        return results
+        parse_cache = ParsedResultCache.shared()
+        cache_key = ParsedResultCache.key(content, self._version, pipeline)
+        info = parse_cache.get(cache_key) if parse_cache is not None else None
+
+        if info is not None:
+            Metrics.inc("extractions", version=self._version, path="cache", outcome="prices" if info.prices else "no_prices")
+        else:
+            # Structured data first; the DOM is only built when it falls short
+            path = "structured"
+            if SearchConfig.STRUCTURED_FAST_PATH:
+                with Metrics.span("structured", version=self._version):
+                    info = self.extract_structured_info(content)
+            if info is None:
+                with Metrics.span("parse", version=self._version, backend=SearchConfig.PARSER_BACKEND):
+                    document = self.parse_page(content)
+                if extractor is not None:
+                    path = extractor.site_type
+                    with Metrics.span("site_extract", version=self._version, site=path):
+                        info = self.extract_site_info(extractor, document)
+                    SiteExtractors.record(extractor.site_type, info is not None)
+                if info is None:
+                    path = "generic"
+                    info = self.extract_product_info(document)
+            record_extraction(self._version, path, info)
+            if parse_cache is not None:
+                parse_cache.set(cache_key, info)
+
+        # Cached results are shared across URLs with the same body
+        info = info.model_copy(update={"link": url})
+        if len(info.prices) == 0:
+            logger.warning(f"No prices found for URL: {url}")
+            return None
+        return info
 
-    def search(self, query: str, num_results: int | None = None) -> Dict:
+    async def aiter_search_and_extract(
+        self, query: str, num_results: int, deadline: Optional[float] = None
+    ) -> AsyncIterator[ExtractedPage]:
+        """
+        Yield each URL's outcome as soon as its page is extracted, so the
+        first result arrives with the fastest page rather than the slowest.
+        Once the deadline (seconds) passes, outstanding fetches and parses
+        are cancelled and their URLs are yielded as timed out.
+        """
+        loop = asyncio.get_running_loop()
+        expires = loop.time() + SearchConfig.validate_deadline(deadline)
+        priority = known_sites_first if SearchConfig.PRIORITIZE_KNOWN_SITES else None
+        fetcher = AsyncFetcher(priority=priority)
+        outcomes: asyncio.Queue = asyncio.Queue()
+        # Every URL handed to the fetcher, position matches FetchedPage.index
+        urls: List[str] = []
+
+        async def search_urls():
+            # Fetches start as result URLs arrive, provider errors end the search
+            with Metrics.span("search", version=self._version):
+                async for url in self.search_urls(query, num_results):
+                    urls.append(url)
+                    yield url
+
+        async def extract(page: FetchedPage):
+            try:
+                start = time.monotonic()
+                result = await aextract_page(self._version, page.url, page.content)
+                UrlFilter.record_parse(page.url, time.monotonic() - start, result is not None)
+                status = PageStatus.COMPLETED if result else PageStatus.NO_PRICES
+            except Exception as e:
+                logger.error(f"Error extracting {page.url}: {str(e)}")
+                result, status = None, PageStatus.FAILED
+            outcomes.put_nowait(ExtractedPage(page.index, page.url, status, result))
+
+        async def fetch_and_extract():
+            parses = []
+            try:
+                # Pages arrive in completion order; parse each one while the rest download
+                async for page in fetcher.fetch_all(search_urls()):
+                    logger.info(f"Processing URL {page.index + 1}: {page.url}")
+                    if page.skipped is not None:
+                        outcomes.put_nowait(
+                            ExtractedPage(page.index, page.url, PageStatus.SKIPPED)
+                        )
+                        continue
+                    if page.content is None:
+                        logger.warning(f"Failed to fetch content from: {page.url}")
+                        outcomes.put_nowait(
+                            ExtractedPage(page.index, page.url, PageStatus.FAILED)
+                        )
+                        continue
+                    parses.append(asyncio.ensure_future(extract(page)))
+                await asyncio.gather(*parses)
+            finally:
+                for parse in parses:
+                    parse.cancel()
+                outcomes.put_nowait(None)
+
+        finished = set()
+        timed_out = False
+        producer = asyncio.ensure_future(fetch_and_extract())
+        try:
+            while True:
+                try:
+                    outcome = await asyncio.wait_for(outcomes.get(), expires - loop.time())
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    break
+                if outcome is None:
+                    break
+                finished.add(outcome.index)
+                Metrics.inc("page_outcomes", version=self._version, status=outcome.status)
+                yield outcome
+            if not timed_out:
+                await producer
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+        if timed_out:
+            logger.warning(f"Search deadline reached for {query}, returning partial results")
+            # Pages that finished while the rest were being cancelled still count
+            while not outcomes.empty():
+                outcome = outcomes.get_nowait()
+                if outcome is not None and outcome.index not in finished:
+                    finished.add(outcome.index)
+                    Metrics.inc("page_outcomes", version=self._version, status=outcome.status)
+                    yield outcome
+            for index, url in enumerate(urls):
+                if index not in finished:
+                    Metrics.inc("page_outcomes", version=self._version, status=PageStatus.TIMED_OUT)
+                    yield ExtractedPage(index, url, PageStatus.TIMED_OUT)
+
+    async def asearch_pages(
+        self, query: str, num_results: int, deadline: Optional[float] = None
+    ) -> List[ExtractedPage]:
+        pages = [
+            page async for page in self.aiter_search_and_extract(query, num_results, deadline)
+        ]
+
+        # Keep Google's ranking in the response
+        pages.sort(key=lambda page: page.index)
+        if SearchConfig.MERGE_DUPLICATE_RESULTS:
+            merge_duplicate_results(pages)
+        return pages
+
+    async def asearch_and_extract(
+        self, query: str, num_results: int, deadline: Optional[float] = None
+    ) -> List[SearchResult]:
+        pages = await self.asearch_pages(query, num_results, deadline)
+        return [page.result for page in pages if page.result]
+
+    def search_and_extract(
+        self, query: str, num_results: int, deadline: Optional[float] = None
+    ) -> List[SearchResult]:
+        return SharedHttpClient.run(self.asearch_and_extract(query, num_results, deadline))
+
+    async def asearch(
+        self, query: str, num_results: int | None = None, deadline: Optional[float] = None
+    ) -> Dict:
         num_results = num_results or SearchConfig.DEFAULT_RESULTS
         try:
-            results = self.search_and_extract(query, num_results)
-            return {"query": query,  "results": results}
+            pages = await self.asearch_pages(query, num_results, deadline)
+            return {
+                "query": query,
+                "results": [page.result for page in pages if page.result],
+                "pages": [{"url": page.url, "status": page.status} for page in pages],
+            }
         except Exception as e:
             logger.error(f"Error in search: {str(e)}")
             return {"query": query, "results": [], "error": str(e)}
 
+    def search(
+        self, query: str, num_results: int | None = None, deadline: Optional[float] = None
+    ) -> Dict:
+        return SharedHttpClient.run(self.asearch(query, num_results, deadline))
+
 class SearchService(BaseService):
     _version = 2
     def normalize_price(self, price_text: str) -> Optional[Tuple[float, str]]:
-        if not price_text:
-            return None
-        
-        # Clean the price text
-        cleaned_price = re.sub(r'[^\d.,₹$€£¥₩₽¢₨₪₫₦₡₵₴₸₲₱₾₺₼₿\s-]', '', price_text)
-        
-        # Currency patterns with their symbols
-        currency_patterns = {
-            'INR': r'[₹]|rs\.?|rupees?|inr',
-            'USD': r'[\$]|usd|dollars?',
-            'EUR': r'[€]|eur|euros?',
-            'GBP': r'[£]|gbp|pounds?',
-            'JPY': r'[¥]|jpy|yen',
-            'CNY': r'[¥]|cny|yuan',
-            'KRW': r'[₩]|krw|won',
-            'RUB': r'[₽]|rub|rubles?',
-        }
-        
-        # Find currency
-        currency = None
-        for curr_code, pattern in currency_patterns.items():
-            if re.search(pattern, cleaned_price.lower()):
-                currency = curr_code
-                break
-        
-        # Extract numeric value
-        numeric_match = re.search(r'(\d{1,3}(?:[,\s]\d{3})*(?:\.\d{2})?|\d+(?:\.\d{2})?)', cleaned_price)
-        if numeric_match:
-            numeric_str = numeric_match.group(1)
-            # Remove thousand separators
-            numeric_str = re.sub(r'[,\s]', '', numeric_str)
-            try:
-                value = float(numeric_str)
-                return (value, currency or 'UNKNOWN')
-            except ValueError:
-                pass
-        
-        return None
+        return normalize_price(price_text)
 
-    def extract_prices(self, soup: BeautifulSoup) -> List[Dict]:
-        prices = []
-        
-        price_patterns = [
-            # Indian Rupees
-            r'₹\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'Rs\.?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'INR\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*₹',
-            r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*Rs\.?',
-            r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*INR',
-            
-            # US Dollars
-            r'\$\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'USD\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*USD',
-            
-            # Euros
-            r'€\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'EUR\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*€',
-            
-            # British Pounds
-            r'£\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'GBP\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Generic price patterns
-            r'Price:\s*([₹$€£¥₩₽¢₨₪₫₦₡₵₴₸₲₱₾₺₼₿]?\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'Cost:\s*([₹$€£¥₩₽¢₨₪₫₦₡₵₴₸₲₱₾₺₼₿]?\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'Amount:\s*([₹$€£¥₩₽¢₨₪₫₦₡₵₴₸₲₱₾₺₼₿]?\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        ]
-        
-        price_selectors = [
-            # Common price classes
-            '.price', '.cost', '.amount', '.value',
-            '[class*="price"]', '[class*="cost"]', '[class*="amount"]', '[class*="value"]',
-            '[id*="price"]', '[id*="cost"]', '[id*="amount"]',
-            
-            # E-commerce specific
-            '.sale-price', '.regular-price', '.current-price', '.final-price',
-            '.product-price', '.item-price', '.listing-price',
-            '[class*="sale-price"]', '[class*="regular-price"]', '[class*="current-price"]',
-            
-            # Schema.org microdata
-            '[itemtype*="Product"] [itemprop="price"]',
-            '[itemtype*="Offer"] [itemprop="price"]',
-            '[itemtype*="PriceSpecification"] [itemprop="price"]',
-            
-            # Data attributes
-            '[data-price]', '[data-cost]', '[data-amount]', '[data-value]',
-            '[data-original-price]', '[data-sale-price]', '[data-current-price]',
-            
-            # Specific tags
-            'span[class*="price"]', 'div[class*="price"]', 'p[class*="price"]',
-            'span[class*="cost"]', 'div[class*="cost"]', 'p[class*="cost"]',
-            'meta[property="product:price:amount"]',
-            'meta[name="price"]',
-            
-            # JSON-LD structured data
-            'script[type="application/ld+json"]'
-        ]
-        
-        text_content = soup.get_text()
-        for pattern in price_patterns:
-            matches = re.findall(pattern, text_content, re.IGNORECASE)
-            for match in matches:
-                normalized = self.normalize_price(match)
-                if normalized:
-                    prices.append({
-                        'raw_text': match,
-                        'value': normalized[0],
-                        'currency': normalized[1],
-                        'source': 'text_content'
-                    })
-        
-        for selector in price_selectors:
-            try:
-                elements = soup.select(selector)
-                for element in elements:
-                    if element.name == 'script' and element.get('type') == 'application/ld+json':
-                        try:
-                            import json
-                            data = json.loads(element.string)
-                            price_data = self.extract_price_from_json_ld(data)
-                            if price_data:
-                                prices.extend(price_data)
-                            continue
-                        except:
-                            pass
-                    
-                    # Check data attributes first
-                    for attr in ['data-price', 'data-cost', 'data-amount', 'data-value']:
-                        if element.get(attr):
-                            normalized = self.normalize_price(element.get(attr))
-                            if normalized:
-                                prices.append({
-                                    'raw_text': element.get(attr),
-                                    'value': normalized[0],
-                                    'currency': normalized[1],
-                                    'source': f'attribute_{attr}'
-                                })
-                    
-                    # Check element text
-                    text = element.get_text(strip=True)
-                    if text:
-                        for pattern in price_patterns:
-                            matches = re.findall(pattern, text, re.IGNORECASE)
-                            for match in matches:
-                                normalized = self.normalize_price(match)
-                                if normalized:
-                                    prices.append({
-                                        'raw_text': match,
-                                        'value': normalized[0],
-                                        'currency': normalized[1],
-                                        'source': f'element_{selector}'
-                                    })
-            except Exception as e:
-                logger.debug(f"Error processing selector {selector}: {str(e)}")
-        
-        unique_prices = []
-        seen_values = set()
-        
-        for price in prices:
-            price_key = (price['value'], price['currency'])
-            if price_key not in seen_values:
-                unique_prices.append(price)
-                seen_values.add(price_key)
-        
-        unique_prices.sort(key=lambda x: x['value'])
-        
-        return unique_prices
+    def extract_prices(self, page: Page) -> List[Dict]:
+        extractor = PriceExtractor(self.normalize_price, self.extract_price_from_json_ld)
+        return extractor.extract(as_document(page))
 
     def extract_price_from_json_ld(self, data: Dict) -> List[Dict]:
         """
@@ -371,9 +435,7 @@ class SearchService(BaseService):
                     try:
                         if isinstance(price_value, str):
                             # Try to extract numeric value
-                            numeric_match = re.search(r'(\d+(?:\.\d{2})?)', price_value)
-                            if numeric_match:
-                                price_value = float(numeric_match.group(1))
+                            price_value = parse_amount(price_value)
                         
                         if isinstance(price_value, (int, float)):
                             prices.append({
@@ -419,23 +481,79 @@ class SearchService(BaseService):
         
         return realistic_prices[0]
 
-    def extract_product_info(self, soup: BeautifulSoup) -> SearchResult:
+    def extract_structured_info(self, content: bytes) -> Optional[SearchResult]:
+        data = extract_structured_data(content)
+        if not data.confident:
+            return None
+
+        info: SearchResult = SearchResult(
+            link="",
+            prices=[],
+            product_name=data.product_name,
+            currency=None,
+        )
+
+        prices = []
+        seen_values = set()
+        for price in data.prices:
+            if (price.value, price.currency) not in seen_values:
+                prices.append(price._asdict())
+                seen_values.add((price.value, price.currency))
+        prices.sort(key=lambda x: x["value"])
+        info.prices = prices
+
+        best_price = self.get_best_price(prices)
+        if best_price:
+            info.currency = best_price["currency"]
+
+        return info
+
+    def extract_site_info(self, extractor: SiteExtractor, page: Page) -> Optional[SearchResult]:
+        document = as_document(page)
+        match = extractor.extract(document)
+        normalized = self.normalize_price(match.price_text) if match.price_text else None
+        if normalized is None:
+            return None
+
+        price = {
+            "raw_text": match.price_text,
+            "value": normalized[0],
+            "currency": normalized[1],
+            "source": f"site_{extractor.site_type}",
+        }
+        best_price = self.get_best_price([price])
+        if best_price is None:
+            return None
+
+        info: SearchResult = SearchResult(
+            link="",
+            prices=[],
+            product_name=match.product_name or self.extract_product_name(document),
+            currency=best_price["currency"],
+        )
+        info.prices = [best_price]
+        return info
+
+    def extract_product_info(self, page: Page) -> SearchResult:
         info: SearchResult = SearchResult(
             link="",
             prices=[],
             product_name=None,
             currency=None,
         )
+        document = as_document(page)
 
         # Extract title
-        info.product_name = self.extract_product_name(soup)
+        info.product_name = self.extract_product_name(document)
 
         # Extract prices with enhanced method
-        extracted_prices = self.extract_prices(soup)
+        with Metrics.span("extract_prices", version=self._version):
+            extracted_prices = self.extract_prices(document)
         info.prices = extracted_prices
         
         # Set currency from the best price
-        best_price = self.get_best_price(extracted_prices)
+        with Metrics.span("best_price", version=self._version):
+            best_price = self.get_best_price(extracted_prices)
         if best_price:
             info.currency = best_price['currency']
 
@@ -449,9 +567,62 @@ class SearchVersion:
         self.version = max(1, min(version or self._latest_version, self._latest_version))
 
     def get_service(self) -> BaseService:
-        if self.version == 1:
-            return BaseService()
-        elif self.version == 2:
-            return SearchService()
-        else:
-            raise ValueError(f"Unsupported search service version: {self.version}")
\ No newline at end of file
+        return shared_service(self.version)
+
+
+SERVICE_CLASSES: Dict[int, type] = {1: BaseService, 2: SearchService}
+
+_services: Dict[int, BaseService] = {}
+
+
+def shared_service(version: int) -> BaseService:
+    """
+    One service per version per process; services keep no per-search state,
+    so requests and batch items can share them instead of building a new
+    session each time
+    """
+    if version not in _services:
+        if version not in SERVICE_CLASSES:
+            raise ValueError(f"Unsupported search service version: {version}")
+        _services[version] = SERVICE_CLASSES[version]()
+    return _services[version]
+
+
+def extract_page(version: int, url: str, content: bytes) -> Optional[SearchResult]:
+    """
+    Picklable parse entry point so extraction can run in a process pool
+    """
+    return shared_service(version).extract_page(url, content)
+
+
+def extract_page_fields(
+    version: int, url: str, content: bytes
+) -> Tuple[Optional[Tuple], Optional[Tuple]]:
+    """
+    extract_page for the parse pool: a plain tuple crosses the process
+    boundary in less than half the bytes of the model. Returned with the
+    metrics the worker recorded, if it is a separate process.
+    """
+    result = extract_page(version, url, content)
+    # Metrics recorded in a worker process travel back with the result
+    metrics = Metrics.drain() if in_parse_worker() else None
+    if result is None:
+        return None, metrics
+    return (result.link, result.prices, result.currency, result.product_name), metrics
+
+
+async def aextract_page(version: int, url: str, content: bytes) -> Optional[SearchResult]:
+    """
+    Extract a page in the parse pool, threads or worker processes
+    """
+    with Metrics.span("extract", version=version):
+        fields, metrics = await SearchExecutor.run_parse(extract_page_fields, version, url, content)
+    if metrics is not None:
+        Metrics.merge(metrics)
+    if fields is None:
+        return None
+    link, prices, currency, product_name = fields
+    # Built by extract_page already, no need to validate again
+    return SearchResult.model_construct(
+        link=link, prices=prices, currency=currency, product_name=product_name
+    )
@@ -0,0 +1,210 @@
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.services.parsers import Document, ElementView
+
+COMPOUND_PART = re.compile(
+    r"""
+    (?P<tag>^[a-zA-Z][\w-]*|^\*)
+    | \.(?P<cls>[\w-]+)
+    | \#(?P<id>[\w-]+)
+    | \[\s*(?P<attr>[\w:-]+)\s*
+        (?:(?P<op>[*^$~]?=)\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<bare>[\w-]+))\s*)?
+      \]
+    """,
+    re.VERBOSE,
+)
+
+# HTML matches these attribute values case-insensitively
+CASE_INSENSITIVE_ATTRIBUTES = {"type"}
+
+
+class Compound(NamedTuple):
+    tag: Optional[str]
+    id: Optional[str]
+    classes: Tuple[str, ...]
+    attrs: Tuple[Tuple[str, Optional[str], Optional[str]], ...]
+
+    def matches(self, name: str, attrs: Dict[str, Any], classes: List[str]) -> bool:
+        if self.tag is not None and name != self.tag:
+            return False
+        if self.id is not None and attrs.get("id") != self.id:
+            return False
+        for cls in self.classes:
+            if cls not in classes:
+                return False
+        for attr, op, value in self.attrs:
+            actual = attrs.get(attr)
+            if actual is None:
+                return False
+            if op is None:
+                continue
+            if isinstance(actual, list):
+                actual = " ".join(actual)
+            if attr in CASE_INSENSITIVE_ATTRIBUTES:
+                actual = actual.lower()
+            if op == "=" and actual != value:
+                return False
+            if op == "*=" and (not value or value not in actual):
+                return False
+            if op == "^=" and (not value or not actual.startswith(value)):
+                return False
+            if op == "$=" and (not value or not actual.endswith(value)):
+                return False
+            if op == "~=" and value not in actual.split():
+                return False
+        return True
+
+
+def _compile_compound(text: str) -> Compound:
+    tag, element_id, classes, attrs = None, None, [], []
+    position = 0
+    while position < len(text):
+        match = COMPOUND_PART.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Unsupported selector: {text}")
+        if match.group("tag"):
+            tag = None if match.group("tag") == "*" else match.group("tag").lower()
+        elif match.group("cls"):
+            classes.append(match.group("cls"))
+        elif match.group("id"):
+            element_id = match.group("id")
+        else:
+            attr = match.group("attr").lower()
+            value = next(
+                (v for v in match.group("dq", "sq", "bare") if v is not None), None
+            )
+            if value is not None and attr in CASE_INSENSITIVE_ATTRIBUTES:
+                value = value.lower()
+            attrs.append((attr, match.group("op"), value))
+        position = match.end()
+    return Compound(tag, element_id, tuple(classes), tuple(attrs))
+
+
+class Selector:
+    """
+    Compiled CSS selector for the subset our scrapers use: type, class, id
+    and attribute selectors, compound selectors, descendant combinators and
+    comma-separated lists
+    """
+
+    def __init__(self, css: str):
+        self.css = css
+        # Each alternative is a chain of compounds, the last one is the subject
+        self.alternatives: List[List[Compound]] = [
+            [_compile_compound(part) for part in alternative.split()]
+            for alternative in css.split(",")
+        ]
+        for chain in self.alternatives:
+            if not chain:
+                raise ValueError(f"Unsupported selector: {css}")
+
+    def matches(self, document: Document, view: ElementView) -> bool:
+        element, name, attrs, classes = view
+        for chain in self.alternatives:
+            if not chain[-1].matches(name, attrs, classes):
+                continue
+            if self._ancestors_match(document, element, chain[:-1]):
+                return True
+        return False
+
+    @staticmethod
+    def _ancestors_match(document: Document, element: Any, ancestors: List[Compound]) -> bool:
+        remaining = len(ancestors)
+        if remaining == 0:
+            return True
+        for _, name, attrs, classes in document.ancestors(element):
+            if ancestors[remaining - 1].matches(name, attrs, classes):
+                remaining -= 1
+                if remaining == 0:
+                    return True
+        return False
+
+
+class SelectorSet:
+    """
+    Matches a list of selectors against a document in one walk. Selectors
+    are indexed by what their subject requires (a class, an id, an
+    attribute, a tag), so each element is only tested against selectors it
+    could match.
+    """
+
+    def __init__(self, selectors: Sequence[str]):
+        self.selectors = [Selector(css) for css in selectors]
+        self._by_class: Dict[str, List[int]] = defaultdict(list)
+        self._by_id: Dict[str, List[int]] = defaultdict(list)
+        self._by_attr: Dict[str, List[int]] = defaultdict(list)
+        self._by_class_substring: Dict[str, List[int]] = defaultdict(list)
+        self._by_tag: Dict[str, List[int]] = defaultdict(list)
+        self._everywhere: List[int] = []
+        self.needs_attributes = True
+
+        for i, selector in enumerate(self.selectors):
+            for chain in selector.alternatives:
+                subject = chain[-1]
+                if subject.classes:
+                    self._by_class[subject.classes[0]].append(i)
+                elif subject.id is not None:
+                    self._by_id[subject.id].append(i)
+                elif subject.attrs[:1] and subject.attrs[0][:2] == ("class", "*="):
+                    self._by_class_substring[subject.attrs[0][2]].append(i)
+                elif subject.attrs:
+                    self._by_attr[subject.attrs[0][0]].append(i)
+                elif subject.tag is not None:
+                    self._by_tag[subject.tag].append(i)
+                    self.needs_attributes = False
+                else:
+                    self._everywhere.append(i)
+                    self.needs_attributes = False
+
+    def _candidates(self, name: str, attrs: Dict[str, Any], classes: List[str]) -> set:
+        candidates = set(self._everywhere)
+        for cls in classes:
+            candidates.update(self._by_class.get(cls, ()))
+        if classes and self._by_class_substring:
+            class_text = " ".join(classes)
+            for part, indexes in self._by_class_substring.items():
+                if part in class_text:
+                    candidates.update(indexes)
+        if "id" in attrs:
+            candidates.update(self._by_id.get(attrs["id"], ()))
+        for attr in attrs:
+            candidates.update(self._by_attr.get(attr, ()))
+        candidates.update(self._by_tag.get(name, ()))
+        return candidates
+
+    def _views(self, document: Document):
+        if self.needs_attributes:
+            return document.elements()
+        return document.all_elements()
+
+    def match(self, document: Document) -> List[List[Any]]:
+        """
+        Elements matching each selector, in document order
+        """
+        matches: List[List[Any]] = [[] for _ in self.selectors]
+        for view in self._views(document):
+            _, name, attrs, classes = view
+            for i in self._candidates(name, attrs, classes):
+                if self.selectors[i].matches(document, view):
+                    matches[i].append(view[0])
+        return matches
+
+    def first(self, document: Document) -> Optional[Any]:
+        """
+        First element matching the earliest selector that matches anything,
+        like trying select_one for each selector in turn
+        """
+        best_index, best_element = len(self.selectors), None
+        for view in self._views(document):
+            _, name, attrs, classes = view
+            for i in sorted(self._candidates(name, attrs, classes)):
+                if i >= best_index:
+                    break
+                if self.selectors[i].matches(document, view):
+                    best_index, best_element = i, view[0]
+                    break
+            if best_index == 0:
+                break
+        return best_element
@@ -0,0 +1,110 @@
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from app.config.search_config import SearchConfig
+from app.services.parsers import Document
+from app.services.selectors import SelectorSet
+
+logger = logging.getLogger(__name__)
+
+
+class SiteMatch(NamedTuple):
+    product_name: Optional[str]
+    price_text: Optional[str]
+
+
+class SiteExtractor:
+    """
+    The title and price selectors of one SITE_CONFIGS entry, compiled into a
+    single SelectorSet so both are found in one walk over the page
+    """
+
+    def __init__(self, site_type: str, selectors: Dict[str, str]):
+        self.site_type = site_type
+        self.selectors = [selectors["price"]]
+        if selectors.get("title"):
+            self.selectors.append(selectors["title"])
+        self._selector_set = SelectorSet(self.selectors)
+
+    def extract(self, document: Document) -> SiteMatch:
+        """
+        The first element each selector matches; later price matches are
+        recommendation carousels reusing the same classes
+        """
+        matches = self._selector_set.match(document)
+        texts = [
+            document.element_text(elements[0]).strip() if elements else None
+            for elements in matches
+        ]
+        price_text = texts[0] or None
+        product_name = texts[1] if len(texts) > 1 else None
+        return SiteMatch(product_name or None, price_text)
+
+
+class SiteExtractors:
+    """
+    Registry of site extractors, looked up by URL host. Counts per site how
+    often the targeted selectors found a price, so the selectors can be
+    fixed when a retailer changes its markup and pages start falling back
+    to the generic sweep.
+    """
+
+    _extractors: Dict[str, Optional[SiteExtractor]] = {}
+    _pages: Dict[str, int] = defaultdict(int)
+    _hits: Dict[str, int] = defaultdict(int)
+    _lock = threading.Lock()
+
+    @classmethod
+    def for_url(cls, url: str) -> Optional[SiteExtractor]:
+        if not SearchConfig.SITE_EXTRACTORS:
+            return None
+        site_type = SearchConfig.get_site_type(urlsplit(url).hostname or "")
+        if site_type is None:
+            return None
+        if site_type not in cls._extractors:
+            cls._extractors[site_type] = cls._build(site_type)
+        return cls._extractors[site_type]
+
+    @classmethod
+    def _build(cls, site_type: str) -> Optional[SiteExtractor]:
+        selectors = SearchConfig.get_site_config(site_type).get("selectors", {})
+        if not selectors.get("price"):
+            return None
+        try:
+            return SiteExtractor(site_type, selectors)
+        except ValueError as e:
+            logger.error(f"Invalid selectors for {site_type}, using generic extraction: {str(e)}")
+            return None
+
+    @classmethod
+    def record(cls, site_type: str, hit: bool):
+        with cls._lock:
+            cls._pages[site_type] += 1
+            if hit:
+                cls._hits[site_type] += 1
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, float]]:
+        """
+        Pages each site extractor ran on (pages answered from structured
+        data never reach it) and the share it answered, for this process
+        """
+        with cls._lock:
+            return {
+                site_type: {
+                    "pages": pages,
+                    "hits": cls._hits[site_type],
+                    "hit_rate": round(cls._hits[site_type] / pages, 4),
+                }
+                for site_type, pages in cls._pages.items()
+            }
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._extractors.clear()
+            cls._pages.clear()
+            cls._hits.clear()
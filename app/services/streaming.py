@@ -0,0 +1,138 @@
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.config.search_config import SearchConfig
+from app.services.selectors import Selector
+from app.services.structured import extract_structured_data
+
+# Bytes of the previous chunk searched again, for markers split across chunks
+MARKER_OVERLAP = 64
+# How far before "ld+json" to look for the opening <script of a JSON-LD block
+SCRIPT_TAG_BYTES = 512
+
+
+def site_markers(host: str) -> List[bytes]:
+    """
+    Class or id names marking a configured site's main price element, e.g.
+    ".a-price .a-offscreen" -> a-offscreen
+    """
+    site_type = SearchConfig.get_site_type(host)
+    if site_type is None:
+        return []
+    css = SearchConfig.get_site_config(site_type)["selectors"].get("price")
+    if not css:
+        return []
+
+    markers = []
+    for chain in Selector(css).alternatives:
+        for compound in reversed(chain):
+            token = compound.classes[0] if compound.classes else compound.id
+            if token:
+                markers.append(token.lower().encode())
+                break
+    return markers
+
+
+class PageStream:
+    """
+    Collects a streamed page body and decides when to stop reading it: at the
+    host's byte cap and, with early stopping, once the structured data seen
+    so far gives a confident price or a fixed number of bytes past a
+    configured site's main price element
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_bytes: Optional[int] = None,
+        tail_bytes: Optional[int] = None,
+        early_stop: Optional[bool] = None,
+    ):
+        host = urlsplit(url).hostname or ""
+        self.max_bytes = max_bytes or SearchConfig.get_max_body_bytes(host)
+        self.tail_bytes = SearchConfig.STREAM_TAIL_BYTES if tail_bytes is None else tail_bytes
+        self.early_stop = SearchConfig.STREAM_EARLY_STOP if early_stop is None else early_stop
+        self.markers = site_markers(host)
+        self.buffer = bytearray()
+        self.truncated = False
+        self._stop_at: Optional[int] = None
+        self._body_at: Optional[int] = None
+        self._head_checked = False
+        # Start of the open JSON-LD block's <script tag, and where to look for the next one
+        self._json_ld_at: Optional[int] = None
+        self._json_ld_from = 0
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Add a chunk; True once enough of the page has arrived
+        """
+        start = max(0, len(self.buffer) - MARKER_OVERLAP)
+        self.buffer += chunk
+        if self.early_stop and self._stop_at is None:
+            self._watch(bytes(self.buffer[start:]).lower(), start)
+
+        limit = self.max_bytes if self._stop_at is None else min(self.max_bytes, self._stop_at)
+        if len(self.buffer) >= limit:
+            # Only bytes actually cut make the body truncated; an early stop
+            # at the end of a chunk keeps everything that arrived
+            if len(self.buffer) > limit:
+                del self.buffer[limit:]
+                self.truncated = True
+            return True
+        return False
+
+    def body(self) -> bytes:
+        return bytes(self.buffer)
+
+    def _watch(self, window: bytes, start: int):
+        if SearchConfig.STRUCTURED_FAST_PATH:
+            for block_start, block_end in self._closed_structured_blocks(window, start):
+                if extract_structured_data(bytes(self.buffer[block_start:block_end])).confident:
+                    self._stop_at = len(self.buffer)
+                    return
+
+        if self._body_at is None:
+            position = window.find(b"<body")
+            if position == -1:
+                return
+            self._body_at = start + position
+        # Markers before <body> are style rules or script strings, not the element
+        offset = max(0, self._body_at - start)
+        for marker in self.markers:
+            position = window.find(marker, offset)
+            if position != -1:
+                self._stop_at = start + position + self.tail_bytes
+                return
+
+    def _closed_structured_blocks(self, window: bytes, start: int) -> List[Tuple[int, int]]:
+        """
+        The head and JSON-LD blocks that ended in this window, as buffer
+        offsets. Only these are scanned for structured data, so each part
+        of the page is scanned about once however it arrives.
+        """
+        blocks = []
+        if not self._head_checked:
+            position = window.find(b"</head")
+            if position != -1:
+                self._head_checked = True
+                blocks.append((0, start + position))
+
+        position = max(0, self._json_ld_from - start)
+        while True:
+            if self._json_ld_at is None:
+                found = window.find(b"ld+json", position)
+                if found == -1:
+                    break
+                at = start + found
+                before = bytes(self.buffer[max(0, at - SCRIPT_TAG_BYTES):at]).lower()
+                self._json_ld_at = max(0, at - SCRIPT_TAG_BYTES) + max(0, before.rfind(b"<script"))
+                position = found
+            close = window.find(b"</script", max(position, self._json_ld_at - start))
+            end = window.find(b">", close) if close != -1 else -1
+            if end == -1:
+                break
+            blocks.append((self._json_ld_at, start + end + 1))
+            self._json_ld_at = None
+            self._json_ld_from = start + end + 1
+            position = end + 1
+        return blocks
@@ -0,0 +1,241 @@
+import codecs
+import html
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from app.services.prices import parse_amount as parse_text_amount
+
+logger = logging.getLogger(__name__)
+
+# Raw-byte scanners, run before any DOM is built. They match against a
+# lowercased copy of the page (same byte offsets) so they can use literal
+# prefixes instead of case-insensitive scans; values are sliced from the
+# original bytes.
+JSON_LD_BLOCK = re.compile(
+    rb"<script\b[^>]*\btype\s*=\s*[\"']?application/ld\+json[\"']?[^>]*>(.*?)</script\s*>",
+    re.DOTALL,
+)
+META_TAG = re.compile(rb"<meta\b[^>]*>")
+MICRODATA_PROP = re.compile(rb"itemprop\s*=\s*[\"']?(?:price|pricecurrency|name)[\"'\s>]")
+TAG_ATTRIBUTE = re.compile(
+    rb"([\w:-]+)\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s\"'>]+))"
+)
+TITLE_TAG = re.compile(rb"<title\b[^>]*>(.*?)</title\s*>", re.DOTALL)
+CHARSET = re.compile(rb"<meta\b[^>]*charset\s*=\s*[\"']?([\w-]+)")
+
+# Meta tags carrying a price, and the tag carrying its currency
+PRICE_META = {
+    "product:price:amount": "product:price:currency",
+    "og:price:amount": "og:price:currency",
+}
+
+# JSON-LD types whose prices describe the page's own product
+PRICED_TYPES = {"Product", "Offer", "AggregateOffer", "PriceSpecification", "UnitPriceSpecification"}
+# Listing types; prices under these belong to other products
+LISTING_TYPES = {"ItemList", "BreadcrumbList", "SearchResultsPage", "CollectionPage"}
+
+CURRENCY_SYMBOLS = {"INR": "₹", "USD": "$", "EUR": "€", "GBP": "£", "JPY": "¥", "KRW": "₩", "RUB": "₽"}
+
+
+class StructuredPrice(NamedTuple):
+    raw_text: str
+    value: float
+    currency: str
+    source: str
+
+
+@dataclass
+class StructuredData:
+    prices: List[StructuredPrice] = field(default_factory=list)
+    product_name: Optional[str] = None
+
+    @property
+    def confident(self) -> bool:
+        """
+        At least one positive price with a known currency, enough to skip
+        the heuristic DOM passes
+        """
+        return any(price.value > 0 and price.currency != "UNKNOWN" for price in self.prices)
+
+
+def parse_amount(raw: Any) -> Optional[float]:
+    """
+    Numeric value of a structured price such as 1299, "1299.00",
+    "1,299.00" or "1.299,00"
+    """
+    if isinstance(raw, bool):
+        return None
+    if isinstance(raw, (int, float)):
+        return float(raw)
+    if not isinstance(raw, str):
+        return None
+
+    return parse_text_amount(raw)
+
+
+def _decode(raw: bytes, encoding: str) -> str:
+    return html.unescape(raw.decode(encoding, errors="replace")).strip()
+
+
+def _page_encoding(lower: bytes) -> str:
+    match = CHARSET.search(lower, 0, 2048)
+    if match is not None:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except (LookupError, UnicodeDecodeError):
+            pass
+    return "utf-8"
+
+
+def _attributes(tag: bytes, encoding: str) -> Dict[str, str]:
+    attrs = {}
+    for match in TAG_ATTRIBUTE.finditer(tag):
+        name = match.group(1).decode("ascii", errors="replace").lower()
+        value = next(v for v in match.group(2, 3, 4) if v is not None)
+        attrs.setdefault(name, _decode(value, encoding))
+    return attrs
+
+
+def _types(obj: Dict) -> List[str]:
+    types = obj.get("@type", [])
+    types = types if isinstance(types, list) else [types]
+    # "http://schema.org/Product" and "Product" are the same type
+    return [str(t).rsplit("/", 1)[-1] for t in types]
+
+
+def _json_ld_objects(data: Any, priced: bool = False) -> Iterator[tuple]:
+    """
+    (object, inside a priced type) for every dict in a JSON-LD document,
+    skipping listings of other products
+    """
+    if isinstance(data, list):
+        for item in data:
+            yield from _json_ld_objects(item, priced)
+    elif isinstance(data, dict):
+        types = _types(data)
+        if LISTING_TYPES.intersection(types):
+            return
+        priced = priced or bool(PRICED_TYPES.intersection(types))
+        yield data, priced
+        for value in data.values():
+            if isinstance(value, (dict, list)):
+                yield from _json_ld_objects(value, priced)
+
+
+def _json_ld(content: bytes, lower: bytes, encoding: str, found: StructuredData):
+    if b"ld+json" not in lower:
+        return
+    for block in JSON_LD_BLOCK.finditer(lower):
+        try:
+            raw = content[block.start(1):block.end(1)]
+            data = json.loads(raw.decode(encoding, errors="replace"))
+        except ValueError as e:
+            logger.debug(f"Skipping invalid JSON-LD block: {str(e)}")
+            continue
+
+        for obj, priced in _json_ld_objects(data):
+            if found.product_name is None and "Product" in _types(obj):
+                name = obj.get("name")
+                if isinstance(name, str) and name.strip():
+                    found.product_name = html.unescape(name).strip()
+            if not priced:
+                continue
+            currency = obj.get("priceCurrency") or "UNKNOWN"
+            for key in ("price", "lowPrice"):
+                value = parse_amount(obj.get(key))
+                if value is not None:
+                    found.prices.append(
+                        StructuredPrice(str(obj[key]), value, str(currency), "json_ld")
+                    )
+
+
+def _meta(content: bytes, lower: bytes, encoding: str, found: StructuredData) -> Optional[str]:
+    """
+    Prices from product meta tags; returns og:title for the product name
+    """
+    metas: Dict[str, str] = {}
+    for tag in META_TAG.finditer(lower):
+        attrs = _attributes(content[tag.start():tag.end()], encoding)
+        key = attrs.get("property") or attrs.get("name")
+        if key and "content" in attrs:
+            metas.setdefault(key.lower(), attrs["content"])
+
+    for amount_key, currency_key in PRICE_META.items():
+        value = parse_amount(metas.get(amount_key))
+        if value is not None:
+            currency = metas.get(currency_key) or "UNKNOWN"
+            found.prices.append(
+                StructuredPrice(metas[amount_key], value, currency.upper(), f"meta_{amount_key}")
+            )
+    return metas.get("og:title")
+
+
+def _microdata(content: bytes, lower: bytes, encoding: str, found: StructuredData) -> Optional[str]:
+    """
+    itemprop="price" values given in a content attribute; returns the
+    itemprop="name" content for the product name
+    """
+    amounts, currency, name = [], None, None
+    if b"itemprop" not in lower:
+        return name
+    for prop_match in MICRODATA_PROP.finditer(lower):
+        start = lower.rfind(b"<", 0, prop_match.start())
+        end = lower.find(b">", prop_match.start())
+        if start == -1 or end == -1:
+            continue
+        attrs = _attributes(content[start:end + 1], encoding)
+        prop = attrs.get("itemprop", "").lower()
+        if "content" not in attrs:
+            continue
+        if prop == "price":
+            amounts.append(attrs["content"])
+        elif prop == "pricecurrency" and currency is None:
+            currency = attrs["content"].upper()
+        elif prop == "name" and name is None:
+            name = attrs["content"]
+
+    for raw in amounts:
+        value = parse_amount(raw)
+        if value is not None:
+            found.prices.append(StructuredPrice(raw, value, currency or "UNKNOWN", "microdata"))
+    return name
+
+
+def extract_structured_data(content: bytes) -> StructuredData:
+    """
+    JSON-LD, product meta tags and microdata read straight from the page
+    bytes, without building a DOM
+    """
+    lower = content.lower()
+    encoding = _page_encoding(lower)
+    found = StructuredData()
+
+    _json_ld(content, lower, encoding, found)
+    og_title = _meta(content, lower, encoding, found)
+    microdata_name = _microdata(content, lower, encoding, found)
+
+    if found.product_name is None:
+        found.product_name = microdata_name or og_title
+    if found.product_name is None:
+        title = TITLE_TAG.search(lower)
+        if title is not None:
+            raw = content[title.start(1):title.end(1)]
+            found.product_name = _decode(raw, encoding) or None
+    return found
+
+
+def format_price(price: StructuredPrice) -> str:
+    """
+    Display string for a structured price, in the style of the prices the
+    text patterns find, e.g. ₹1,299.00
+    """
+    amount = f"{price.value:,.2f}"
+    symbol = CURRENCY_SYMBOLS.get(price.currency)
+    if symbol:
+        return f"{symbol}{amount}"
+    if price.currency != "UNKNOWN":
+        return f"{amount} {price.currency}"
+    return amount
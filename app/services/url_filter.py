@@ -0,0 +1,148 @@
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.config.search_config import SearchConfig
+
+# Bodies worth parsing; a response without a Content-Type is given a chance
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+
+class PageRejected(Exception):
+    """
+    Raised when the URL filter drops a URL before or while fetching it
+    """
+
+    def __init__(self, reason: str, detail: str = ""):
+        super().__init__(f"{reason} ({detail})" if detail else reason)
+        self.reason = reason
+
+
+def _host_list(hosts: str) -> Tuple[str, ...]:
+    return tuple(host.strip().lower() for host in hosts.split(",") if host.strip())
+
+
+@lru_cache(maxsize=8)
+def _rules(deny_hosts: str, allow_hosts: str, deny_pattern: str) -> Tuple:
+    return _host_list(deny_hosts), _host_list(allow_hosts), re.compile(deny_pattern, re.IGNORECASE)
+
+
+def _matches(host: str, domains: Tuple[str, ...]) -> bool:
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+class UrlFilter:
+    """
+    Cheap checks that keep doomed URLs away from the fetcher and the
+    parser: host allow/deny lists, URL patterns, hosts that have never
+    yielded prices, then the response headers before the body is read.
+    Keeps the time the skipped pages would have cost.
+    """
+
+    # Per host: pages parsed, pages with prices, URLs skipped for lack of prices
+    _pages: Dict[str, int] = {}
+    _priced: Dict[str, int] = {}
+    _learned_skips: Dict[str, int] = {}
+    # Skipped URLs per reason, and fetch/parse [seconds, count] for the savings estimate
+    _skipped: Dict[str, int] = {}
+    _fetch_time: List[float] = [0.0, 0]
+    _parse_time: List[float] = [0.0, 0]
+    _saved_fetch = 0.0
+    _saved_parse = 0.0
+    _lock = threading.Lock()
+
+    @classmethod
+    def screen_url(cls, url: str):
+        """
+        Raise PageRejected if the URL is not worth fetching
+        """
+        deny_hosts, allow_hosts, deny_pattern = _rules(
+            SearchConfig.URL_DENY_HOSTS, SearchConfig.URL_ALLOW_HOSTS, SearchConfig.URL_DENY_PATTERN
+        )
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        if _matches(host, allow_hosts) or SearchConfig.get_site_type(host):
+            return
+        if _matches(host, deny_hosts):
+            raise PageRejected("denied_host", host)
+        if deny_pattern.search(parts.path):
+            raise PageRejected("url_pattern", parts.path)
+
+        with cls._lock:
+            if cls._priced.get(host) or cls._pages.get(host, 0) < SearchConfig.URL_FILTER_MIN_PAGES:
+                return
+            cls._learned_skips[host] = cls._learned_skips.get(host, 0) + 1
+            # Let the odd URL through so a host that starts listing prices
+            # recovers; 0 or less never probes
+            probe_every = SearchConfig.URL_FILTER_PROBE_EVERY
+            if probe_every <= 0 or cls._learned_skips[host] % probe_every:
+                raise PageRejected("no_prices_on_host", host)
+
+    @classmethod
+    def screen_response(cls, url: str, headers: Mapping[str, str]):
+        """
+        Raise PageRejected if the response headers show a body not worth reading
+        """
+        content_type = headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in HTML_CONTENT_TYPES:
+            raise PageRejected("content_type", content_type)
+        length = headers.get("Content-Length", "")
+        if length.isdigit() and not (
+            SearchConfig.MIN_CONTENT_LENGTH <= int(length) <= SearchConfig.MAX_CONTENT_LENGTH
+        ):
+            raise PageRejected("content_length", length)
+
+    @classmethod
+    def record_fetch(cls, url: str, seconds: float, skipped: Optional[str] = None):
+        """
+        Time spent on a URL; for a skipped one, what the average page would
+        have cost on top of it is counted as saved
+        """
+        with cls._lock:
+            if skipped is None:
+                cls._fetch_time[0] += seconds
+                cls._fetch_time[1] += 1
+                return
+            cls._skipped[skipped] = cls._skipped.get(skipped, 0) + 1
+            if cls._fetch_time[1]:
+                cls._saved_fetch += max(0.0, cls._fetch_time[0] / cls._fetch_time[1] - seconds)
+            if cls._parse_time[1]:
+                cls._saved_parse += cls._parse_time[0] / cls._parse_time[1]
+
+    @classmethod
+    def record_parse(cls, url: str, seconds: float, found_prices: bool):
+        host = (urlsplit(url).hostname or "").lower()
+        with cls._lock:
+            cls._parse_time[0] += seconds
+            cls._parse_time[1] += 1
+            cls._pages[host] = cls._pages.get(host, 0) + 1
+            if found_prices:
+                cls._priced[host] = cls._priced.get(host, 0) + 1
+
+    @classmethod
+    def stats(cls) -> Dict:
+        with cls._lock:
+            return {
+                "skipped": dict(cls._skipped),
+                "hosts_without_prices": sum(
+                    1
+                    for host, pages in cls._pages.items()
+                    if pages >= SearchConfig.URL_FILTER_MIN_PAGES and not cls._priced.get(host)
+                ),
+                "saved_fetch_seconds": round(cls._saved_fetch, 3),
+                "saved_parse_seconds": round(cls._saved_parse, 3),
+            }
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._pages.clear()
+            cls._priced.clear()
+            cls._learned_skips.clear()
+            cls._skipped.clear()
+            cls._fetch_time[:] = [0.0, 0]
+            cls._parse_time[:] = [0.0, 0]
+            cls._saved_fetch = 0.0
+            cls._saved_parse = 0.0
@@ -0,0 +1,214 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from app.config.search_config import SearchConfig
+
+# Upper bounds in seconds, shared by every latency histogram
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PREFIX = "bharatx_"
+OTHER_HOST = "other"
+MAX_LABEL_SETS = 10_000
+
+# What a span is while metrics are off: one shared object, nothing timed
+_DISABLED = nullcontext()
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+# Call sites pass the same few label sets over and over
+_label_sets: Dict[Tuple, Labels] = {}
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    key = tuple(labels.items())
+    normalized = _label_sets.get(key)
+    if normalized is None:
+        normalized = tuple(sorted((name, str(value)) for name, value in key))
+        if len(_label_sets) < MAX_LABEL_SETS:
+            _label_sets[key] = normalized
+    return normalized
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, *extra: Tuple[str, str]) -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in (*labels, *extra)]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name: str, labels: Labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        Metrics._observe(self.name, time.perf_counter() - self.start, self.labels)
+        return False
+
+
+class Metrics:
+    """
+    Process-wide counters and latency histograms for the search pipeline,
+    rendered in the Prometheus text format. Every call returns at once
+    while METRICS_ENABLED is off.
+    """
+
+    _counters: Dict[Tuple[str, Labels], float] = {}
+    # Per histogram: count per bucket (the last one is +Inf), then the sum
+    _histograms: Dict[Tuple[str, Labels], List[float]] = {}
+    # Host name -> its label; at most METRICS_MAX_HOSTS are their own label
+    _hosts: Dict[str, str] = {}
+    _own_hosts = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def inc(cls, name: str, amount: float = 1, **labels):
+        if not SearchConfig.METRICS_ENABLED:
+            return
+        key = (name, _labels(labels))
+        with cls._lock:
+            cls._counters[key] = cls._counters.get(key, 0) + amount
+
+    @classmethod
+    def observe(cls, name: str, seconds: float, **labels):
+        if SearchConfig.METRICS_ENABLED:
+            cls._observe(name, seconds, _labels(labels))
+
+    @classmethod
+    def _observe(cls, name: str, seconds: float, labels: Labels):
+        key = (name, labels)
+        bucket = bisect_left(BUCKETS, seconds)
+        with cls._lock:
+            histogram = cls._histograms.get(key)
+            if histogram is None:
+                histogram = cls._histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            histogram[bucket] += 1
+            histogram[-1] += seconds
+
+    @classmethod
+    def span(cls, stage: str, **labels):
+        """
+        Time a block into the stage_seconds histogram
+        """
+        if not SearchConfig.METRICS_ENABLED:
+            return _DISABLED
+        return _Span("stage_seconds", _labels({"stage": stage, **labels}))
+
+    @classmethod
+    def host(cls, url: str) -> str:
+        """
+        Host label for a URL: the site name for SITE_CONFIGS retailers, the
+        host name for the first METRICS_MAX_HOSTS others, then "other"
+        """
+        if not SearchConfig.METRICS_ENABLED:
+            return ""
+        return cls.host_name(urlsplit(url).hostname or "")
+
+    @classmethod
+    def host_name(cls, host: str) -> str:
+        if not SearchConfig.METRICS_ENABLED:
+            return ""
+        label = cls._hosts.get(host)
+        if label is not None:
+            return label
+        label = SearchConfig.get_site_type(host)
+        with cls._lock:
+            if host in cls._hosts:
+                return cls._hosts[host]
+            if label is None and cls._own_hosts < SearchConfig.METRICS_MAX_HOSTS:
+                label = host
+                cls._own_hosts += 1
+            if label is None:
+                return OTHER_HOST
+            if len(cls._hosts) < MAX_LABEL_SETS:
+                cls._hosts[host] = label
+        return label
+
+    @classmethod
+    def drain(cls) -> Optional[Tuple[Dict, Dict]]:
+        """
+        Take everything recorded so far; parse worker processes hand it to
+        the parent with each result
+        """
+        if not SearchConfig.METRICS_ENABLED:
+            return None
+        with cls._lock:
+            if not cls._counters and not cls._histograms:
+                return None
+            drained = (cls._counters, cls._histograms)
+            cls._counters, cls._histograms = {}, {}
+        return drained
+
+    @classmethod
+    def merge(cls, drained: Tuple[Dict, Dict]):
+        counters, histograms = drained
+        with cls._lock:
+            for key, value in counters.items():
+                cls._counters[key] = cls._counters.get(key, 0) + value
+            for key, values in histograms.items():
+                histogram = cls._histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    histogram[i] += value
+
+    @classmethod
+    def render(cls, gauges: Iterable[Tuple[str, Dict[str, object], float]] = ()) -> str:
+        """
+        Everything recorded, plus gauges read from other components at
+        scrape time, as Prometheus text
+        """
+        with cls._lock:
+            counters = sorted(cls._counters.items())
+            histograms = sorted((key, list(values)) for key, values in cls._histograms.items())
+
+        lines: List[str] = []
+        typed: Set[str] = set()
+
+        def declare(name: str, kind: str):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            declare(f"{PREFIX}{name}_total", "counter")
+            lines.append(f"{PREFIX}{name}_total{_format_labels(labels)} {_number(value)}")
+
+        for (name, labels), values in histograms:
+            metric = f"{PREFIX}{name}"
+            declare(metric, "histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), values[:-1]):
+                cumulative += count
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                lines.append(f"{metric}_bucket{_format_labels(labels, ('le', le))} {_number(cumulative)}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {values[-1]:.6f}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {_number(cumulative)}")
+
+        # Samples of one metric have to be adjacent
+        for name, labels, value in sorted(gauges, key=lambda gauge: gauge[0]):
+            declare(f"{PREFIX}{name}", "gauge")
+            lines.append(f"{PREFIX}{name}{_format_labels(_labels(labels))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._counters.clear()
+            cls._histograms.clear()
+            cls._hosts.clear()
+            cls._own_hosts = 0
@@ -3,6 +3,7 @@ from enum import Enum
 from typing import Any
 from uuid import UUID
 
+import pydantic_core
 from pydantic import BaseModel
 
 primitive = (int, float, str, bool)
@@ -31,3 +32,17 @@ def serialize(obj: Any) -> Any:
         return {k: serialize(v) for k, v in obj.items()}
 
     return {k: serialize(v) for k, v in obj.__dict__.items()}
+
+
+def _fallback(obj: Any) -> Any:
+    # Plain objects go out as their attributes, as serialize() does
+    return obj.__dict__
+
+
+def to_json(obj: Any) -> bytes:
+    """
+    obj as compact UTF-8 JSON in one pass, without building the
+    intermediate dicts of serialize(). Models, enums, datetimes and UUIDs
+    are encoded by pydantic's serializer, anything else by its attributes.
+    """
+    return pydantic_core.to_json(obj, by_alias=False, fallback=_fallback)
@@ -0,0 +1,100 @@
+"""
+One search per item vs one batch, against local stub servers and a fake
+search provider whose results overlap between queries.
+
+    python -m benchmarks.batch --items 60 --queries 15 --hosts 4 --delay 0.2
+
+Items repeat queries (same product, several callers) and queries share
+URLs, the way a catalogue price-check does.
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from app.config.search_config import SearchConfig
+from app.services.batch import BatchSearch
+from app.services.politeness import DomainScheduler
+from app.services.providers import FixtureProvider, SearchProviders
+from app.services.search import shared_service
+from benchmarks.stub_server import StubHandler, StubServer
+
+
+class CountingHandler(StubHandler):
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with CountingHandler.lock:
+            CountingHandler.requests += 1
+        super().do_GET()
+
+
+def fake_provider(servers: list, queries: int, per_query: int, seed: int = 7):
+    rng = random.Random(seed)
+    pool = [
+        servers[i % len(servers)].url(f"/product/{i}")
+        for i in range(queries * per_query // 2)
+    ]
+    return FixtureProvider({f"product {q}": rng.sample(pool, per_query) for q in range(queries)})
+
+
+async def run_per_item(searches: list) -> float:
+    start = time.perf_counter()
+    for service, query, deadline in searches:
+        await service.asearch(query, deadline=deadline)
+    return time.perf_counter() - start
+
+
+async def run_batch(searches: list) -> tuple:
+    batch = BatchSearch()
+    start = time.perf_counter()
+    await batch.run(searches)
+    return time.perf_counter() - start, batch.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=15)
+    parser.add_argument("--per-query", type=int, default=5)
+    parser.add_argument("--hosts", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    # Count real downloads: no page or parse cache between the two runs
+    SearchConfig.PAGE_CACHE_ENABLED = False
+    SearchConfig.PARSE_CACHE_BACKEND = "none"
+    SearchConfig.DEFAULT_DOMAIN_DELAY = 0.05
+    SearchConfig.SERP_CACHE_BACKEND = "none"
+
+    with ExitStack() as stack:
+        servers = [
+            stack.enter_context(
+                StubServer(CountingHandler, delay=args.delay, host=f"127.0.0.{i + 1}")
+            )
+            for i in range(args.hosts)
+        ]
+        SearchProviders.use(fake_provider(servers, args.queries, args.per_query))
+        service = shared_service(1)
+        searches = [(service, f"product {i % args.queries}", None) for i in range(args.items)]
+
+        per_item = asyncio.run(run_per_item(searches))
+        per_item_requests = CountingHandler.requests
+
+        DomainScheduler.reset()
+        CountingHandler.requests = 0
+        batched, stats = asyncio.run(run_batch(searches))
+        batch_requests = CountingHandler.requests
+
+    print(f"items={args.items} queries={args.queries} hosts={args.hosts} delay={args.delay}s")
+    print(f"per item: {per_item:6.2f}s {per_item_requests:5} page requests")
+    print(f"batch:    {batched:6.2f}s {batch_requests:5} page requests {stats}")
+    print(f"speedup:  {per_item / batched:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
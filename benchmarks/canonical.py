@@ -0,0 +1,93 @@
+"""
+Searches whose result lists hold several URLs for the same page (tracking
+parameters, AMP and locale paths, rel=canonical aliases) and the same offer
+under two paths, with canonical dedup and result merging off and on: pages
+fetched, results returned, response size and wall time.
+
+    python -m benchmarks.canonical --searches 40 --delay 0.1
+
+Every search gets 10 URLs for 5 distinct offers. The rel=canonical alias
+only pays off once an earlier search has fetched the page declaring it.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from contextlib import ExitStack
+
+from app.config.search_config import SearchConfig
+from app.services.canonical import CanonicalUrls
+from app.services.http_client import SharedHttpClient
+from app.services.politeness import DomainScheduler
+from app.services.providers import FixtureProvider, SearchProviders
+from app.services.search import shared_service
+from app.utils.serialization import serialize
+from benchmarks.stub_server import StubServer
+
+
+async def run(queries: list) -> tuple:
+    service = shared_service(1)
+    fetched, results, size = 0, 0, 0
+    for query in queries:
+        response = await service.asearch(query, 10)
+        fetched += len(response["pages"])
+        results += len(response["results"])
+        size += len(json.dumps(serialize(response)))
+    await SharedHttpClient.aclose()
+    return fetched, results, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--searches", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=0.1)
+    args = parser.parse_args()
+
+    SearchConfig.PAGE_CACHE_ENABLED = False
+    SearchConfig.PARSE_CACHE_BACKEND = "none"
+    SearchConfig.SERP_CACHE_BACKEND = "none"
+    SearchConfig.DEFAULT_DOMAIN_DELAY = 0
+    SearchConfig.MAX_RESULTS = max(SearchConfig.MAX_RESULTS, 10)
+
+    with ExitStack() as stack:
+        hosts = [stack.enter_context(StubServer(host=f"127.0.0.{i + 1}")) for i in range(3)]
+
+        def urls(search: int) -> list:
+            page = f"/product/{search}?delay={args.delay}&title=Phone%20{search}"
+            popular = search % 5
+            alias = f"?delay={args.delay}&title=Popular%20{popular}&canonical=/item/popular-{popular}"
+            offer = f"?delay={args.delay}&title=Case%20{search}"
+            return [
+                hosts[0].url(page),
+                hosts[0].url(f"{page}&utm_source=google&utm_medium=organic&srsltid=AfmBOo{search}"),
+                hosts[0].url(f"/amp{page}"),
+                hosts[0].url(f"/en-in{page}"),
+                hosts[1].url(f"/item/popular-{popular}"),
+                hosts[1].url(f"/product/popular-{popular}{alias}"),
+                hosts[2].url(f"/product/case-{search}{offer}"),
+                hosts[2].url(f"/gp/case-{search}{offer}"),
+                hosts[2].url(f"/product/charger-{search}?delay={args.delay}"),
+                hosts[1].url(f"/product/cable-{search}?delay={args.delay}"),
+            ]
+
+        queries = [f"phone {s}" for s in range(args.searches)]
+        SearchProviders.use(FixtureProvider({query: urls(s) for s, query in enumerate(queries)}))
+
+        print(f"searches={args.searches} page delay={args.delay}s")
+        for label, enabled in [("dedup off", False), ("dedup on", True)]:
+            SearchConfig.CANONICAL_DEDUP = enabled
+            SearchConfig.MERGE_DUPLICATE_RESULTS = enabled
+            CanonicalUrls.reset()
+            DomainScheduler.reset()
+            start = time.perf_counter()
+            fetched, results, size = asyncio.run(run(queries))
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:9}  {elapsed:5.2f}s  pages fetched {fetched}  results {results}  "
+                f"response bytes {size}  {CanonicalUrls.stats()}"
+            )
+
+
+if __name__ == "__main__":
+    main()
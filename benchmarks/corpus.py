@@ -0,0 +1,197 @@
+"""
+Fixture corpus of product pages for extraction checks and benchmarks.
+
+Synthetic pages are generated deterministically and imitate the markup of
+the retailers we scrape (amazon/flipkart/myntra style classes, JSON-LD,
+microdata, meta tags, inline scripts, recommendation carousels). Saved
+real-world pages can be used instead by passing a directory of *.html files.
+"""
+
+import json
+import random
+from pathlib import Path
+from typing import Dict, Optional
+
+SCRIPT_BLOB = "var config = {" + ", ".join(f'"k{i}": {i}' for i in range(400)) + "};\n"
+
+
+def _inr(value: int) -> str:
+    # Indian grouping, e.g. 129900 -> 1,29,900
+    digits = str(value)
+    if len(digits) <= 3:
+        return digits
+    head, tail = digits[:-3], digits[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    return ",".join(groups + [tail])
+
+
+def _page(title: str, head: str, body: str) -> bytes:
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>{title}</title>{head}"
+        f"<script>{SCRIPT_BLOB * 4}</script>"
+        "</head><body>"
+        '<nav class="nav-main">' + "".join(
+            f'<a href="/c/{i}" class="nav-link">Category {i}</a>' for i in range(120)
+        ) + "</nav>"
+        f"{body}"
+        '<footer class="footer">' + "".join(
+            f"<p class=\"footer-line\">Footer link {i}</p>" for i in range(80)
+        ) + "</footer></body></html>"
+    ).encode()
+
+
+def _carousel(rng: random.Random, item: str, count: int) -> str:
+    return "".join(item.format(i=i, price=rng.randint(199, 99999)) for i in range(count))
+
+
+def amazon_like(rng: random.Random) -> bytes:
+    price = rng.randint(20000, 150000)
+    body = (
+        '<div id="dp-container"><h1><span id="productTitle">Apple iPhone 15 (128 GB)</span></h1>'
+        '<div id="corePrice_feature_div"><span class="a-price" data-a-size="xl">'
+        f'<span class="a-offscreen">₹{_inr(price)}.00</span>'
+        f'<span aria-hidden="true"><span class="a-price-symbol">₹</span>'
+        f'<span class="a-price-whole">{_inr(price)}</span></span></span>'
+        f'<span class="a-price a-text-price" data-a-strike="true"><span class="a-offscreen">M.R.P.: ₹{_inr(price + 9900)}.00</span></span>'
+        "</div></div>"
+        + _carousel(
+            rng,
+            '<div class="a-carousel-card" data-asin="B0{i}"><span class="a-size-base">Similar item {i}</span>'
+            '<span class="a-price"><span class="a-offscreen">₹{price}.00</span></span></div>',
+            60,
+        )
+        + "".join(f'<div class="review"><p>Review text number {i} with no prices at all.</p></div>' for i in range(150))
+    )
+    return _page("Amazon.in: Apple iPhone 15", "", body)
+
+
+def flipkart_like(rng: random.Random) -> bytes:
+    price = rng.randint(20000, 150000)
+    ld = {
+        "@context": "https://schema.org",
+        "@type": "Product",
+        "name": "Samsung Galaxy S24",
+        "offers": {"@type": "Offer", "price": str(price), "priceCurrency": "INR"},
+    }
+    body = (
+        '<div class="_1YokD2"><h1 class="yhB1nd"><span class="B_NuCI">Samsung Galaxy S24 (Onyx Black, 256 GB)</span></h1>'
+        f'<div class="_25b18c"><div class="_30jeq3 _16Jk6d">₹{_inr(price)}</div>'
+        f'<div class="_3I9_wc _2p6lqe">₹{_inr(price + 5000)}</div><div class="_3Ay6Sb"><span>12% off</span></div></div>'
+        "</div>"
+        + _carousel(
+            rng,
+            '<div class="_4ddWXP"><a class="s1Q9rs">Accessory {i}</a><div class="_30jeq3">₹{price}</div></div>',
+            80,
+        )
+    )
+    head = f'<script type="application/ld+json">{json.dumps(ld)}</script>'
+    return _page("Samsung Galaxy S24 - Flipkart", head, body)
+
+
+def myntra_like(rng: random.Random) -> bytes:
+    price = rng.randint(499, 9999)
+    body = (
+        '<div class="pdp-details"><h1 class="pdp-title">Roadster</h1><h1 class="pdp-name">Men Slim Fit Casual Shirt</h1>'
+        f'<p class="pdp-discount-container"><span class="pdp-price"><strong>Rs. {price}</strong></span>'
+        f'<span class="pdp-mrp"><s>Rs. {price * 2}</s></span><span class="pdp-discount">(50% OFF)</span></p>'
+        '<p class="pdp-selling-price"><span class="pdp-vatInfo">inclusive of all taxes</span></p></div>'
+        + _carousel(
+            rng,
+            '<li class="product-base"><div class="product-productMetaInfo"><h3 class="product-brand">Brand {i}</h3>'
+            '<div class="product-price"><span><span class="product-discountedPrice">Rs. {price}</span></span></div></div></li>',
+            50,
+        )
+    )
+    return _page("Buy Roadster Shirt | Myntra", "", body)
+
+
+def us_shop(rng: random.Random) -> bytes:
+    price = rng.randint(100, 3000)
+    body = (
+        '<div itemscope itemtype="https://schema.org/Product"><h1 itemprop="name">Sony WH-1000XM5</h1>'
+        '<div itemprop="offers" itemscope itemtype="https://schema.org/Offer">'
+        f'<span itemprop="price" content="{price}.99">${price}.99</span>'
+        '<meta itemprop="priceCurrency" content="USD"></div>'
+        f'<div class="price-box"><span class="sale-price">$ {price}.99</span> <span class="regular-price">$1,{price:03d}.00 USD</span></div>'
+        f'<p>Price: ${price}.99 with free shipping. Cost: $4.99 for express.</p></div>'
+        + _carousel(
+            rng,
+            '<div class="tile" data-price="{price}.00"><span class="tile-name">Item {i}</span></div>',
+            40,
+        )
+    )
+    head = (
+        f'<meta property="product:price:amount" content="{price}.99">'
+        '<meta property="product:price:currency" content="USD">'
+    )
+    return _page("Sony WH-1000XM5 Headphones", head, body)
+
+
+def eu_shop(rng: random.Random) -> bytes:
+    price = rng.randint(100, 3000)
+    body = (
+        '<main><h1 class="product-title">Bosch Serie 6 Waschmaschine</h1>'
+        f'<div id="product-price" class="current-price">1.{price:03d},00 €</div>'
+        f'<div class="final-price" data-value="{price}.00">EUR {price}.50</div>'
+        f'<div class="listing-price">£{price}.00 GBP</div>'
+        f'<span class="cost-info">Amount: €{price}</span></main>'
+        + _carousel(
+            rng,
+            '<div class="product-tile" data-sale-price="{price}"><span class="item-price">€ {price},99</span></div>',
+            40,
+        )
+    )
+    return _page("Bosch Serie 6", "", body)
+
+
+def tricky(rng: random.Random) -> bytes:
+    body = (
+        "<h1>Edge cases</h1>"
+        '<script TYPE="application/LD+JSON">{"@type": "Product", "offers": [{"price": 10.5, "priceCurrency": "USD"}, {"price": "12.00"}]}</script>'
+        '<script type="application/ld+json">{not valid json ₹999}</script>'
+        '<script type="application/ld+json"></script>'
+        '<div class="Price">$ 55.00</div>'
+        '<div class="priceValue"><div class="price"><span class="price">₹1,23,456</span></div></div>'
+        '<div id="totalAmount" data-amount="INR 2,500">Amount: ₹2,500</div>'
+        '<div class="value" data-cost="">USD 77</div>'
+        '<span class="costly">Rs 88</span><p class="price-note">no digits here</p>'
+        '<meta name="price" content="123"><meta name="PRICE" content="321">'
+        '<div itemtype="https://schema.org/PriceSpecification"><b itemprop="price">£12.34</b></div>'
+        "<p>Rs.1,000 and 2,000 INR and 3,000₹ and 45 USD and GBP 9.99 and 12,345.67€</p>"
+        "<p>Ordinary text without any money in it. " + "Lorem ipsum dolor sit amet. " * 200 + "</p>"
+    )
+    return _page("Tricky page", "", body)
+
+
+def no_prices(rng: random.Random) -> bytes:
+    body = "<article><h1>How to choose a phone</h1>" + "".join(
+        f"<p>Paragraph {i} about cameras, batteries and displays.</p>" for i in range(300)
+    ) + "</article>"
+    return _page("Buying guide", "", body)
+
+
+GENERATORS = [amazon_like, flipkart_like, myntra_like, us_shop, eu_shop, tricky, no_prices]
+
+
+def synthetic_pages(copies: int = 3, seed: int = 7) -> Dict[str, bytes]:
+    rng = random.Random(seed)
+    return {
+        f"{generator.__name__}_{i}.html": generator(rng)
+        for generator in GENERATORS
+        for i in range(copies)
+    }
+
+
+def load_corpus(path: Optional[str] = None, copies: int = 3) -> Dict[str, bytes]:
+    """
+    Pages keyed by name, from a directory of saved *.html files or synthetic
+    """
+    if path is None:
+        return synthetic_pages(copies)
+    return {page.name: page.read_bytes() for page in sorted(Path(path).glob("*.html"))}
@@ -0,0 +1,90 @@
+"""
+Search latency with and without a deadline when some hosts are slow:
+p50/p95/p99 per search and how many results each keeps.
+
+    python -m benchmarks.deadline --searches 40 --deadline 1.5 --slow 0.15
+
+Each search gets 10 URLs; a share of them (--slow) take 2-8 s to answer,
+the rest 0.05-0.3 s. Searches run concurrently against local stub servers.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from contextlib import ExitStack
+
+from app.config.search_config import SearchConfig
+from app.services.http_client import SharedHttpClient
+from app.services.politeness import DomainScheduler
+from app.services.providers import FixtureProvider, SearchProviders
+from app.services.search import PageStatus, shared_service
+from benchmarks.stub_server import StubServer
+
+
+def percentile(values: list, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+async def run(queries: list, deadline: float) -> tuple:
+    service = shared_service(1)
+
+    async def one(query: str) -> tuple:
+        start = time.perf_counter()
+        pages = await service.asearch_pages(query, 10, deadline)
+        results = sum(page.status == PageStatus.COMPLETED for page in pages)
+        timed_out = sum(page.status == PageStatus.TIMED_OUT for page in pages)
+        return time.perf_counter() - start, results, timed_out
+
+    outcomes = await asyncio.gather(*(one(query) for query in queries))
+    await SharedHttpClient.aclose()
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--searches", type=int, default=40)
+    parser.add_argument("--deadline", type=float, default=1.5)
+    parser.add_argument("--slow", type=float, default=0.15)
+    parser.add_argument("--hosts", type=int, default=8)
+    args = parser.parse_args()
+
+    SearchConfig.PAGE_CACHE_ENABLED = False
+    SearchConfig.PARSE_CACHE_BACKEND = "none"
+    SearchConfig.SERP_CACHE_BACKEND = "none"
+    SearchConfig.DEFAULT_DOMAIN_DELAY = 0
+    SearchConfig.MAX_RESULTS = max(SearchConfig.MAX_RESULTS, 10)
+
+    rng = random.Random(7)
+    with ExitStack() as stack:
+        servers = [
+            stack.enter_context(StubServer(host=f"127.0.0.{i + 1}")) for i in range(args.hosts)
+        ]
+
+        def url(search: int, i: int) -> str:
+            delay = rng.uniform(2, 8) if rng.random() < args.slow else rng.uniform(0.05, 0.3)
+            server = servers[(search + i) % len(servers)]
+            return server.url(f"/product/{search}-{i}?delay={delay:.2f}")
+
+        queries = [f"product {s}" for s in range(args.searches)]
+        SearchProviders.use(
+            FixtureProvider({query: [url(s, i) for i in range(10)] for s, query in enumerate(queries)})
+        )
+
+        print(f"searches={args.searches} slow share={args.slow} deadline={args.deadline}s")
+        for label, deadline in [("no deadline", SearchConfig.MAX_SEARCH_DEADLINE), ("deadline", args.deadline)]:
+            DomainScheduler.reset()
+            outcomes = asyncio.run(run(queries, deadline))
+            latencies = [latency for latency, _, _ in outcomes]
+            results = statistics.mean(results for _, results, _ in outcomes)
+            timed_out = sum(timed_out for _, _, timed_out in outcomes)
+            print(
+                f"{label:12} p50 {percentile(latencies, 0.5):5.2f}s p95 {percentile(latencies, 0.95):5.2f}s "
+                f"p99 {percentile(latencies, 0.99):5.2f}s  {results:4.1f} results/search  {timed_out} timed out"
+            )
+
+
+if __name__ == "__main__":
+    main()
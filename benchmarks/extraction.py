@@ -0,0 +1,64 @@
+"""
+Checks the single-pass extractors against the original selector sweeps
+on a page corpus and compares their speed.
+
+    python -m benchmarks.extraction [--corpus DIR] [--rounds 3]
+"""
+
+import argparse
+import time
+
+from bs4 import BeautifulSoup
+
+from benchmarks.corpus import load_corpus
+from benchmarks.legacy_extraction import (
+    legacy_basic_extract_prices,
+    legacy_extract_prices,
+    legacy_extract_product_name,
+)
+from app.services.search import BaseService, SearchService
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="directory of saved *.html pages")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    base_service = BaseService()
+    service = SearchService()
+    pages = load_corpus(args.corpus)
+    soups = {name: BeautifulSoup(body, "html.parser") for name, body in pages.items()}
+
+    checks = [
+        ("v2 prices", service.extract_prices, lambda soup: legacy_extract_prices(service, soup)),
+        ("v1 prices", base_service.extract_prices, legacy_basic_extract_prices),
+        ("product name", base_service.extract_product_name, legacy_extract_product_name),
+    ]
+    mismatches = 0
+    for label, current, legacy in checks:
+        for name, soup in soups.items():
+            if current(soup) != legacy(soup):
+                mismatches += 1
+                print(f"MISMATCH {label} {name}")
+
+    timings = {}
+    for label, extract in [
+        ("legacy", lambda soup: legacy_extract_prices(service, soup)),
+        ("single-pass", service.extract_prices),
+    ]:
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for soup in soups.values():
+                extract(soup)
+        timings[label] = (time.perf_counter() - start) / (args.rounds * len(soups))
+
+    size = sum(len(body) for body in pages.values()) / len(pages)
+    print(f"pages={len(pages)} avg_size={size / 1024:.0f}KiB mismatches={mismatches}")
+    for label, seconds in timings.items():
+        print(f"{label:12} {seconds * 1000:8.2f} ms/page (v2 extract_prices)")
+    print(f"speedup      {timings['legacy'] / timings['single-pass']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Serial vs concurrent page fetching against local stub servers, both
+through AsyncFetcher: one page at a time, then fetch_all.
+
+    python -m benchmarks.fetch_pipeline --pages 20 --hosts 4 --delay 0.3
+
+Each host is a separate stub server on its own loopback address, so the
+per-host politeness delay (DEFAULT_DOMAIN_DELAY) applies per server.
+"""
+
+import argparse
+import asyncio
+import time
+from contextlib import ExitStack
+
+from app.services.fetcher import AsyncFetcher
+from app.services.politeness import DomainScheduler
+from app.services.search import BaseService
+from benchmarks.stub_server import StubServer
+
+
+async def run_serial(service: BaseService, urls: list) -> float:
+    fetcher = AsyncFetcher()
+    client = fetcher.client()
+    start = time.perf_counter()
+    for url in urls:
+        content = await fetcher.fetch(client, url)
+        if content:
+            service.extract_page(url, content)
+    return time.perf_counter() - start
+
+
+async def run_concurrent(service: BaseService, urls: list) -> float:
+    start = time.perf_counter()
+    async for page in AsyncFetcher().fetch_all(urls):
+        if page.content:
+            service.extract_page(page.url, page.content)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.3)
+    parser.add_argument("--hosts", type=int, default=4)
+    args = parser.parse_args()
+
+    service = BaseService()
+    with ExitStack() as stack:
+        servers = [
+            stack.enter_context(StubServer(delay=args.delay, host=f"127.0.0.{i + 1}"))
+            for i in range(args.hosts)
+        ]
+        urls = [
+            servers[i % len(servers)].url(f"/product/{i}") for i in range(args.pages)
+        ]
+
+        serial = asyncio.run(run_serial(service, urls))
+        DomainScheduler.reset()
+        concurrent = asyncio.run(run_concurrent(service, urls))
+
+    print(f"pages={args.pages} hosts={args.hosts} delay={args.delay}s")
+    print(f"serial:     {serial:.2f}s")
+    print(f"concurrent: {concurrent:.2f}s ({serial / concurrent:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
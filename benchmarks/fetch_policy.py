@@ -0,0 +1,99 @@
+"""
+Page fetching against flaky local hosts with the fetch policy off (no
+retries, no circuit breaker, fixed timeouts) and on (retries with backoff,
+per-host breaker, adaptive timeouts, hedging): share of pages fetched and
+round time, where a round fetches one page from every URL of a search.
+
+    python -m benchmarks.fetch_policy --rounds 30 --timeout 3
+
+Hosts: two healthy ones, one with transient 503s, one with a long latency
+tail and one that always takes longer than the timeout.
+"""
+
+import argparse
+import asyncio
+import time
+from contextlib import ExitStack
+
+from app.config.search_config import SearchConfig
+from app.services.fetch_policy import FetchPolicy
+from app.services.fetcher import AsyncFetcher
+from app.services.http_client import SharedHttpClient
+from app.services.politeness import DomainScheduler
+from benchmarks.stub_server import StubHandler, StubServer
+
+POLICY_OFF = {
+    "MAX_RETRIES": 0,
+    "BREAKER_FAILURES": 10 ** 9,
+    "ADAPTIVE_TIMEOUTS": False,
+    "HEDGE_ENABLED": False,
+}
+POLICY_ON = {
+    "MAX_RETRIES": 3,
+    "BREAKER_FAILURES": 5,
+    "ADAPTIVE_TIMEOUTS": True,
+    "HEDGE_ENABLED": True,
+}
+
+
+def percentile(values: list, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+async def run(rounds: list) -> tuple:
+    fetcher = AsyncFetcher(max_concurrency=20, per_host_concurrency=4)
+    durations, fetched, total = [], 0, 0
+    for urls in rounds:
+        start = time.perf_counter()
+        async for page in fetcher.fetch_all(urls):
+            fetched += page.content is not None
+            total += 1
+        durations.append(time.perf_counter() - start)
+    await SharedHttpClient.aclose()
+    return durations, fetched, total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--timeout", type=int, default=3)
+    args = parser.parse_args()
+
+    SearchConfig.PAGE_CACHE_ENABLED = False
+    SearchConfig.DEFAULT_DOMAIN_DELAY = 0
+    SearchConfig.TIMEOUT = args.timeout
+    SearchConfig.RETRY_BACKOFF = 0.05
+    SearchConfig.LATENCY_MIN_SAMPLES = 10
+
+    with ExitStack() as stack:
+        healthy = [stack.enter_context(StubServer(host=f"127.0.0.{i + 1}")) for i in range(2)]
+        flaky = stack.enter_context(StubServer(host="127.0.0.3"))
+        tail = stack.enter_context(StubServer(host="127.0.0.4"))
+        dead = stack.enter_context(StubServer(host="127.0.0.5"))
+
+        print(f"rounds={args.rounds} timeout={args.timeout}s")
+        for label, policy in [("policy off", POLICY_OFF), ("policy on", POLICY_ON)]:
+            for name, value in policy.items():
+                setattr(SearchConfig, name, value)
+            FetchPolicy.reset()
+            DomainScheduler.reset()
+            StubHandler.seen.clear()
+
+            rounds = [
+                [server.url(f"/product/{label}-{r}-{i}?delay=0.05") for server in healthy for i in range(2)]
+                + [flaky.url(f"/product/{label}-{r}-{i}?delay=0.05&fail=0.3") for i in range(2)]
+                + [tail.url(f"/product/{label}-{r}-{i}?delay=0.05&slow=0.1&slow_delay=2") for i in range(2)]
+                + [dead.url(f"/product/{label}-{r}?delay={args.timeout + 2}")]
+                for r in range(args.rounds)
+            ]
+            durations, fetched, total = asyncio.run(run(rounds))
+            print(
+                f"{label:10}  fetched {fetched}/{total} ({fetched / total:.0%})  round p50 "
+                f"{percentile(durations, 0.5):5.2f}s p95 {percentile(durations, 0.95):5.2f}s "
+                f"total {sum(durations):6.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
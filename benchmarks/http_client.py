@@ -0,0 +1,87 @@
+"""
+A new HTTP client per search vs the shared pooled client, counting the TCP
+connections the stub server accepts.
+
+    python -m benchmarks.http_client --searches 20 --pages 5
+
+The stub speaks HTTP/1.1 keep-alive here and is addressed as localhost, so
+name resolution and connection setup are part of each new connection.
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+import httpx
+
+from app.config.search_config import SearchConfig
+from app.services.fetcher import AsyncFetcher
+from app.services.http_client import SharedHttpClient
+from app.services.politeness import DomainScheduler
+from benchmarks.stub_server import StubHandler, StubServer
+
+
+class KeepAliveHandler(StubHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        with KeepAliveHandler.lock:
+            KeepAliveHandler.connections += 1
+        super().setup()
+
+
+class PerSearchClientFetcher(AsyncFetcher):
+    """
+    The previous behaviour: every search opened and closed its own client
+    """
+
+    async def fetch_all(self, urls):
+        async with httpx.AsyncClient(
+            headers=SearchConfig.DEFAULT_HEADERS, timeout=self.timeout, follow_redirects=True
+        ) as client:
+            self.client = lambda: client
+            async for page in super().fetch_all(urls):
+                yield page
+
+
+async def run(fetcher_class: type, urls_per_search: list) -> float:
+    start = time.perf_counter()
+    for urls in urls_per_search:
+        async for _ in fetcher_class().fetch_all(urls):
+            pass
+    elapsed = time.perf_counter() - start
+    await SharedHttpClient.aclose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--searches", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5)
+    args = parser.parse_args()
+
+    SearchConfig.PAGE_CACHE_ENABLED = False
+    SearchConfig.DEFAULT_DOMAIN_DELAY = 0
+
+    with StubServer(KeepAliveHandler) as server:
+        port = server.httpd.server_address[1]
+        urls_per_search = [
+            [f"http://localhost:{port}/product/{s}-{p}" for p in range(args.pages)]
+            for s in range(args.searches)
+        ]
+        print(f"searches={args.searches} pages/search={args.pages}")
+        for label, fetcher_class in [
+            ("client per search", PerSearchClientFetcher),
+            ("shared client", AsyncFetcher),
+        ]:
+            DomainScheduler.reset()
+            KeepAliveHandler.connections = 0
+            elapsed = asyncio.run(run(fetcher_class, urls_per_search))
+            print(f"{label:18} {elapsed:6.2f}s {KeepAliveHandler.connections:4} connections")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Frozen copies of the extract_prices sweeps as they were before the
+single-pass rewrite, kept as the reference for equivalence checks and
+benchmarks. Do not optimize.
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from app.config.search_config import SearchConfig
+from app.services.search import SearchService
+
+logger = logging.getLogger(__name__)
+
+
+def legacy_extract_prices(self: SearchService, soup: BeautifulSoup) -> List[Dict]:
+    prices = []
+    
+    price_patterns = [
+        # Indian Rupees
+        r'₹\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        r'Rs\.?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        r'INR\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*₹',
+        r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*Rs\.?',
+        r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*INR',
+        
+        # US Dollars
+        r'\$\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        r'USD\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*USD',
+        
+        # Euros
+        r'€\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        r'EUR\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*€',
+        
+        # British Pounds
+        r'£\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        r'GBP\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        
+        # Generic price patterns
+        r'Price:\s*([₹$€£¥₩₽¢₨₪₫₦₡₵₴₸₲₱₾₺₼₿]?\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        r'Cost:\s*([₹$€£¥₩₽¢₨₪₫₦₡₵₴₸₲₱₾₺₼₿]?\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        r'Amount:\s*([₹$€£¥₩₽¢₨₪₫₦₡₵₴₸₲₱₾₺₼₿]?\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+    ]
+    
+    price_selectors = [
+        # Common price classes
+        '.price', '.cost', '.amount', '.value',
+        '[class*="price"]', '[class*="cost"]', '[class*="amount"]', '[class*="value"]',
+        '[id*="price"]', '[id*="cost"]', '[id*="amount"]',
+        
+        # E-commerce specific
+        '.sale-price', '.regular-price', '.current-price', '.final-price',
+        '.product-price', '.item-price', '.listing-price',
+        '[class*="sale-price"]', '[class*="regular-price"]', '[class*="current-price"]',
+        
+        # Schema.org microdata
+        '[itemtype*="Product"] [itemprop="price"]',
+        '[itemtype*="Offer"] [itemprop="price"]',
+        '[itemtype*="PriceSpecification"] [itemprop="price"]',
+        
+        # Data attributes
+        '[data-price]', '[data-cost]', '[data-amount]', '[data-value]',
+        '[data-original-price]', '[data-sale-price]', '[data-current-price]',
+        
+        # Specific tags
+        'span[class*="price"]', 'div[class*="price"]', 'p[class*="price"]',
+        'span[class*="cost"]', 'div[class*="cost"]', 'p[class*="cost"]',
+        'meta[property="product:price:amount"]',
+        'meta[name="price"]',
+        
+        # JSON-LD structured data
+        'script[type="application/ld+json"]'
+    ]
+    
+    text_content = soup.get_text()
+    for pattern in price_patterns:
+        matches = re.findall(pattern, text_content, re.IGNORECASE)
+        for match in matches:
+            normalized = self.normalize_price(match)
+            if normalized:
+                prices.append({
+                    'raw_text': match,
+                    'value': normalized[0],
+                    'currency': normalized[1],
+                    'source': 'text_content'
+                })
+    
+    for selector in price_selectors:
+        try:
+            elements = soup.select(selector)
+            for element in elements:
+                if element.name == 'script' and element.get('type') == 'application/ld+json':
+                    try:
+                        import json
+                        data = json.loads(element.string)
+                        price_data = self.extract_price_from_json_ld(data)
+                        if price_data:
+                            prices.extend(price_data)
+                        continue
+                    except:
+                        pass
+                
+                # Check data attributes first
+                for attr in ['data-price', 'data-cost', 'data-amount', 'data-value']:
+                    if element.get(attr):
+                        normalized = self.normalize_price(element.get(attr))
+                        if normalized:
+                            prices.append({
+                                'raw_text': element.get(attr),
+                                'value': normalized[0],
+                                'currency': normalized[1],
+                                'source': f'attribute_{attr}'
+                            })
+                
+                # Check element text
+                text = element.get_text(strip=True)
+                if text:
+                    for pattern in price_patterns:
+                        matches = re.findall(pattern, text, re.IGNORECASE)
+                        for match in matches:
+                            normalized = self.normalize_price(match)
+                            if normalized:
+                                prices.append({
+                                    'raw_text': match,
+                                    'value': normalized[0],
+                                    'currency': normalized[1],
+                                    'source': f'element_{selector}'
+                                })
+        except Exception as e:
+            logger.debug(f"Error processing selector {selector}: {str(e)}")
+    
+    unique_prices = []
+    seen_values = set()
+    
+    for price in prices:
+        price_key = (price['value'], price['currency'])
+        if price_key not in seen_values:
+            unique_prices.append(price)
+            seen_values.add(price_key)
+    
+    unique_prices.sort(key=lambda x: x['value'])
+    
+    return unique_prices
+
+
+def legacy_basic_extract_prices(soup: BeautifulSoup) -> List[str]:
+    """BaseService.extract_prices before the single-walk rewrite"""
+    prices = []
+
+    price_patterns = SearchConfig.get_price_patterns()
+
+    text_content = soup.get_text()
+    for pattern in price_patterns:
+        matches = re.findall(pattern, text_content, re.IGNORECASE)
+        prices.extend(matches)
+
+    price_selectors = [
+        '[class*="price"]',
+        '[class*="cost"]',
+        '[class*="amount"]',
+        '[id*="price"]',
+        "[data-price]",
+        ".price",
+        ".cost",
+        ".amount",
+        'span[class*="price"]',
+        'div[class*="price"]',
+        'p[class*="price"]',
+    ]
+
+    for selector in price_selectors:
+        elements = soup.select(selector)
+        for element in elements:
+            text = element.get_text(strip=True)
+            for pattern in price_patterns:
+                matches = re.findall(pattern, text, re.IGNORECASE)
+                prices.extend(matches)
+
+    unique_prices = []
+    seen = set()
+    for price in prices:
+        if price not in seen:
+            unique_prices.append(price)
+            seen.add(price)
+
+    return unique_prices
+
+
+def legacy_extract_product_name(soup: BeautifulSoup) -> Optional[str]:
+    """BaseService.extract_product_name before the single-walk rewrite"""
+    title_selectors = ["h1", "title", '[class*="title"]', '[class*="name"]']
+    for selector in title_selectors:
+        element = soup.select_one(selector)
+        if element:
+            return element.get_text(strip=True)
+    return None
+
+
+def legacy_normalize_price(price_text: str) -> Optional[Tuple[float, str]]:
+    """SearchService.normalize_price before the shared prices module"""
+    if not price_text:
+        return None
+    
+    # Clean the price text
+    cleaned_price = re.sub(r'[^\d.,₹$€£¥₩₽¢₨₪₫₦₡₵₴₸₲₱₾₺₼₿\s-]', '', price_text)
+    
+    # Currency patterns with their symbols
+    currency_patterns = {
+        'INR': r'[₹]|rs\.?|rupees?|inr',
+        'USD': r'[\$]|usd|dollars?',
+        'EUR': r'[€]|eur|euros?',
+        'GBP': r'[£]|gbp|pounds?',
+        'JPY': r'[¥]|jpy|yen',
+        'CNY': r'[¥]|cny|yuan',
+        'KRW': r'[₩]|krw|won',
+        'RUB': r'[₽]|rub|rubles?',
+    }
+    
+    # Find currency
+    currency = None
+    for curr_code, pattern in currency_patterns.items():
+        if re.search(pattern, cleaned_price.lower()):
+            currency = curr_code
+            break
+    
+    # Extract numeric value
+    numeric_match = re.search(r'(\d{1,3}(?:[,\s]\d{3})*(?:\.\d{2})?|\d+(?:\.\d{2})?)', cleaned_price)
+    if numeric_match:
+        numeric_str = numeric_match.group(1)
+        # Remove thousand separators
+        numeric_str = re.sub(r'[,\s]', '', numeric_str)
+        try:
+            value = float(numeric_str)
+            return (value, currency or 'UNKNOWN')
+        except ValueError:
+            pass
+    
+    return None
@@ -0,0 +1,347 @@
+"""
+Open-loop load test of the real FastAPI app on one uvicorn worker, with
+the search provider and the page fetches faked in-process.
+
+    python -m benchmarks.load --rps 2,5,10,20,40 --duration 20
+    python -m benchmarks.load --rps 10 --duration 60 --page-latency 0.4 --tail 0.05 --report load.json
+
+The app runs in a subprocess under uvicorn with FakeSearchProvider in
+place of the provider chain and FakePageTransport in place of the network.
+SERPs and pages are deterministic per query and URL, and their latency is
+tunable. Requests go through main:app, auth_required, SearchVersion, the
+search pipeline and APIResponse unchanged.
+
+Requests are sent on schedule at each target rate for --duration seconds,
+whether or not earlier ones have finished (open loop). Each rate reports
+throughput, error rates by kind, latency percentiles and the server's
+event-loop lag, which is sampled every 50 ms inside the worker. A rate is
+marked saturated once errors pass --max-errors or p99 passes --max-p99.
+The generator shares the machine with the worker; send slip shows how
+late it started requests.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import random
+import socket
+import time
+import zlib
+from multiprocessing import get_context
+from typing import AsyncIterator, Dict, List
+
+import httpx
+
+from app.config.search_config import SearchConfig
+from app.services.providers import SearchProvider
+from benchmarks.corpus import synthetic_pages
+
+LOAD_USER = "load"
+LOAD_PASSWORD = "load-test"
+RETAILER_HOSTS = {
+    "www.amazon.in": "amazon_like",
+    "www.flipkart.com": "flipkart_like",
+    "www.myntra.com": "myntra_like",
+}
+OTHER_PAGES = ["us_shop", "eu_shop", "tricky", "no_prices"]
+LAG_INTERVAL = 0.05
+
+
+def _seed(text: str) -> int:
+    # Stable across processes, unlike hash()
+    return zlib.crc32(text.encode())
+
+
+class FakeSearchProvider(SearchProvider):
+    """
+    The same result URLs for the same query every time, spread over the
+    retailer hosts and a set of numbered shop hosts
+    """
+
+    name = "fake"
+
+    def __init__(self, results: int = 10, latency: float = 0.3, hosts: int = 40):
+        self.results = results
+        self.latency = latency
+        self.hosts = list(RETAILER_HOSTS) + [f"shop{i}.example.com" for i in range(hosts)]
+
+    async def aiter_urls(self, query: str, num_results: int) -> AsyncIterator[str]:
+        rng = random.Random(_seed(query))
+        await asyncio.sleep(self.latency * rng.uniform(0.5, 1.5))
+        for k in range(min(self.results, num_results)):
+            yield f"https://{rng.choice(self.hosts)}/p/{_seed(query)}-{k}"
+
+
+class FakePageTransport(httpx.AsyncBaseTransport):
+    """
+    Answers every request with a fixture page after a simulated latency:
+    log-normal around latency, plus tail_latency for a tail share of
+    requests, and a 503 for a fail share
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        tail: float = 0.0,
+        tail_latency: float = 2.0,
+        fail: float = 0.0,
+        seed: int = 7,
+    ):
+        self.latency = latency
+        self.tail = tail
+        self.tail_latency = tail_latency
+        self.fail = fail
+        self.rng = random.Random(seed)
+        self.pages: Dict[str, List[bytes]] = {}
+        for name, body in synthetic_pages(3, seed).items():
+            self.pages.setdefault(name.rsplit("_", 1)[0], []).append(body)
+
+    def page(self, url: httpx.URL) -> bytes:
+        rng = random.Random(_seed(str(url)))
+        kind = RETAILER_HOSTS.get(url.host) or rng.choice(OTHER_PAGES)
+        return rng.choice(self.pages[kind])
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        delay = self.latency * self.rng.lognormvariate(0, 0.5)
+        if self.rng.random() < self.tail:
+            delay += self.tail_latency
+        await asyncio.sleep(delay)
+        if self.rng.random() < self.fail:
+            return httpx.Response(503, request=request)
+        return httpx.Response(
+            200,
+            headers={"Content-Type": "text/html; charset=utf-8"},
+            content=self.page(request.url),
+            request=request,
+        )
+
+
+class LoopLag:
+    """
+    How late the worker's event loop wakes up from a LAG_INTERVAL sleep
+    """
+
+    samples: List[float] = []
+
+    @classmethod
+    async def run(cls):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            cls.samples.append(loop.time() - start - LAG_INTERVAL)
+
+    @classmethod
+    async def drain(cls) -> Dict:
+        samples, cls.samples = cls.samples, []
+        return {
+            "p50_ms": round(percentile(samples, 0.5) * 1000, 1),
+            "p99_ms": round(percentile(samples, 0.99) * 1000, 1),
+            "max_ms": round(max(samples, default=0) * 1000, 1),
+        }
+
+
+def percentile(values: list, share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def serve(options: Dict):
+    """
+    The app under uvicorn with the fakes swapped in, in a process of its own
+    """
+    os.environ["AUTH"] = json.dumps({"users": {LOAD_USER: LOAD_PASSWORD}})
+    from app.config.config import Config
+
+    Config.AUTH = os.environ["AUTH"]
+    import uvicorn
+
+    from app.services.http_client import SharedHttpClient
+    from app.services.providers import SearchProviders
+    from main import app
+
+    logging.disable(logging.WARNING)
+    if not options["cache"]:
+        SearchConfig.PAGE_CACHE_ENABLED = False
+        SearchConfig.PARSE_CACHE_BACKEND = "none"
+        SearchConfig.SERP_CACHE_BACKEND = "none"
+    if not options["politeness"]:
+        SearchConfig.DEFAULT_DOMAIN_DELAY = 0
+        for site in SearchConfig.SITE_CONFIGS.values():
+            site["delay"] = 0
+    SearchProviders.use(
+        FakeSearchProvider(options["results"], options["serp_latency"], options["hosts"])
+    )
+    SharedHttpClient.use(
+        FakePageTransport(
+            options["page_latency"], options["tail"], options["tail_latency"], options["fail"]
+        )
+    )
+    # Only for the harness, next to the app's own routes
+    app.add_api_route("/_load/lag/", LoopLag.drain, methods=["GET"])
+
+    async def run():
+        lag = asyncio.ensure_future(LoopLag.run())
+        config = uvicorn.Config(
+            app, host="127.0.0.1", port=options["port"], log_level="error", access_log=False
+        )
+        try:
+            await uvicorn.Server(config).serve()
+        finally:
+            lag.cancel()
+
+    asyncio.run(run())
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 60):
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        try:
+            if (await client.get("/api/health/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("The app did not start")
+
+
+async def run_rate(client: httpx.AsyncClient, rps: float, args, offset: int) -> Dict:
+    """
+    Requests at rps for the duration, each started on schedule
+    """
+    authorization = "Basic " + base64.b64encode(f"{LOAD_USER}:{LOAD_PASSWORD}".encode()).decode()
+    rng = random.Random(offset)
+    outcomes: List[tuple] = []
+
+    async def one(i: int):
+        # A share of requests repeat popular queries, which the result cache answers
+        query = f"hot product {rng.randrange(10)}" if rng.random() < args.repeat else f"product {offset + i}"
+        body = {"query": query, "country": "IN", "version": args.version}
+        if args.deadline:
+            body["deadline"] = args.deadline
+        start = time.perf_counter()
+        try:
+            response = await client.post(
+                "/api/search/", json=body, headers={"Authorization": authorization}
+            )
+            outcome = "ok" if response.status_code == 200 else f"http_{response.status_code}"
+        except httpx.TimeoutException:
+            outcome = "timeout"
+        except httpx.TransportError:
+            outcome = "connection"
+        outcomes.append((outcome, time.perf_counter() - start))
+
+    loop = asyncio.get_running_loop()
+    total = int(rps * args.duration)
+    tasks = []
+    slip = 0.0
+    start = loop.time()
+    for i in range(total):
+        due = start + i / rps
+        if due > loop.time():
+            await asyncio.sleep(due - loop.time())
+        slip = max(slip, loop.time() - due)
+        tasks.append(asyncio.ensure_future(one(i)))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+
+    lag = (await client.get("/_load/lag/")).json()
+    latencies = [seconds for outcome, seconds in outcomes if outcome == "ok"]
+    errors: Dict[str, int] = {}
+    for outcome, _ in outcomes:
+        if outcome != "ok":
+            errors[outcome] = errors.get(outcome, 0) + 1
+    return {
+        "target_rps": rps,
+        "requests": total,
+        "ok": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "error_rate": round(sum(errors.values()) / max(total, 1), 4),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "p90_ms": round(percentile(latencies, 0.9) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(max(latencies, default=0) * 1000, 1),
+        "loop_lag": lag,
+        "send_slip_ms": round(slip * 1000, 1),
+    }
+
+
+async def drive(args, port: int) -> List[Dict]:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}", timeout=args.timeout, limits=limits
+    ) as client:
+        await wait_until_up(client)
+        # Warm up: the first search builds services, the parse pool and the client
+        await run_rate(client, 1, argparse.Namespace(**{**vars(args), "duration": 2}), 10**6)
+
+        rates = []
+        for step, rps in enumerate(float(rate) for rate in args.rps.split(",")):
+            rate = await run_rate(client, rps, args, step * 10**5)
+            saturated = rate["error_rate"] > args.max_errors or rate["p99_ms"] > args.max_p99 * 1000
+            rate["saturated"] = saturated
+            rates.append(rate)
+            print(
+                f"{rps:6.1f} rps  {rate['throughput_rps']:6.2f} ok/s  errors {rate['error_rate']:6.1%} "
+                f"{rate['errors'] or ''}  p50 {rate['p50_ms']:7.1f}ms  p90 {rate['p90_ms']:7.1f}ms  "
+                f"p99 {rate['p99_ms']:7.1f}ms  loop lag p99 {rate['loop_lag']['p99_ms']:6.1f}ms "
+                f"max {rate['loop_lag']['max_ms']:6.1f}ms  send slip {rate['send_slip_ms']:.0f}ms"
+                + ("  SATURATED" if saturated else "")
+            )
+        return rates
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rps", default="2,5,10,20")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--version", type=int, default=1)
+    parser.add_argument("--deadline", type=float)
+    parser.add_argument("--repeat", type=float, default=0.0, help="share of requests for popular queries")
+    parser.add_argument("--results", type=int, default=10)
+    parser.add_argument("--hosts", type=int, default=40)
+    parser.add_argument("--serp-latency", type=float, default=0.3)
+    parser.add_argument("--page-latency", type=float, default=0.2)
+    parser.add_argument("--tail", type=float, default=0.0)
+    parser.add_argument("--tail-latency", type=float, default=2.0)
+    parser.add_argument("--fail", type=float, default=0.0)
+    parser.add_argument("--cache", action="store_true", help="keep page, parse and SERP caches on")
+    parser.add_argument("--politeness", action="store_true")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--max-errors", type=float, default=0.01)
+    parser.add_argument("--max-p99", type=float, default=10, help="seconds")
+    parser.add_argument("--report", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    port = free_port()
+    options = {**vars(args), "port": port}
+    server = get_context("spawn").Process(target=serve, args=(options,), daemon=True)
+    server.start()
+    try:
+        rates = asyncio.run(drive(args, port))
+    finally:
+        server.terminate()
+        server.join(10)
+
+    saturated = next((rate["target_rps"] for rate in rates if rate["saturated"]), None)
+    print(f"saturated at {saturated} rps" if saturated else "not saturated at the rates tried")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"settings": vars(args), "rates": rates, "saturated_at": saturated}, f, indent=2)
+        print(f"report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
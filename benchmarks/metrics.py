@@ -0,0 +1,95 @@
+"""
+Cost of the pipeline metrics: the per-call price of a span, a counter and
+a host label with METRICS_ENABLED off and on, then the same searches
+against the stub server with metrics off and on, and the size and render
+time of the resulting /api/metrics/ page.
+
+    python -m benchmarks.metrics --calls 200000 --searches 40
+
+Search times are dominated by the stub's page delay; the per-call numbers
+show what instrumentation adds to each page.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from app.config.search_config import SearchConfig
+from app.services.http_client import SharedHttpClient
+from app.services.politeness import DomainScheduler
+from app.services.providers import FixtureProvider, SearchProviders
+from app.services.search import shared_service
+from app.utils.metrics import Metrics
+from benchmarks.stub_server import StubServer
+
+URL = "https://www.example.com/product/1"
+
+
+def per_call(calls: int) -> float:
+    """
+    Nanoseconds for one span, one counter and one host label
+    """
+    start = time.perf_counter()
+    for _ in range(calls):
+        host = Metrics.host(URL)
+        with Metrics.span("fetch", host=host):
+            pass
+        Metrics.inc("fetched_bytes", 1024, host=host)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+async def run(queries: list) -> int:
+    service = shared_service(1)
+    results = 0
+    for query in queries:
+        response = await service.asearch(query, 10)
+        results += len(response["results"])
+    await SharedHttpClient.aclose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--searches", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    SearchConfig.PAGE_CACHE_ENABLED = False
+    SearchConfig.PARSE_CACHE_BACKEND = "none"
+    SearchConfig.SERP_CACHE_BACKEND = "none"
+    SearchConfig.DEFAULT_DOMAIN_DELAY = 0
+    SearchConfig.MAX_RESULTS = max(SearchConfig.MAX_RESULTS, 10)
+
+    for label, enabled in [("metrics off", False), ("metrics on", True)]:
+        SearchConfig.METRICS_ENABLED = enabled
+        Metrics.reset()
+        print(f"{label:11}  {per_call(args.calls):6.0f} ns per span + counter + host label")
+
+    with StubServer(host="127.0.0.1") as server:
+        queries = [f"phone {s}" for s in range(args.searches)]
+        SearchProviders.use(FixtureProvider({
+            query: [server.url(f"/product/{s}-{i}?delay={args.delay}") for i in range(10)]
+            for s, query in enumerate(queries)
+        }))
+
+        print(f"searches={args.searches} page delay={args.delay}s")
+        for label, enabled in [("metrics off", False), ("metrics on", True)]:
+            SearchConfig.METRICS_ENABLED = enabled
+            Metrics.reset()
+            DomainScheduler.reset()
+            start = time.perf_counter()
+            results = asyncio.run(run(queries))
+            elapsed = time.perf_counter() - start
+            print(f"{label:11}  {elapsed:5.2f}s  results {results}")
+
+    start = time.perf_counter()
+    page = Metrics.render()
+    elapsed = time.perf_counter() - start
+    print(f"render       {elapsed * 1000:5.2f}ms  {len(page.splitlines())} lines  {len(page)} bytes")
+
+
+if __name__ == "__main__":
+    main()
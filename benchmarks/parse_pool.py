@@ -0,0 +1,75 @@
+"""
+Extraction throughput of the parse pool on the fixture corpus: the thread
+pool vs worker processes at growing pool sizes, pages per second and the
+speed-up over a single process.
+
+    python -m benchmarks.parse_pool [--corpus DIR] [--copies 20] [--workers 1,2,4,8]
+
+Each page is extracted with a URL of its own and the parse cache off, so
+every task parses. Process counts beyond the machine's cores will not
+scale; the core count is printed with the results.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from app.config.search_config import SearchConfig
+from app.services.executors import SearchExecutor
+from app.services.search import aextract_page
+from benchmarks.corpus import load_corpus
+
+
+async def extract_all(pages: list, version: int) -> int:
+    results = await asyncio.gather(
+        *(aextract_page(version, f"https://shop.example/{name}", content) for name, content in pages)
+    )
+    return sum(result is not None for result in results)
+
+
+def run(pages: list, version: int, processes: bool, workers: int) -> tuple:
+    SearchConfig.SEARCH_PARSE_USE_PROCESSES = processes
+    SearchConfig.SEARCH_PARSE_WORKERS = workers
+    SearchExecutor.shutdown()
+    # Warm the pool up so worker start-up is not timed
+    asyncio.run(extract_all(pages[:workers * 2], version))
+    start = time.perf_counter()
+    found = asyncio.run(extract_all(pages, version))
+    elapsed = time.perf_counter() - start
+    SearchExecutor.shutdown()
+    return len(pages) / elapsed, found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="directory of saved *.html pages")
+    parser.add_argument("--copies", type=int, default=20)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--version", type=int, default=2)
+    args = parser.parse_args()
+
+    # Worker processes read their settings from the environment
+    os.environ["PARSE_CACHE_BACKEND"] = SearchConfig.PARSE_CACHE_BACKEND = "none"
+    logging.disable(logging.WARNING)
+
+    pages = list(load_corpus(args.corpus, args.copies).items())
+    counts = [int(count) for count in args.workers.split(",")]
+    print(f"{len(pages)} pages, v{args.version}, {os.cpu_count()} cores")
+
+    rate, found = run(pages, args.version, False, counts[-1])
+    print(f"threads x{counts[-1]:<3}  {rate:7.1f} pages/s  {found} with prices")
+    baseline = None
+    for workers in counts:
+        rate, found = run(pages, args.version, True, workers)
+        baseline = baseline or rate
+        print(
+            f"processes x{workers:<2} {rate:7.1f} pages/s  {found} with prices  "
+            f"speed-up {rate / baseline:4.2f}"
+        )
+    print(f"parse pool {SearchExecutor.stats()}")
+
+
+if __name__ == "__main__":
+    main()
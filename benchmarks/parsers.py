@@ -0,0 +1,64 @@
+"""
+Compares the parser backends on a page corpus: parse and extraction time
+per page, and whether each backend extracts the same results as html.parser.
+
+    python -m benchmarks.parsers [--corpus DIR] [--rounds 3]
+"""
+
+import argparse
+import time
+
+from benchmarks.corpus import load_corpus
+from app.services.parsers import PARSER_BACKENDS, parse_document
+from app.services.search import BaseService, SearchService
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="directory of saved *.html pages")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    base_service = BaseService()
+    service = SearchService()
+    pages = load_corpus(args.corpus)
+
+    def extract(document):
+        return (
+            base_service.extract_product_name(document),
+            base_service.extract_prices(document),
+            service.extract_prices(document),
+        )
+
+    reference = {
+        name: extract(parse_document(body, "html.parser")) for name, body in pages.items()
+    }
+
+    print(f"pages={len(pages)}")
+    print(f"{'backend':12} {'parse':>10} {'extract':>10} {'total':>10} {'differs':>8}")
+    for backend in PARSER_BACKENDS:
+        differs = sum(
+            extract(parse_document(body, backend)) != reference[name]
+            for name, body in pages.items()
+        )
+
+        parse_seconds = extract_seconds = 0.0
+        for _ in range(args.rounds):
+            for body in pages.values():
+                start = time.perf_counter()
+                document = parse_document(body, backend)
+                parsed = time.perf_counter()
+                extract(document)
+                parse_seconds += parsed - start
+                extract_seconds += time.perf_counter() - parsed
+
+        count = args.rounds * len(pages)
+        print(
+            f"{backend:12} {parse_seconds / count * 1000:8.2f}ms "
+            f"{extract_seconds / count * 1000:8.2f}ms "
+            f"{(parse_seconds + extract_seconds) / count * 1000:8.2f}ms {differs:8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
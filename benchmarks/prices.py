@@ -0,0 +1,80 @@
+"""
+Price normalization: the shared prices module vs the previous per-call
+regex version, over every price string the extractors pull from the corpus.
+
+    python -m benchmarks.prices [--corpus DIR] [--rounds 5]
+
+Strings are the pattern matches from page and element text plus whole
+element texts (what site extractors pass in), with repeats as they occur.
+"Cold" clears the module's memo before each round, "batch" keeps it, as
+across the pages of one process.
+"""
+
+import argparse
+import time
+from collections import Counter
+
+from app.services.extraction import PRICE_PATTERNS, PRICE_SELECTOR_SET
+from app.services.parsers import parse_document
+from app.services.prices import normalize_price, normalize_prices
+from benchmarks.corpus import load_corpus
+from benchmarks.legacy_extraction import legacy_normalize_price
+
+LOCALE_SAMPLES = [
+    "₹1,29,900", "₹46,995.00", "Rs. 5833", "Rs.1,299", "INR 12,499",
+    "1.299,00 €", "1 299,00 €", "12,50 €", "€ 1.049", "EUR 89,99",
+    "$1,299.99", "USD 49", "£1,049.00", "¥12,800", "₩1,250,000", "1 499 ₽",
+]
+
+
+def price_strings(pages: dict) -> list:
+    strings = []
+    for body in pages.values():
+        document = parse_document(body)
+        texts = [document.text()]
+        for elements in PRICE_SELECTOR_SET.match(document):
+            texts.extend(document.element_text(element) for element in elements)
+        for text in texts:
+            strings.extend(match for pattern in PRICE_PATTERNS for match in pattern.findall(text))
+            if len(text) < 40:
+                strings.append(text)
+    return strings + LOCALE_SAMPLES
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="directory of saved *.html pages")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    strings = price_strings(load_corpus(args.corpus))
+    print(f"strings={len(strings)} unique={len(set(strings))}")
+
+    def legacy(batch):
+        return [legacy_normalize_price(text) for text in batch]
+
+    def cold(batch):
+        normalize_price.cache_clear()
+        return [normalize_price(text) for text in batch]
+
+    timings = {}
+    for label, run in [("legacy", legacy), ("cold", cold), ("batch", normalize_prices)]:
+        start = time.process_time()
+        for _ in range(args.rounds):
+            run(strings)
+        timings[label] = (time.process_time() - start) / (args.rounds * len(strings))
+    for label, seconds in timings.items():
+        print(f"{label:7} {seconds * 1e6:7.2f} us/string {timings['legacy'] / seconds:6.1f}x")
+
+    changed = Counter()
+    for text in set(strings):
+        before, after = legacy_normalize_price(text), normalize_price(text)
+        if before != after:
+            changed[(text, before, after)] += 1
+    print(f"different results for {len(changed)} unique strings, e.g.")
+    for text, before, after in sorted(changed, key=lambda key: key[0])[:12]:
+        print(f"  {text!r:24} {before} -> {after}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Search provider layer against a local stand-in for Google: googlesearch
+results with fetching held back until the whole list is known vs
+GoogleProvider handing each URL over as it is parsed, then a repeat served
+from the SERP cache. googlesearch's requests are sent to the stand-in.
+
+    python -m benchmarks.providers --results 20 --serp-delay 0.6 --delay 0.3
+"""
+
+import argparse
+import asyncio
+import time
+from contextlib import ExitStack
+from urllib.parse import parse_qs, quote, urlsplit
+
+import googlesearch
+import requests
+
+from app.config.search_config import SearchConfig
+from app.services.executors import SearchExecutor
+from app.services.http_client import SharedHttpClient
+from app.services.politeness import DomainScheduler
+from app.services.providers import GoogleProvider, SearchProviders
+from app.services.search import shared_service
+from benchmarks.stub_server import StubHandler, StubServer
+
+SERP_RESULT = (
+    '<div class="ezO2md"><a href="/url?q={url}&amp;sa=U"><span class="CVA68e">Result {i}</span></a>'
+    '<span class="FrIlee">Description {i}</span></div>'
+)
+
+
+class SerpHandler(StubHandler):
+    """
+    Basic HTML results pages whose links point at the product stub servers
+    """
+
+    product_bases: list = []
+
+    def do_GET(self):
+        params = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        time.sleep(self.default_delay)
+        start = int(params.get("start", 0))
+        # Google answers with up to num results, without the two extra googlesearch asks for
+        count = max(0, int(params.get("num", 12)) - 2)
+        body = "<html><body>" + "".join(
+            SERP_RESULT.format(
+                url=quote(f"{self.product_bases[i % len(self.product_bases)]}/product/{i}", safe=":/"),
+                i=i,
+            )
+            for i in range(start, start + count)
+        ) + "</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body.encode())))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+
+class WholeListGoogleProvider(GoogleProvider):
+    """
+    googlesearch.search run to the end before any URL is released
+    """
+
+    async def aiter_urls(self, query, num_results):
+        urls = await SearchExecutor.run_io(
+            lambda: list(googlesearch.search(query, num_results=num_results, unique=True))
+        )
+        for url in urls[:num_results]:
+            yield url
+
+
+async def timed_search(query: str, num_results: int) -> tuple:
+    service = shared_service(1)
+    start = time.perf_counter()
+    first, pages = None, 0
+    async for page in service.aiter_search_and_extract(query, num_results):
+        pages += 1
+        if first is None and page.result:
+            first = time.perf_counter() - start
+    total = time.perf_counter() - start
+    await SharedHttpClient.aclose()
+    return first, total, pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--results", type=int, default=20)
+    parser.add_argument("--serp-delay", type=float, default=0.6)
+    parser.add_argument("--delay", type=float, default=0.3)
+    parser.add_argument("--hosts", type=int, default=4)
+    args = parser.parse_args()
+
+    SearchConfig.PAGE_CACHE_ENABLED = False
+    SearchConfig.DEFAULT_DOMAIN_DELAY = 0
+    SearchConfig.MAX_RESULTS = max(SearchConfig.MAX_RESULTS, args.results)
+
+    with ExitStack() as stack:
+        product_servers = [
+            stack.enter_context(StubServer(delay=args.delay, host=f"127.0.0.{i + 1}"))
+            for i in range(args.hosts)
+        ]
+        SerpHandler.product_bases = [server.base_url for server in product_servers]
+        serp = stack.enter_context(StubServer(SerpHandler, delay=args.serp_delay))
+        googlesearch.get = lambda url, **kwargs: requests.get(serp.url("/search"), **kwargs)
+
+        print(f"results={args.results} serp delay={args.serp_delay}s page delay={args.delay}s")
+        runs = [
+            ("whole list", WholeListGoogleProvider(), "phone a"),
+            ("streamed", GoogleProvider(), "phone b"),
+            ("SERP cache hit", GoogleProvider(), "phone b"),
+        ]
+        for label, provider, query in runs:
+            SearchProviders.use(provider)
+            DomainScheduler.reset()
+            first, total, pages = asyncio.run(timed_search(query, args.results))
+            print(f"{label:21} first result {first:5.2f}s  all {pages} pages {total:5.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Recorded corpus of searches and the pages behind their results, replayed
+offline by benchmarks.replay_server and benchmarks.suite.
+
+    python -m benchmarks.record --out benchmarks/corpora/2026-10 "iphone 15 price in india" "sony wh-1000xm5 price"
+    python -m benchmarks.record --out benchmarks/corpora/synthetic --synthetic --searches 30
+
+Recording runs the configured provider chain (SEARCH_PROVIDERS) and fetches
+every result page once, politely, keeping its status, Content-Type, time
+to the response headers and total time. --synthetic builds a corpus from
+the fixture pages of benchmarks.corpus on retailer-like hosts with modelled
+latencies instead, for machines without network access.
+
+A corpus is a directory with manifest.json and the page bodies under
+pages/. CORPUS_FORMAT changes whenever that layout does; the fingerprint
+covers the recorded content, so reports are only compared across runs of
+the same corpus.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+from app.config.search_config import SearchConfig
+from app.services.http_client import SharedHttpClient
+from app.services.politeness import DomainScheduler
+from app.services.providers import aiter_search_urls
+from benchmarks.corpus import synthetic_pages
+
+CORPUS_FORMAT = 1
+
+# Hosts the synthetic pages are served from, by generator
+SYNTHETIC_HOSTS = {
+    "amazon_like": "www.amazon.in",
+    "flipkart_like": "www.flipkart.com",
+    "myntra_like": "www.myntra.com",
+    "us_shop": "shop.example.com",
+    "eu_shop": "shop.example.de",
+    "tricky": "deals.example.net",
+    "no_prices": "blog.example.org",
+}
+
+logger = logging.getLogger(__name__)
+
+
+class RecordedCorpus:
+    """
+    Searches with their result URLs and the recorded response for each URL
+    """
+
+    def __init__(self, root: Path, name: str):
+        self.root = Path(root)
+        self.name = name
+        self.recorded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        # {"query", "urls", "latency"}
+        self.searches: List[Dict] = []
+        # URL -> {"status", "content_type", "headers_latency", "latency", "file"} or {"error"}
+        self.pages: Dict[str, Dict] = {}
+
+    @classmethod
+    def load(cls, root: str) -> "RecordedCorpus":
+        with open(Path(root) / "manifest.json") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != CORPUS_FORMAT:
+            raise ValueError(
+                f"Corpus {root} has format {manifest.get('format')}, expected {CORPUS_FORMAT}"
+            )
+        corpus = cls(Path(root), manifest["name"])
+        corpus.recorded_at = manifest["recorded_at"]
+        corpus.searches = manifest["searches"]
+        corpus.pages = manifest["pages"]
+        return corpus
+
+    def save(self):
+        manifest = {
+            "format": CORPUS_FORMAT,
+            "name": self.name,
+            "recorded_at": self.recorded_at,
+            "fingerprint": self.fingerprint,
+            "searches": self.searches,
+            "pages": self.pages,
+        }
+        with open(self.root / "manifest.json", "w") as f:
+            json.dump(manifest, f, indent=1, ensure_ascii=False)
+
+    @property
+    def fingerprint(self) -> str:
+        content = json.dumps([self.searches, self.pages], sort_keys=True).encode()
+        return hashlib.sha256(content).hexdigest()[:16]
+
+    def hosts(self) -> List[str]:
+        return sorted({urlsplit(url).hostname or "" for url in self.pages})
+
+    def body(self, url: str) -> bytes:
+        page = self.pages[url]
+        return (self.root / page["file"]).read_bytes() if "file" in page else b""
+
+    def add_search(self, query: str, urls: List[str], latency: float):
+        self.searches.append({"query": query, "urls": urls, "latency": round(latency, 4)})
+
+    def add_page(
+        self,
+        url: str,
+        body: bytes,
+        status: int = 200,
+        content_type: str = "text/html; charset=utf-8",
+        headers_latency: float = 0.0,
+        latency: float = 0.0,
+    ):
+        name = f"pages/{hashlib.sha1(url.encode()).hexdigest()}.html"
+        (self.root / "pages").mkdir(parents=True, exist_ok=True)
+        (self.root / name).write_bytes(body)
+        self.pages[url] = {
+            "status": status,
+            "content_type": content_type,
+            "headers_latency": round(headers_latency, 4),
+            "latency": round(latency, 4),
+            "file": name,
+        }
+
+    def add_error(self, url: str, error: str, latency: float = 0.0):
+        self.pages[url] = {"error": error, "latency": round(latency, 4)}
+
+
+async def record_page(corpus: RecordedCorpus, url: str):
+    client = SharedHttpClient.get()
+    await DomainScheduler.wait(url)
+    start = time.monotonic()
+    try:
+        headers = {"User-Agent": random.choice(SearchConfig.USER_AGENTS)}
+        async with client.stream("GET", url, headers=headers) as response:
+            headers_latency = time.monotonic() - start
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) >= SearchConfig.MAX_BODY_BYTES:
+                    break
+        corpus.add_page(
+            url,
+            bytes(body),
+            status=response.status_code,
+            content_type=response.headers.get("content-type", ""),
+            headers_latency=headers_latency,
+            latency=time.monotonic() - start,
+        )
+    except Exception as e:
+        logger.warning(f"Recording {url} failed: {str(e)}")
+        corpus.add_error(url, str(e) or type(e).__name__, time.monotonic() - start)
+
+
+async def record(corpus: RecordedCorpus, queries: List[str], num_results: int, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(url: str):
+        async with slots:
+            await record_page(corpus, url)
+
+    for query in queries:
+        start = time.monotonic()
+        urls = [url async for url in aiter_search_urls(query, num_results)]
+        corpus.add_search(query, urls, time.monotonic() - start)
+        await asyncio.gather(*(one(url) for url in urls if url not in corpus.pages))
+        print(f"{query}: {len(urls)} results")
+    await SharedHttpClient.aclose()
+
+
+def record_synthetic(corpus: RecordedCorpus, searches: int, copies: int, seed: int = 7):
+    """
+    Searches of 10 results over the fixture pages, with per-host latency
+    drawn from a long-tailed distribution
+    """
+    rng = random.Random(seed)
+    urls = []
+    for name, body in synthetic_pages(copies, seed).items():
+        generator = name.rsplit("_", 1)[0]
+        url = f"https://{SYNTHETIC_HOSTS[generator]}/p/{name[:-len('.html')]}"
+        headers_latency = rng.lognormvariate(-1.8, 0.6)
+        corpus.add_page(
+            url, body, headers_latency=headers_latency, latency=headers_latency * rng.uniform(1.1, 1.6)
+        )
+        urls.append(url)
+    for search in range(searches):
+        corpus.add_search(f"product {search}", rng.sample(urls, min(10, len(urls))), rng.uniform(0.3, 0.9))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("queries", nargs="*")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--name")
+    parser.add_argument("--num-results", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--synthetic", action="store_true")
+    parser.add_argument("--searches", type=int, default=30)
+    parser.add_argument("--copies", type=int, default=6)
+    args = parser.parse_args()
+
+    root = Path(args.out)
+    root.mkdir(parents=True, exist_ok=True)
+    corpus = RecordedCorpus(root, args.name or root.name)
+    if args.synthetic:
+        record_synthetic(corpus, args.searches, args.copies)
+    elif args.queries:
+        # Record what the providers answer now, not a cached answer
+        SearchConfig.SERP_CACHE_BACKEND = "none"
+        asyncio.run(record(corpus, args.queries, args.num_results, args.concurrency))
+    else:
+        parser.error("give queries to record, or --synthetic")
+    corpus.save()
+    failed = sum("error" in page for page in corpus.pages.values())
+    print(
+        f"corpus {corpus.name} ({corpus.fingerprint}): {len(corpus.searches)} searches, "
+        f"{len(corpus.pages)} pages, {failed} failed"
+    )
+
+
+if __name__ == "__main__":
+    main()
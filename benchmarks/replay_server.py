@@ -0,0 +1,179 @@
+"""
+Local HTTP server that replays a recorded corpus (see benchmarks.record).
+
+Pages keep their own host names: replay_url() rewrites a recorded URL to
+plain HTTP on the server's port, and pin_hosts() makes DNSCache resolve
+every corpus host to the server, so per-host politeness, breakers and site
+extractors behave as they would live. The Host header picks the page.
+
+Each response waits out the recorded time to headers, then sends the body
+in four parts spread over the rest of the recorded time, both scaled by
+latency_scale and varied by +-jitter. Failures are injected on top: fail
+answers that share of requests with a 503, drop closes that share of
+connections without a response, and slow adds slow_delay seconds to that
+share. URLs that failed while recording are dropped too.
+
+    with ReplayServer(corpus, latency_scale=0.5, fail=0.02, slow=0.05) as server:
+        server.pin_hosts()
+        url = server.replay_url(corpus.searches[0]["urls"][0])
+"""
+
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from app.services.canonical import clean_url
+from app.services.http_client import DNSCache
+from benchmarks.record import RecordedCorpus
+from benchmarks.stub_server import StubServer
+
+BODY_PARTS = 4
+
+
+def replay_key(host: str, path: str) -> str:
+    return f"{host.lower()}{path}"
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """
+    ReplayServer subclasses this with the corpus and injection settings
+    """
+
+    corpus: RecordedCorpus
+    # replay_key -> recorded URL
+    index: Dict[str, str] = {}
+    latency_scale = 1.0
+    jitter = 0.2
+    fail = 0.0
+    drop = 0.0
+    slow = 0.0
+    slow_delay = 3.0
+    rng = random.Random(7)
+    rng_lock = threading.Lock()
+
+    def _draw(self) -> float:
+        with self.rng_lock:
+            return self.rng.random()
+
+    def _scaled(self, seconds: float) -> float:
+        return max(0.0, seconds * self.latency_scale * (1 + self.jitter * (2 * self._draw() - 1)))
+
+    def do_GET(self):
+        host = (self.headers.get("Host") or "").rsplit(":", 1)[0]
+        url = self.index.get(replay_key(host, self.path))
+        if url is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        page = self.corpus.pages[url]
+        headers_delay = self._scaled(page.get("headers_latency", page["latency"]))
+        body_delay = self._scaled(page["latency"]) - headers_delay
+        if self._draw() < self.slow:
+            headers_delay += self.slow_delay
+        time.sleep(headers_delay)
+
+        if "error" in page or self._draw() < self.drop:
+            # No response at all, like a reset or a dead host
+            self.close_connection = True
+            return
+        if self._draw() < self.fail:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = self.corpus.body(url)
+        self.send_response(page["status"])
+        self.send_header("Content-Type", page["content_type"])
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        part = max(1, -(-len(body) // BODY_PARTS))
+        try:
+            for start in range(0, len(body), part):
+                if start and body_delay > 0:
+                    time.sleep(body_delay / BODY_PARTS)
+                self.wfile.write(body[start:start + part])
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Streaming clients hang up once they have read enough
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer(StubServer):
+    """
+    Threaded replay server on an ephemeral port, usable as a context manager
+    """
+
+    def __init__(
+        self,
+        corpus: RecordedCorpus,
+        host: str = "127.0.0.1",
+        latency_scale: float = 1.0,
+        jitter: float = 0.2,
+        fail: float = 0.0,
+        drop: float = 0.0,
+        slow: float = 0.0,
+        slow_delay: float = 3.0,
+        seed: Optional[int] = 7,
+    ):
+        index = {}
+        for url in corpus.pages:
+            # The search pipeline may ask for the URL without its tracking parameters
+            for variant in (url, clean_url(url)):
+                parts = urlsplit(variant)
+                path = f"{parts.path or '/'}?{parts.query}" if parts.query else parts.path or "/"
+                index.setdefault(replay_key(parts.hostname or "", path), url)
+        handler = type(
+            "ReplayHandler",
+            (ReplayHandler,),
+            {
+                "corpus": corpus,
+                "index": index,
+                "latency_scale": latency_scale,
+                "jitter": jitter,
+                "fail": fail,
+                "drop": drop,
+                "slow": slow,
+                "slow_delay": slow_delay,
+                "rng": random.Random(seed),
+                "rng_lock": threading.Lock(),
+            },
+        )
+        super().__init__(handler, host=host)
+        self.corpus = corpus
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    def replay_url(self, url: str) -> str:
+        return replay_url(url, self.port)
+
+    def pin_hosts(self):
+        pin_hosts(self.corpus, self.httpd.server_address[0], self.port)
+
+
+def replay_url(url: str, port: int) -> str:
+    """
+    The recorded URL on the replay server: same host and path, plain HTTP
+    on its port
+    """
+    parts = urlsplit(url)
+    return urlunsplit(("http", f"{parts.hostname}:{port}", parts.path or "/", parts.query, ""))
+
+
+def pin_hosts(corpus: RecordedCorpus, address: str, port: int):
+    """
+    Resolve every corpus host to the replay server, in this process
+    """
+    for host in corpus.hosts():
+        DNSCache.pin(host, port, [address])
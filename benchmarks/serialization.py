@@ -0,0 +1,126 @@
+"""
+Response bodies the old way, serialize() into dicts and then json.dumps
+through JSONResponse, vs APIResponse's one-pass to_json, for a v1 search,
+a v2 search and a batch of v2 searches. Then the size of each body and
+what gzip makes of it, with the time taken.
+
+    python -m benchmarks.serialization --results 10 --batch 50 --rounds 2000
+
+Both paths must produce the same JSON; the run stops if they do not.
+"""
+
+import argparse
+import gzip
+import json
+import random
+import time
+import warnings
+from typing import Callable, Dict
+
+from fastapi.responses import JSONResponse
+
+from app.config.search_config import SearchConfig
+from app.entities.search import SearchResult
+from app.utils.metrics import Metrics
+from app.utils.response import APIResponse
+from app.utils.serialization import serialize
+
+SOURCES = ["json_ld", "meta", "microdata", "site_amazon", "dom"]
+
+
+def v1_response(rng: random.Random, results: int) -> Dict:
+    links = [f"https://www.example{i % 4}.com/p/{rng.randrange(10**6)}?ref=search" for i in range(results)]
+    return {
+        "query": "Best Price of iphone 15 128gb in India",
+        "results": [
+            SearchResult(
+                link=link,
+                prices=[f"₹{rng.randrange(40_000, 90_000):,}" for _ in range(rng.randint(1, 6))],
+                currency="INR",
+                product_name=f"Apple iPhone 15 (128 GB) - Black {rng.randrange(1000)}",
+            )
+            for link in links
+        ],
+        "pages": [{"url": link, "status": "completed"} for link in links],
+    }
+
+
+def v2_response(rng: random.Random, results: int) -> Dict:
+    response = v1_response(rng, results)
+    for i, result in enumerate(response["results"]):
+        prices = []
+        for _ in range(rng.randint(2, 12)):
+            value = rng.randrange(40_000, 90_000) + rng.choice([0, 0.5, 0.99])
+            prices.append({
+                "raw_text": f"₹{value:,.2f}",
+                "value": value,
+                "currency": "INR",
+                "source": rng.choice(SOURCES),
+            })
+        # v2 results carry price dicts, built without validation as aextract_page does
+        response["results"][i] = SearchResult.model_construct(**{**result.__dict__, "prices": prices})
+    return response
+
+
+def batch_response(rng: random.Random, results: int, items: int) -> Dict:
+    return {
+        "items": [v2_response(rng, results) for _ in range(items)],
+        "stats": {"items": items, "cached": 0, "unique_searches": items, "elapsed_ms": 1234},
+    }
+
+
+def old_body(data) -> bytes:
+    return JSONResponse(content={"message": "Success", "data": serialize(data)}).body
+
+
+def new_body(data) -> bytes:
+    return APIResponse(data=data).body
+
+
+def timed(render: Callable, data, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        render(data)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--results", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    SearchConfig.METRICS_ENABLED = False
+    # model_dump() warns about v2's price dicts on every result; the old path still pays for it
+    warnings.filterwarnings("ignore", message="Pydantic serializer warnings")
+    Metrics.reset()
+    rng = random.Random(7)
+    payloads = {
+        "v1": (v1_response(rng, args.results), args.rounds),
+        "v2": (v2_response(rng, args.results), args.rounds),
+        f"batch x{args.batch}": (batch_response(rng, args.results, args.batch), max(1, args.rounds // args.batch)),
+    }
+
+    for label, (data, rounds) in payloads.items():
+        old, new = old_body(data), new_body(data)
+        if json.loads(old) != json.loads(new):
+            raise SystemExit(f"{label}: the bodies differ")
+        old_us, new_us = timed(old_body, data, rounds), timed(new_body, data, rounds)
+        print(
+            f"{label:10}  {len(new):8} bytes  serialize+json.dumps {old_us:8.1f}us  "
+            f"to_json {new_us:8.1f}us  ({old_us / new_us:4.1f}x)"
+        )
+        compress_rounds = max(1, rounds // 10)
+        start = time.perf_counter()
+        for _ in range(compress_rounds):
+            compressed = gzip.compress(new, compresslevel=SearchConfig.RESPONSE_GZIP_LEVEL)
+        compress_us = (time.perf_counter() - start) / compress_rounds * 1e6
+        print(
+            f"{'':10}  {len(compressed):8} bytes  gzip {compress_us:8.1f}us  "
+            f"({len(compressed) / len(new):.0%} of the body)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Site extractors vs the generic selector sweep on retailer pages: CPU time
+per page after parsing and per-site hit rates.
+
+    python -m benchmarks.site_extractors [--corpus DIR] [--rounds 5]
+
+Synthetic pages are mapped to a retailer host by their name prefix, so a
+saved corpus should name files amazon_*.html, flipkart_*.html and so on.
+"""
+
+import argparse
+import time
+
+from app.services.search import BaseService, SearchService
+from app.services.site_extractors import SiteExtractors
+from benchmarks.corpus import load_corpus
+
+HOSTS = {
+    "amazon": "www.amazon.in",
+    "flipkart": "www.flipkart.com",
+    "myntra": "www.myntra.com",
+}
+
+
+def site_url(name: str) -> str:
+    for prefix, host in HOSTS.items():
+        if name.startswith(prefix):
+            return f"https://{host}/{name}"
+    return f"https://shop.example.com/{name}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="directory of saved *.html pages")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = {
+        site_url(name): body
+        for name, body in load_corpus(args.corpus).items()
+        if SiteExtractors.for_url(site_url(name))
+    }
+    print(f"retailer pages={len(pages)}")
+
+    for service in (BaseService(), SearchService()):
+        documents = {url: service.parse_page(body) for url, body in pages.items()}
+
+        def generic(url, document):
+            return service.extract_product_info(document)
+
+        def targeted(url, document):
+            extractor = SiteExtractors.for_url(url)
+            info = service.extract_site_info(extractor, document)
+            SiteExtractors.record(extractor.site_type, info is not None)
+            return info or service.extract_product_info(document)
+
+        SiteExtractors.reset()
+        timings = {}
+        for label, extract in [("generic", generic), ("site", targeted)]:
+            start = time.process_time()
+            for _ in range(args.rounds):
+                for url, document in documents.items():
+                    extract(url, document)
+            timings[label] = (time.process_time() - start) / (args.rounds * len(documents))
+
+        print(f"v{service._version}:")
+        for label, seconds in timings.items():
+            print(f"  {label:8} {seconds * 1000:8.2f} ms CPU/page")
+        print(f"  saving   {(1 - timings['site'] / timings['generic']) * 100:8.1f}%")
+        for site_type, stats in sorted(SiteExtractors.stats().items()):
+            print(f"  {site_type:8} hit rate {stats['hit_rate']:.0%} of {stats['pages'] // args.rounds} pages")
+
+
+if __name__ == "__main__":
+    main()
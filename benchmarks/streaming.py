@@ -0,0 +1,78 @@
+"""
+Full downloads vs streamed downloads with early stop, against a stub server
+that streams large pages slowly.
+
+    python -m benchmarks.streaming --size 3000000 --chunk 16384 --chunk-delay 0.005
+
+Reports time to first result, bytes kept and peak Python memory per page,
+for pages with and without a JSON-LD block in the head.
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from app.config.search_config import SearchConfig
+from app.services.fetcher import AsyncFetcher
+from app.services.politeness import DomainScheduler
+from app.services.search import BaseService
+from benchmarks.stub_server import StubServer
+
+MODES = {
+    # name: (max body bytes, early stop)
+    "full": (1 << 40, False),
+    "capped": (SearchConfig.MAX_BODY_BYTES, False),
+    "early stop": (SearchConfig.MAX_BODY_BYTES, True),
+}
+
+
+async def fetch_and_extract(service: BaseService, url: str):
+    async for page in AsyncFetcher().fetch_all([url]):
+        result = service.extract_page(page.url, page.content) if page.content else None
+        return page.content, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=3_000_000)
+    parser.add_argument("--chunk", type=int, default=16384)
+    parser.add_argument("--chunk-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    # Measure the downloads themselves, not the cache or politeness waits
+    SearchConfig.PAGE_CACHE_ENABLED = False
+    SearchConfig.PARSE_CACHE_BACKEND = "none"
+    SearchConfig.DEFAULT_DOMAIN_DELAY = 0
+    service = BaseService()
+
+    print(f"page size={args.size / 1e6:.1f}MB chunk={args.chunk} chunk_delay={args.chunk_delay}s")
+    print(f"{'page':8} {'mode':11} {'seconds':>8} {'kept MB':>8} {'peak MB':>8}  prices")
+    with StubServer() as server:
+        for json_ld in (1, 0):
+            for mode, (max_bytes, early_stop) in MODES.items():
+                SearchConfig.MAX_BODY_BYTES = max_bytes
+                SearchConfig.STREAM_EARLY_STOP = early_stop
+                DomainScheduler.reset()
+                url = server.url(
+                    f"/product/{json_ld}?size={args.size}&chunk={args.chunk}"
+                    f"&chunk_delay={args.chunk_delay}&json_ld={json_ld}"
+                )
+
+                tracemalloc.start()
+                start = time.perf_counter()
+                content, result = asyncio.run(fetch_and_extract(service, url))
+                seconds = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                label = "json-ld" if json_ld else "plain"
+                prices = result.prices if result else None
+                print(
+                    f"{label:8} {mode:11} {seconds:8.2f} {len(content or b'') / 1e6:8.2f} "
+                    f"{peak / 1e6:8.1f}  {prices}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Measures the structured-data fast path: how many pages it answers and the
+CPU time per page with and without it, for both service versions.
+
+    python -m benchmarks.structured [--corpus DIR] [--rounds 3]
+"""
+
+import argparse
+import time
+
+from benchmarks.corpus import load_corpus
+from app.services.search import BaseService, SearchService
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="directory of saved *.html pages")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    print(f"pages={len(pages)}")
+
+    for service in (BaseService(), SearchService()):
+        hits = [name for name, body in pages.items() if service.extract_structured_info(body)]
+
+        def full(body):
+            return service.extract_product_info(service.parse_page(body))
+
+        def staged(body):
+            return service.extract_structured_info(body) or full(body)
+
+        timings = {}
+        for label, extract in [("dom only", full), ("staged", staged)]:
+            start = time.process_time()
+            for _ in range(args.rounds):
+                for body in pages.values():
+                    extract(body)
+            timings[label] = (time.process_time() - start) / (args.rounds * len(pages))
+
+        print(f"v{service._version}: fast path answered {len(hits)}/{len(pages)} pages")
+        for label, seconds in timings.items():
+            print(f"  {label:9} {seconds * 1000:8.2f} ms CPU/page")
+        print(f"  saving    {(1 - timings['staged'] / timings['dom only']) * 100:8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
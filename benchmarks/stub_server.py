@@ -0,0 +1,206 @@
+"""
+Local HTTP server that serves canned product pages with configurable delays.
+
+Any path is served; the page is built from the path so every URL is distinct:
+
+    /product/<n>?delay=0.5&price=1299&currency=₹&max_age=60
+
+Responses carry an ETag and answer matching If-None-Match with a 304.
+
+Passing size streams a large page instead: the product block near the top,
+then inline scripts up to size bytes, written chunk bytes at a time with
+chunk_delay seconds between chunks. json_ld=1 adds a JSON-LD Product block
+to the head:
+
+    /product/<n>?size=3000000&chunk=16384&chunk_delay=0.01&json_ld=1
+
+Flaky hosts: fail answers that share of requests with a 503, fail_first
+answers the first n requests for a path with a 503, and slow delays that
+share of requests by slow_delay more seconds:
+
+    /product/<n>?fail=0.2&fail_first=1&slow=0.05&slow_delay=3
+
+title overrides the product name and canonical adds a rel=canonical link:
+
+    /product/<n>?title=Phone%20X&canonical=/p/phone-x
+
+no_price=1 serves an article without prices instead (padded to size bytes
+when given) and content_type overrides the Content-Type header:
+
+    /article/<n>?no_price=1&size=200000
+    /manual/<n>?size=500000&content_type=application/pdf
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+PRODUCT_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>{title}</title>{head}</head>
+<body>
+  <h1>{title}</h1>
+  <div class="product-price"><span class="price">{currency}{price}</span></div>
+  <p>Free delivery on orders over {currency}499.</p>
+</body>
+</html>
+"""
+
+
+def product_page(title: str, price: str, currency: str = "₹", canonical: str = "") -> bytes:
+    head = f'<link rel="canonical" href="{canonical}">' if canonical else ""
+    return PRODUCT_PAGE.format(title=title, price=price, currency=currency, head=head).encode()
+
+
+def large_product_page(
+    title: str, price: str, currency: str = "₹", size: int = 1 << 20, json_ld: bool = False
+) -> bytes:
+    """
+    Product page padded with inline scripts after the product block, like
+    retailer pages carrying megabytes of state and tracking code
+    """
+    head = f"<title>{title}</title>"
+    if json_ld:
+        data = {
+            "@context": "https://schema.org",
+            "@type": "Product",
+            "name": title,
+            "offers": {"@type": "Offer", "price": price.replace(",", ""), "priceCurrency": "INR"},
+        }
+        head += f'<script type="application/ld+json">{json.dumps(data)}</script>'
+    page = (
+        f"<!DOCTYPE html><html><head>{head}</head><body><h1>{title}</h1>"
+        f'<div class="product-price"><span class="price">{currency}{price}</span></div>'
+    )
+    filler = "<script>window.__state = {" + ", ".join(
+        f'"key{i}": "value {i}"' for i in range(200)
+    ) + "};</script>\n"
+    body = page.encode()
+    footer = b"</body></html>"
+    repeats = max(0, (size - len(body) - len(footer)) // len(filler.encode()))
+    return body + filler.encode() * repeats + footer
+
+
+def article_page(title: str, size: int = 0) -> bytes:
+    """
+    Page with no prices on it, like the news and review results a product
+    search also returns
+    """
+    paragraph = "<p>Reviews, news and opinion, with no price anywhere in sight.</p>\n"
+    return (
+        f"<!DOCTYPE html><html><head><title>{title}</title></head><body><h1>{title}</h1>"
+        + paragraph * max(1, size // len(paragraph))
+        + "</body></html>"
+    ).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    default_delay = 0.0
+    # Requests seen per path, for fail_first
+    seen: Dict[str, int] = {}
+    seen_lock = threading.Lock()
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+
+        delay = float(params.get("delay", self.default_delay))
+        if random.random() < float(params.get("slow", 0)):
+            delay += float(params.get("slow_delay", 5))
+        time.sleep(delay)
+
+        with self.seen_lock:
+            self.seen[self.path] = self.seen.get(self.path, 0) + 1
+            attempt = self.seen[self.path]
+        if attempt <= int(params.get("fail_first", 0)) or random.random() < float(params.get("fail", 0)):
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if params.get("no_price") == "1":
+            body = article_page(f"Stub article {parts.path}", int(params.get("size", 0)))
+        elif "size" in params:
+            body = large_product_page(
+                title=f"Stub product {parts.path}",
+                price=params.get("price", "1,299"),
+                currency=params.get("currency", "₹"),
+                size=int(params["size"]),
+                json_ld=params.get("json_ld") == "1",
+            )
+        else:
+            body = product_page(
+                title=params.get("title", f"Stub product {parts.path}"),
+                price=params.get("price", "1,299"),
+                currency=params.get("currency", "₹"),
+                canonical=params.get("canonical", ""),
+            )
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", params.get("content_type", "text/html; charset=utf-8"))
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        if "max_age" in params:
+            self.send_header("Cache-Control", f"max-age={params['max_age']}")
+        self.end_headers()
+
+        chunk = int(params.get("chunk", len(body) or 1))
+        chunk_delay = float(params.get("chunk_delay", 0))
+        try:
+            for start in range(0, len(body), chunk):
+                self.wfile.write(body[start:start + chunk])
+                self.wfile.flush()
+                if chunk_delay:
+                    time.sleep(chunk_delay)
+        except (BrokenPipeError, ConnectionResetError):
+            # Streaming clients hang up once they have read enough
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """
+    Threaded stub server on an ephemeral port, usable as a context manager
+    """
+
+    def __init__(
+        self,
+        handler: type = StubHandler,
+        delay: Optional[float] = None,
+        host: str = "127.0.0.1",
+    ):
+        if delay is not None:
+            handler = type(handler.__name__, (handler,), {"default_delay": delay})
+        # Any 127.0.0.x works on Linux loopback, handy for multi-host setups
+        self.httpd = ThreadingHTTPServer((host, 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def __enter__(self) -> "StubServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,253 @@
+"""
+Offline search benchmark over a recorded corpus (see benchmarks.record):
+every search in the corpus runs against the replay server through v1
+(BaseService) and v2 (SearchService). For each version it reports pages/s,
+p50/p95/p99 search latency, CPU time per page and peak RSS, and can write
+them as JSON for comparing runs.
+
+    python -m benchmarks.suite --corpus benchmarks/corpora/synthetic --concurrency 4 --report before.json
+    python -m benchmarks.suite --corpus benchmarks/corpora/synthetic --concurrency 4 --compare before.json
+
+Each version runs in a fresh process, so its CPU time and peak RSS are its
+own. With SEARCH_PARSE_USE_PROCESSES the parse workers' CPU time is not
+counted. The replay server runs in the parent, with --latency-scale,
+--fail, --drop and --slow passed on to it. Page, parse and SERP caches and
+politeness delays are off unless --warm and --politeness are given.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from typing import AsyncIterator, Dict, List
+
+from app.config.search_config import SearchConfig
+from app.services.http_client import SharedHttpClient
+from app.services.providers import SearchProvider, SearchProviders
+from app.services.search import shared_service
+from benchmarks.record import RecordedCorpus
+from benchmarks.replay_server import ReplayServer, pin_hosts, replay_url
+
+REPORT_FORMAT = 1
+COMPARED = ["pages_per_second", "p50_ms", "p95_ms", "p99_ms", "cpu_ms_per_page", "peak_rss_mb"]
+
+
+class ReplayProvider(SearchProvider):
+    """
+    The corpus's result URLs for each query, on the replay server, after
+    the provider latency recorded for the search
+    """
+
+    name = "replay"
+
+    def __init__(self, corpus: RecordedCorpus, port: int, latency_scale: float = 1.0):
+        self.searches = {search["query"]: search for search in corpus.searches}
+        self.port = port
+        self.latency_scale = latency_scale
+
+    async def aiter_urls(self, query: str, num_results: int) -> AsyncIterator[str]:
+        search = self.searches.get(query)
+        if search is None:
+            return
+        await asyncio.sleep(search["latency"] * self.latency_scale)
+        for url in search["urls"][:num_results]:
+            yield replay_url(url, self.port)
+
+
+def percentile(values: list, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def drive(version: int, queries: List[str], num_results: int, concurrency: int) -> tuple:
+    service = shared_service(version)
+    slots = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    results, errors = 0, 0
+
+    async def one(query: str):
+        nonlocal results, errors
+        async with slots:
+            start = time.perf_counter()
+            response = await service.asearch(query, num_results)
+            latencies.append(time.perf_counter() - start)
+        results += len(response["results"])
+        errors += "error" in response
+        for page in response.get("pages", []):
+            statuses[page["status"]] = statuses.get(page["status"], 0) + 1
+
+    await asyncio.gather(*(one(query) for query in queries))
+    await SharedHttpClient.aclose()
+    return latencies, statuses, results, errors
+
+
+def run_version(options: Dict) -> Dict:
+    """
+    One version over the whole corpus, in a process of its own
+    """
+    logging.disable(logging.WARNING)
+    if not options["warm"]:
+        SearchConfig.PAGE_CACHE_ENABLED = False
+        SearchConfig.PARSE_CACHE_BACKEND = "none"
+        SearchConfig.SERP_CACHE_BACKEND = "none"
+    if not options["politeness"]:
+        SearchConfig.DEFAULT_DOMAIN_DELAY = 0
+        for site in SearchConfig.SITE_CONFIGS.values():
+            site["delay"] = 0
+
+    corpus = RecordedCorpus.load(options["corpus"])
+    num_results = max(len(search["urls"]) for search in corpus.searches)
+    SearchConfig.MAX_RESULTS = max(SearchConfig.MAX_RESULTS, num_results)
+    pin_hosts(corpus, options["address"], options["port"])
+    SearchProviders.use(ReplayProvider(corpus, options["port"], options["latency_scale"]))
+
+    queries = [search["query"] for search in corpus.searches] * options["rounds"]
+    cpu, start = cpu_seconds(), time.perf_counter()
+    latencies, statuses, results, errors = asyncio.run(
+        drive(options["version"], queries, num_results, options["concurrency"])
+    )
+    elapsed, cpu = time.perf_counter() - start, cpu_seconds() - cpu
+
+    pages = sum(statuses.values())
+    return {
+        "version": options["version"],
+        "searches": len(queries),
+        "pages": pages,
+        "results": results,
+        "errors": errors,
+        "statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "pages_per_second": round(pages / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "cpu_ms_per_page": round(cpu / max(pages, 1) * 1000, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(report: Dict, baseline: Dict):
+    if baseline["corpus"]["fingerprint"] != report["corpus"]["fingerprint"]:
+        print("warning: the baseline was measured on a different corpus")
+    print(f"against {baseline['git'] or 'baseline'} from {baseline['created_at']}")
+    for version, run in report["runs"].items():
+        before = baseline["runs"].get(version)
+        if before is None:
+            continue
+        changes = []
+        for key in COMPARED:
+            change = (run[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            changes.append(f"{key} {before[key]} -> {run[key]} ({change:+.1f}%)")
+        print(f"{version}: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", required=True)
+    parser.add_argument("--versions", default="1,2")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--fail", type=float, default=0.0)
+    parser.add_argument("--drop", type=float, default=0.0)
+    parser.add_argument("--slow", type=float, default=0.0)
+    parser.add_argument("--slow-delay", type=float, default=3.0)
+    parser.add_argument("--warm", action="store_true")
+    parser.add_argument("--politeness", action="store_true")
+    parser.add_argument("--report", help="write the report to this JSON file")
+    parser.add_argument("--compare", help="report JSON file to compare against")
+    args = parser.parse_args()
+
+    corpus = RecordedCorpus.load(args.corpus)
+    settings = {
+        key: value for key, value in vars(args).items() if key not in ("report", "compare")
+    }
+    report = {
+        "format": REPORT_FORMAT,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "corpus": {
+            "name": corpus.name,
+            "fingerprint": corpus.fingerprint,
+            "searches": len(corpus.searches),
+            "pages": len(corpus.pages),
+        },
+        "settings": settings,
+        "runs": {},
+    }
+    print(
+        f"corpus {corpus.name} ({corpus.fingerprint}): {len(corpus.searches)} searches x{args.rounds}, "
+        f"concurrency {args.concurrency}, latency x{args.latency_scale}"
+    )
+
+    with ReplayServer(
+        corpus,
+        latency_scale=args.latency_scale,
+        jitter=args.jitter,
+        fail=args.fail,
+        drop=args.drop,
+        slow=args.slow,
+        slow_delay=args.slow_delay,
+    ) as server:
+        for version in (int(v) for v in args.versions.split(",")):
+            options = {
+                **settings,
+                "version": version,
+                "address": server.httpd.server_address[0],
+                "port": server.port,
+            }
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                run = pool.submit(run_version, options).result()
+            report["runs"][f"v{version}"] = run
+            print(
+                f"v{version}  {run['pages_per_second']:7.2f} pages/s  p50 {run['p50_ms']:7.1f}ms  "
+                f"p95 {run['p95_ms']:7.1f}ms  p99 {run['p99_ms']:7.1f}ms  "
+                f"{run['cpu_ms_per_page']:6.2f} CPU ms/page  peak RSS {run['peak_rss_mb']:6.1f} MB  "
+                f"{run['results']} results  {run['errors']} errors  {run['statuses']}"
+            )
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"report written to {args.report}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Searches whose result lists mix product pages with pages that never carry
+prices, with the pre-fetch URL filter off and on: wall time, pages fetched
+and parsed, results kept and the time the filter reports as saved.
+
+    python -m benchmarks.url_filter --searches 30 --article-size 300000
+
+Every search gets 10 URLs: 4 product pages spread over three hosts, two
+articles from a host that never lists prices, a blog post, a .pdf link, a
+PDF behind an extensionless URL and a URL on a denied host.
+"""
+
+import argparse
+import asyncio
+import time
+from contextlib import ExitStack
+
+from app.config.search_config import SearchConfig
+from app.services.http_client import SharedHttpClient
+from app.services.politeness import DomainScheduler
+from app.services.providers import FixtureProvider, SearchProviders
+from app.services.search import PageStatus, shared_service
+from app.services.url_filter import UrlFilter
+from benchmarks.stub_server import StubServer
+
+
+async def run(queries: list) -> tuple:
+    service = shared_service(1)
+    statuses = {}
+    for query in queries:
+        for page in await service.asearch_pages(query, 10):
+            statuses[page.status] = statuses.get(page.status, 0) + 1
+    await SharedHttpClient.aclose()
+    return statuses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--searches", type=int, default=30)
+    parser.add_argument("--article-size", type=int, default=300_000)
+    args = parser.parse_args()
+
+    SearchConfig.PAGE_CACHE_ENABLED = False
+    SearchConfig.PARSE_CACHE_BACKEND = "none"
+    SearchConfig.SERP_CACHE_BACKEND = "none"
+    SearchConfig.DEFAULT_DOMAIN_DELAY = 0
+    SearchConfig.MAX_RESULTS = max(SearchConfig.MAX_RESULTS, 10)
+
+    with ExitStack() as stack:
+        shops = [stack.enter_context(StubServer(host=f"127.0.0.{i + 1}")) for i in range(3)]
+        magazine = stack.enter_context(StubServer(host="127.0.0.4"))
+        video = stack.enter_context(StubServer(host="127.0.0.5"))
+        SearchConfig.URL_DENY_HOSTS += ",127.0.0.5"
+
+        def urls(search: int) -> list:
+            article = f"delay=0.1&no_price=1&size={args.article_size}"
+            return [
+                shops[i % 3].url(f"/product/{search}-{i}?delay=0.1") for i in range(4)
+            ] + [
+                magazine.url(f"/reviews/{search}-{i}?{article}") for i in range(2)
+            ] + [
+                shops[0].url(f"/blog/{search}?{article}"),
+                shops[1].url(f"/manual/{search}.pdf?delay=0.1&no_price=1&size=500000&content_type=application/pdf"),
+                shops[2].url(f"/manual/{search}?delay=0.1&no_price=1&size=500000&content_type=application/pdf"),
+                video.url(f"/watch/{search}?{article}"),
+            ]
+
+        queries = [f"product {s}" for s in range(args.searches)]
+        SearchProviders.use(FixtureProvider({query: urls(s) for s, query in enumerate(queries)}))
+
+        print(f"searches={args.searches} article size={args.article_size} bytes")
+        for label, enabled in [("filter off", False), ("filter on", True)]:
+            SearchConfig.URL_FILTER = enabled
+            UrlFilter.reset()
+            DomainScheduler.reset()
+            start = time.perf_counter()
+            statuses = asyncio.run(run(queries))
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:10}  {elapsed:5.2f}s  completed {statuses.get(PageStatus.COMPLETED, 0)}  "
+                f"no prices {statuses.get(PageStatus.NO_PRICES, 0)}  "
+                f"skipped {statuses.get(PageStatus.SKIPPED, 0)}  failed {statuses.get(PageStatus.FAILED, 0)}"
+            )
+            if enabled:
+                print(f"            {UrlFilter.stats()}")
+
+
+if __name__ == "__main__":
+    main()
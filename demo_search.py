@@ -1,81 +1,77 @@
 #!/usr/bin/env python3
 """
-Comprehensive example demonstrating Google search with HTML parsing for price extraction
+Example of searching for product prices with both service versions
+
+    python demo_search.py
+    python demo_search.py --corpus benchmarks/corpora/synthetic
+
+With --corpus the searches run offline against a recorded corpus (see
+benchmarks/record.py) instead of live Google.
 """
 
+import argparse
 import asyncio
 import json
-import sys
 import os
+import sys
 
 # Add the project root to the path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app.services.search import SearchService
-from app.services.advanced_search import AdvancedSearchService
+from app.services.http_client import SharedHttpClient
+from app.services.providers import SearchProviders
+from app.services.search import BaseService, SearchService, shared_service
 
 
-async def demonstrate_basic_search():
-    """Demonstrate basic search functionality"""
-    print("🔍 Basic Search Demonstration")
+async def demonstrate_basic_search(query: str):
+    """Demonstrate the v1 search: price strings per page"""
+    print("🔍 Basic Search Demonstration (v1)")
     print("=" * 50)
 
-    search_service = SearchService()
-
-    # Test with a product search
-    query = "iPhone 15 Pro price India"
+    search_service: BaseService = shared_service(1)
     print(f"Searching for: {query}")
 
-    results = search_service.search(query, num_results=5)
+    results = await search_service.asearch(query, num_results=5)
 
     print(f"\nQuery: {results['query']}")
-    print(f"Total results found: {results['total_results']}")
+    print(f"Pages searched: {len(results.get('pages', []))}")
+    print(f"Results with prices: {len(results['results'])}")
 
     for i, result in enumerate(results["results"], 1):
         print(f"\n--- Result {i} ---")
-        print(f"🌐 URL: {result['url']}")
-        print(f"📝 Title: {result['title'][:100]}...")
-        print(f"📄 Description: {result['description'][:100]}...")
-        print(f"💰 Prices found: {result['prices']}")
-        if result["images"]:
-            print(f"🖼️  Images: {len(result['images'])} found")
+        print(f"🌐 URL: {result.link}")
+        print(f"📝 Product: {(result.product_name or 'N/A')[:100]}")
+        print(f"💰 Prices found: {result.prices}")
+        print(f"💱 Currency: {result.currency}")
         print("-" * 40)
 
+    for page in results.get("pages", []):
+        if page["status"] != "completed":
+            print(f"⚠️  {page['status']}: {page['url']}")
 
-async def demonstrate_advanced_search():
-    """Demonstrate advanced search with site-specific parsing"""
-    print("\n🚀 Advanced Search Demonstration")
-    print("=" * 50)
 
-    advanced_service = AdvancedSearchService()
+async def demonstrate_enhanced_search(query: str):
+    """Demonstrate the v2 search: normalized prices with their source"""
+    print("\n🚀 Enhanced Search Demonstration (v2)")
+    print("=" * 50)
 
-    # Test with specific e-commerce search
-    query = "Samsung Galaxy S24 price"
+    search_service: SearchService = shared_service(2)
     print(f"Searching for: {query}")
 
-    results = advanced_service.enhanced_search(query, num_results=3)
+    results = await search_service.asearch(query, num_results=3)
 
     print(f"\nQuery: {results['query']}")
-    print(f"Total results found: {results['total_results']}")
+    print(f"Results with prices: {len(results['results'])}")
 
     for i, result in enumerate(results["results"], 1):
-        print(f"\n--- Advanced Result {i} ---")
-        print(f"🌐 URL: {result['url']}")
-        print(f"🏪 Site Type: {result.get('site_type', 'unknown')}")
-        print(f"📝 Title: {result.get('title', 'N/A')[:100]}...")
-
-        # Show specific fields based on site type
-        if result.get("site_type") in ["amazon", "flipkart", "myntra"]:
-            print(f"💰 Price: {result.get('price', 'N/A')}")
-            print(f"💸 Original Price: {result.get('original_price', 'N/A')}")
-            print(f"🏷️  Discount: {result.get('discount', 'N/A')}")
-            print(f"⭐ Rating: {result.get('rating', 'N/A')}")
-            print(f"📊 Reviews: {result.get('reviews_count', 'N/A')}")
-        else:
-            print(f"💰 Prices found: {result.get('prices', [])}")
-
-        if result.get("images"):
-            print(f"🖼️  Images: {len(result['images'])} found")
+        print(f"\n--- Enhanced Result {i} ---")
+        print(f"🌐 URL: {result.link}")
+        print(f"📝 Product: {(result.product_name or 'N/A')[:100]}")
+        print(f"💱 Currency: {result.currency}")
+        for price in result.prices[:5]:
+            print(f"💰 {price['value']:,.2f} {price['currency']}  ({price['source']}: {price['raw_text']})")
+        if len(result.prices) > 5:
+            print(f"   ... and {len(result.prices) - 5} more")
         print("-" * 40)
 
 
@@ -86,9 +82,9 @@ def demonstrate_api_usage():
 
     # Example API request body
     api_request = {
-        "query": "MacBook Pro M3 price",
-        "country": "India",
-        "num_results": 5,
+        "query": "MacBook Pro M3",
+        "country": "IN",
+        "version": 1,
     }
 
     print("Example API Request:")
@@ -97,37 +93,38 @@ def demonstrate_api_usage():
     print("\nTo test the API, start the FastAPI server:")
     print("python main.py")
     print("\nThen make a POST request to:")
-    print("http://localhost:1000/search")
-    print("\nWith the above JSON body.")
+    print("http://localhost:1000/api/search/")
+    print("\nWith the above JSON body and a Basic Authorization header.")
+    print("Results stream as they are found from /api/search/stream/,")
+    print("and many searches go in one call to /api/search/batch/.")
 
 
-def price_comparison_example():
+async def price_comparison_example(query: str):
     """Example of price comparison across multiple sites"""
     print("\n💰 Price Comparison Example")
     print("=" * 50)
 
-    search_service = SearchService()
-
-    # Search for a specific product
-    query = "iPhone 14 128GB price comparison"
-    results = search_service.search(query, num_results=5)
+    search_service: SearchService = shared_service(2)
+    results = await search_service.asearch(query, num_results=5)
 
-    # Extract and display prices
+    # Best price per page, cheapest first
     all_prices = []
     for result in results["results"]:
-        if result["prices"]:
-            for price in result["prices"]:
-                all_prices.append(
-                    {
-                        "price": price,
-                        "url": result["url"],
-                        "title": result["title"][:50] + "...",
-                    }
-                )
+        best = search_service.get_best_price(result.prices)
+        if best:
+            all_prices.append(
+                {
+                    "value": best["value"],
+                    "currency": best["currency"],
+                    "url": result.link,
+                    "title": (result.product_name or "N/A")[:50],
+                }
+            )
+    all_prices.sort(key=lambda price: price["value"])
 
     print(f"Found {len(all_prices)} prices:")
     for price_info in all_prices:
-        print(f"💰 {price_info['price']} - {price_info['title']}")
+        print(f"💰 {price_info['value']:,.2f} {price_info['currency']} - {price_info['title']}")
         print(f"   🌐 {price_info['url']}")
 
 
@@ -151,32 +148,49 @@ def create_search_tips():
         print(tip)
 
 
-async def main():
-    """Main demonstration function"""
-    print("🛍️  Google Search & Price Extraction Demo")
-    print("=" * 60)
-
+async def run_demo(queries: list):
     try:
-        # Basic search demo
-        await demonstrate_basic_search()
+        await demonstrate_basic_search(queries[0])
+        await demonstrate_enhanced_search(queries[1])
+        demonstrate_api_usage()
+        await price_comparison_example(queries[2])
+        create_search_tips()
+    finally:
+        await SharedHttpClient.aclose()
 
-        # Advanced search demo
-        await demonstrate_advanced_search()
 
-        # API usage example
-        demonstrate_api_usage()
+def main():
+    """Main demonstration function"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="recorded corpus to search offline")
+    args = parser.parse_args()
 
-        # Price comparison example
-        price_comparison_example()
+    print("🛍️  Google Search & Price Extraction Demo")
+    print("=" * 60)
 
-        # Search tips
-        create_search_tips()
+    queries = ["iPhone 15 Pro price India", "Samsung Galaxy S24 price", "iPhone 14 128GB price comparison"]
+    try:
+        if args.corpus is None:
+            asyncio.run(run_demo(queries))
+            return
+
+        from benchmarks.record import RecordedCorpus
+        from benchmarks.replay_server import ReplayServer
+        from benchmarks.suite import ReplayProvider
+
+        corpus = RecordedCorpus.load(args.corpus)
+        queries = [search["query"] for search in corpus.searches[:3]]
+        queries += queries[-1:] * (3 - len(queries))
+        with ReplayServer(corpus, latency_scale=0.2) as server:
+            server.pin_hosts()
+            SearchProviders.use(ReplayProvider(corpus, server.port, latency_scale=0.2))
+            asyncio.run(run_demo(queries))
 
     except Exception as e:
         print(f"❌ Error during demonstration: {str(e)}")
         print("Make sure you have installed all required packages:")
-        print("pip install beautifulsoup4 requests googlesearch-python lxml html5lib")
+        print("pip install -r requirements.txt")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
@@ -1,13 +1,34 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 
 from app.access_control.authentication import AuthenticationService
+from app.config.search_config import SearchConfig
 from app.interface.routes import api_router
+from app.services.executors import SearchExecutor
+from app.services.http_client import SharedHttpClient
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    SharedHttpClient.get()
+    yield
+    await SharedHttpClient.aclose()
+    SearchExecutor.shutdown()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 AuthenticationService.set_config()
 
+if SearchConfig.RESPONSE_COMPRESSION:
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=SearchConfig.RESPONSE_COMPRESSION_MIN_BYTES,
+        compresslevel=SearchConfig.RESPONSE_GZIP_LEVEL,
+    )
 app.include_router(api_router)
 
 